@@ -0,0 +1,412 @@
+"""
+Caché en proceso de agendas diarias por doctor: (doctor_id, día) -> citas
+
+La agenda de un doctor es la lectura más frecuente del servicio y cambia
+poco. Cada entrada guarda las citas de un día, en orden (hora, id), ya
+serializadas: JSON compacto de filas sin claves y sin doctor_id ni fecha
+(van en la clave), unos 150 bytes por cita. La caché está acotada por número
+de días y por bytes (LRU) y cada entrada caduca a los AGENDA_CACHE_TTL_SECONDS,
+que es también el máximo que una réplica puede servir una agenda vieja si
+pierde un evento de invalidación.
+
+- Un fallo carga con una sola consulta por rango los días pendientes desde
+  ese día (hasta AGENDA_CACHE_LOAD_DAYS), incluidos los días sin citas.
+- Crear, modificar o borrar una cita invalida en el momento sus días en esta
+  réplica (invalidate_agenda, tras el commit) y publica AGENDA_CHANGED; las
+  demás réplicas lo reciben en su propia cola exclusiva (AgendaCacheSync).
+- Una carga que coincide con una invalidación no se guarda: podría haber
+  leído la agenda de antes del commit.
+
+stats() expone aciertos, fallos, hit ratio y la antigüedad de lo servido, y
+el retraso con el que llegan las invalidaciones de otras réplicas.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Appointment
+from pagination import decode_cursor, encode_key
+
+logger = logging.getLogger(__name__)
+
+AGENDA_CACHE_ENABLED = os.getenv("AGENDA_CACHE_ENABLED", "true").lower() == "true"
+AGENDA_CACHE_MAX_DAYS = int(os.getenv("AGENDA_CACHE_MAX_DAYS", "20000"))
+AGENDA_CACHE_MAX_BYTES = int(os.getenv("AGENDA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+AGENDA_CACHE_TTL_SECONDS = float(os.getenv("AGENDA_CACHE_TTL_SECONDS", "300"))
+AGENDA_CACHE_LOAD_DAYS = int(os.getenv("AGENDA_CACHE_LOAD_DAYS", "7"))
+AGENDA_CACHE_SYNC_ENABLED = os.getenv("AGENDA_CACHE_SYNC_ENABLED", "true").lower() == "true"
+
+# Columnas guardadas por cita, en este orden
+COLUMNS = (
+    "id", "appointment_time", "patient_id", "patient_email", "patient_name",
+    "status", "reason", "created_at", "updated_at"
+)
+
+Key = Tuple[int, date]
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def serialize_day(appointments: Iterable[Appointment]) -> bytes:
+    """Citas de un día como JSON compacto, una fila por cita en el orden de COLUMNS"""
+    return json.dumps(
+        [[a.id, a.appointment_time.isoformat(), a.patient_id, a.patient_email, a.patient_name,
+          a.status, a.reason, _iso(a.created_at), _iso(a.updated_at)] for a in appointments],
+        separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def deserialize_day(doctor_id: int, day: date, payload: bytes) -> List[Dict[str, Any]]:
+    """Citas de la entrada como dicts de AppointmentResponse"""
+    appointments = []
+    for row in json.loads(payload):
+        appointment = dict(zip(COLUMNS, row))
+        appointment["doctor_id"] = doctor_id
+        appointment["appointment_date"] = day
+        appointment["appointment_time"] = dtime.fromisoformat(appointment["appointment_time"])
+        appointment["created_at"] = datetime.fromisoformat(appointment["created_at"]) if appointment["created_at"] else None
+        appointment["updated_at"] = datetime.fromisoformat(appointment["updated_at"]) if appointment["updated_at"] else None
+        appointments.append(appointment)
+    return appointments
+
+
+class AgendaCache:
+    """Días de agenda serializados, LRU acotado por días y bytes, con TTL"""
+
+    def __init__(
+        self,
+        max_days: int = AGENDA_CACHE_MAX_DAYS,
+        max_bytes: int = AGENDA_CACHE_MAX_BYTES,
+        ttl_seconds: float = AGENDA_CACHE_TTL_SECONDS,
+        load_days: int = AGENDA_CACHE_LOAD_DAYS
+    ):
+        self.max_days = max_days
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.load_days = max(1, load_days)
+        # clave -> (payload, cargada en monotonic)
+        self._entries: "OrderedDict[Key, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Invalidaciones hasta ahora: una carga solo se guarda si no cambió mientras leía
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        self.discarded_loads = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+    def get(self, doctor_id: int, day: date) -> Optional[bytes]:
+        """Entrada serializada del día, o None (contado como fallo)"""
+        key = (doctor_id, day)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] >= self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            age = now - entry[1]
+            self._served_age_total += age
+            self._served_age_max = max(self._served_age_max, age)
+            return entry[0]
+
+    def _load(self, db: Session, doctor_id: int, date_from: date, date_to: date) -> Dict[date, bytes]:
+        """Una consulta por rango; guarda cada día del rango, también los vacíos"""
+        with self._lock:
+            generation = self._generation
+        appointments = db.execute(
+            select(Appointment)
+            .where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.appointment_date >= date_from,
+                Appointment.appointment_date <= date_to
+            )
+            .order_by(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+        ).scalars().all()
+
+        by_day: Dict[date, List[Appointment]] = {}
+        for appointment in appointments:
+            by_day.setdefault(appointment.appointment_date, []).append(appointment)
+        loaded = {}
+        day = date_from
+        while day <= date_to:
+            loaded[day] = serialize_day(by_day.get(day, ()))
+            day += timedelta(days=1)
+
+        self._store(doctor_id, loaded, generation)
+        return loaded
+
+    def days(
+        self,
+        db: Session,
+        doctor_id: int,
+        date_from: date,
+        date_to: date
+    ) -> Iterator[Tuple[date, List[Dict[str, Any]]]]:
+        """(día, citas) en orden; carga los días que falten por tramos"""
+        loaded: Dict[date, bytes] = {}
+        day = date_from
+        while day <= date_to:
+            payload = loaded.get(day)
+            if payload is None:
+                payload = self.get(doctor_id, day)
+            if payload is None:
+                chunk_end = min(day + timedelta(days=self.load_days - 1), date_to)
+                loaded = self._load(db, doctor_id, day, chunk_end)
+                with self._lock:
+                    # Cada día del tramo se sirve desde la consulta: un fallo por día
+                    self.misses += (chunk_end - day).days
+                payload = loaded[day]
+            yield day, deserialize_day(doctor_id, day, payload)
+            day += timedelta(days=1)
+
+    # ------------------------------------------------------------------
+    # Escrituras
+    # ------------------------------------------------------------------
+    def _remove(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def _store(self, doctor_id: int, loaded: Dict[date, bytes], generation: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation:
+                self.discarded_loads += 1
+                return
+            for day, payload in loaded.items():
+                key = (doctor_id, day)
+                self._remove(key)
+                self._entries[key] = (payload, now)
+                self._bytes += len(payload)
+            while self._entries and (len(self._entries) > self.max_days or self._bytes > self.max_bytes):
+                key, (payload, _) = self._entries.popitem(last=False)
+                self._bytes -= len(payload)
+                self.evictions += 1
+
+    def invalidate(self, doctor_id: int, days: Iterable[date], lag_seconds: Optional[float] = None) -> None:
+        """Olvida días de la agenda de un doctor; ``lag_seconds`` si viene de otra réplica"""
+        with self._lock:
+            self._generation += 1
+            for day in days:
+                self._remove((doctor_id, day))
+            if lag_seconds is None:
+                self.invalidations += 1
+            else:
+                self.remote_invalidations += 1
+                lag_seconds = max(0.0, lag_seconds)
+                self._lag_total += lag_seconds
+                self._lag_max = max(self._lag_max, lag_seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "days": len(self._entries),
+                "bytes": self._bytes,
+                "max_days": self.max_days,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "remote_invalidations": self.remote_invalidations,
+                "discarded_loads": self.discarded_loads,
+                # Antigüedad de las agendas servidas desde caché (staleness)
+                "served_age_avg_seconds": round(self._served_age_total / self.hits, 3) if self.hits else 0.0,
+                "served_age_max_seconds": round(self._served_age_max, 3),
+                # Retraso entre el commit en otra réplica y la invalidación aquí
+                "invalidation_lag_avg_ms": round(self._lag_total * 1000 / self.remote_invalidations, 1)
+                if self.remote_invalidations else 0.0,
+                "invalidation_lag_max_ms": round(self._lag_max * 1000, 1),
+            }
+
+
+# Instancia compartida por las rutas del proceso
+agenda_cache = AgendaCache()
+
+
+class AgendaCacheSync:
+    """Fan-out de invalidaciones entre réplicas (AGENDA_CHANGED) en hilos de fondo
+
+    notify() solo encola: la publicación la hace un hilo propio, así una
+    petición no espera a RabbitMQ. Otro hilo consume la cola exclusiva de
+    esta réplica e invalida los días recibidos (salvo los propios).
+    """
+
+    def __init__(
+        self,
+        cache: Optional[AgendaCache] = None,
+        config=None,
+        max_pending: int = 10000,
+        reconnect_delay: float = 5.0
+    ):
+        from hduce_shared.rabbitmq import RabbitMQConfig, ReplicaSubscriber
+
+        self.cache = cache if cache is not None else agenda_cache
+        self.config = config or RabbitMQConfig.from_env()
+        self.origin = uuid.uuid4().hex[:12]
+        self.published = 0
+        self.publish_failures = 0
+        self.dropped = 0
+        self.received = 0
+        self._pending: "queue.Queue[Tuple[int, List[str], float]]" = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # Lo cacheado antes de conectar pudo perder invalidaciones
+        self.subscriber = ReplicaSubscriber(
+            self.config.agenda_routing_key,
+            self.handle,
+            on_connect=self.cache.clear,
+            config=self.config,
+            name="Agenda-Cache-Sync",
+            reconnect_delay=reconnect_delay
+        )
+
+    # ------------------------------------------------------------------
+    # Publicación
+    # ------------------------------------------------------------------
+    def notify(self, doctor_id: int, days: Iterable[date]) -> None:
+        """Encola AGENDA_CHANGED para las demás réplicas (no bloquea)"""
+        if not self._threads:
+            return
+        try:
+            self._pending.put_nowait((doctor_id, sorted(day.isoformat() for day in days), time.time()))
+        except queue.Full:
+            # Las otras réplicas lo verán al caducar la entrada (TTL)
+            self.dropped += 1
+
+    def _publish_loop(self) -> None:
+        from hduce_shared.rabbitmq import get_publisher_pool
+
+        while not self._stop.is_set():
+            try:
+                doctor_id, dates, invalidated_at = self._pending.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if get_publisher_pool(self.config).publish_agenda_changed(doctor_id, dates, self.origin, invalidated_at):
+                self.published += 1
+            else:
+                self.publish_failures += 1
+
+    # ------------------------------------------------------------------
+    # Consumo
+    # ------------------------------------------------------------------
+    def handle(self, message: Dict[str, Any]) -> None:
+        """Aplica un AGENDA_CHANGED de otra réplica"""
+        from hduce_shared.rabbitmq import AGENDA_CHANGED, AgendaChangedData
+
+        if message.get("event_type") != AGENDA_CHANGED:
+            return
+        data = AgendaChangedData.from_message(message)
+        if data.origin == self.origin:
+            return
+        lag = time.time() - data.invalidated_at if data.invalidated_at is not None else 0.0
+        self.cache.invalidate(data.doctor_id, [date.fromisoformat(day) for day in data.dates], lag_seconds=lag)
+        self.received += 1
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._threads = [
+            self.subscriber.start(),
+            threading.Thread(target=self._publish_loop, name="Agenda-Cache-Publisher", daemon=True),
+        ]
+        self._threads[1].start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self.subscriber.stop(timeout)
+        for thread in self._threads[1:]:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "origin": self.origin,
+            "published": self.published,
+            "publish_failures": self.publish_failures,
+            "dropped": self.dropped,
+            "received": self.received,
+            "pending": self._pending.qsize(),
+        }
+
+
+agenda_sync = AgendaCacheSync()
+
+
+def invalidate_agenda(*slots: Tuple[Optional[int], Optional[date]]) -> None:
+    """Tras el commit: invalida los (doctor_id, día) aquí y en las demás réplicas"""
+    by_doctor: Dict[int, set] = {}
+    for doctor_id, day in slots:
+        if doctor_id is not None and day is not None:
+            by_doctor.setdefault(doctor_id, set()).add(day)
+    for doctor_id, days in by_doctor.items():
+        agenda_cache.invalidate(doctor_id, days)
+        agenda_sync.notify(doctor_id, days)
+
+
+def agenda_page(
+    db: Session,
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    status: Optional[str],
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Página de la agenda desde la caché; mismo orden y cursor que keyset_page"""
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None:
+        date_from = max(date_from, after[0])
+
+    appointments: List[Dict[str, Any]] = []
+    for day, day_appointments in agenda_cache.days(db, doctor_id, date_from, date_to):
+        for appointment in day_appointments:
+            if status is not None and appointment["status"] != status:
+                continue
+            if after is not None and (day, appointment["appointment_time"], appointment["id"]) <= after:
+                continue
+            appointments.append(appointment)
+            if len(appointments) > limit:
+                last = appointments[limit - 1]
+                return appointments[:limit], encode_key(last["appointment_date"], last["appointment_time"], last["id"])
+    return appointments, None
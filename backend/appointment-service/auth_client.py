@@ -15,25 +15,27 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 
 from hduce_shared.config import settings
-from hduce_shared.auth import JWTManager
+from hduce_shared.auth import jwt_manager_from_settings
 
 logger = logging.getLogger(__name__)
-security = HTTPBearer()
+# Sin Authorization: 401 en verify_token (HTTPBearer daría 403 según la versión)
+security = HTTPBearer(auto_error=False)
 
 try:
     jwt_secret_key = settings.jwt.jwt_secret_key
     logger.info(f"JWT Secret Key loaded (first 10 chars): {jwt_secret_key[:10]}...")
-    jwt_manager = JWTManager(secret_key=jwt_secret_key)
+    # RS256/EdDSA con la JWKS de auth-service (+ HS256 mientras se acepte)
+    jwt_manager = jwt_manager_from_settings(settings.jwt)
     logger.info("✅ JWTManager initialized successfully")
 except Exception as e:
     logger.error(f"❌ Failed to initialize JWTManager: {e}")
     raise
 
-async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+async def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Dict[str, Any]:
     """
     Verifies a JWT token using shared JWTManager
     """
-    jwt_token = credentials.credentials
+    jwt_token = credentials.credentials if credentials is not None else None
     
     if not jwt_token or jwt_token == "null" or jwt_token == "undefined":
         logger.error("No authentication token provided")
@@ -47,7 +49,8 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     
     try:
        
-        payload = jwt_manager.decode_token(jwt_token)
+        # Una kid desconocida descarga la JWKS en un hilo, no en el event loop
+        payload = await jwt_manager.decode_token_async(jwt_token)
         
        
         if payload is None:
@@ -88,6 +91,6 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
         )
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     """Alias for verify_token for compatibility with existing code"""
     return await verify_token(credentials)
@@ -0,0 +1,175 @@
+"""
+Disponibilidad de doctores: huecos libres a partir de la plantilla semanal
+
+Para una ventana [date_from, date_to]:
+
+1. Una consulta carga el doctor con su plantilla (JOIN doctor_working_hours).
+2. Una consulta por rango trae las horas de las citas activas del doctor en
+   la ventana, ya ordenadas (índice ix_appointments_doctor_date_time_id).
+3. Un barrido en memoria recorre, día a día, los huecos de la plantilla y
+   las citas en paralelo (dos punteros, ambos en orden): O(huecos + citas),
+   sin una consulta por día ni por hueco.
+
+Un hueco [inicio, inicio + slot_minutes) está ocupado si alguna cita empieza
+dentro de él o lo solapa (una cita ocupa la duración del hueco). Los huecos
+ya pasados no se ofrecen.
+
+Crear o mover una cita solo acepta el inicio de un hueco libre de la
+plantilla (slot_is_bookable): así todas las citas activas empiezan en la
+rejilla y dos reservas del mismo hueco tienen la misma hora de inicio. La
+garantía frente a dos reservas simultáneas de ese hueco es el índice único
+uq_appointments_doctor_slot.
+"""
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from models import Appointment, Doctor
+
+# Ventana máxima de una consulta de disponibilidad (días)
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", "92"))
+
+# Horario de los doctores sin plantilla: lunes a viernes, 08:00-17:00, huecos de 30 min
+AVAILABILITY_DEFAULT_WEEKDAYS = os.getenv("AVAILABILITY_DEFAULT_WEEKDAYS", "0,1,2,3,4")
+AVAILABILITY_DEFAULT_START = os.getenv("AVAILABILITY_DEFAULT_START", "08:00")
+AVAILABILITY_DEFAULT_END = os.getenv("AVAILABILITY_DEFAULT_END", "17:00")
+AVAILABILITY_SLOT_MINUTES = int(os.getenv("AVAILABILITY_SLOT_MINUTES", "30"))
+
+# (inicio, fin, duración del hueco) en minutos desde medianoche
+Block = Tuple[int, int, int]
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _default_blocks() -> Dict[int, List[Block]]:
+    start = _minutes(time.fromisoformat(AVAILABILITY_DEFAULT_START))
+    end = _minutes(time.fromisoformat(AVAILABILITY_DEFAULT_END))
+    weekdays = [int(day) for day in AVAILABILITY_DEFAULT_WEEKDAYS.split(",") if day.strip()]
+    return {weekday: [(start, end, AVAILABILITY_SLOT_MINUTES)] for weekday in weekdays}
+
+
+def blocks_by_weekday(working_hours: Iterable) -> Dict[int, List[Block]]:
+    """Plantilla del doctor (filas DoctorWorkingHours) agrupada y ordenada por día"""
+    blocks: Dict[int, List[Block]] = {}
+    for row in working_hours:
+        blocks.setdefault(row.weekday, []).append(
+            (_minutes(row.start_time), _minutes(row.end_time), row.slot_minutes)
+        )
+    if not blocks:
+        return _default_blocks()
+    for day_blocks in blocks.values():
+        day_blocks.sort()
+    return blocks
+
+
+def free_slots(
+    blocks: Dict[int, List[Block]],
+    booked: Sequence[Tuple[date, time]],
+    date_from: date,
+    date_to: date,
+    now: Optional[datetime] = None
+) -> List[Tuple[date, List[int]]]:
+    """Barrido: huecos libres por día, en minutos desde medianoche
+
+    ``booked`` son (fecha, hora) de las citas activas ordenadas por fecha y
+    hora, como las devuelve la consulta por rango.
+    """
+    now = now or datetime.now()
+    today, now_minutes = now.date(), now.hour * 60 + now.minute
+    days: List[Tuple[date, List[int]]] = []
+
+    i, n = 0, len(booked)
+    day = date_from
+    while day <= date_to:
+        # Citas de días anteriores (fuera de plantilla o fines de semana)
+        while i < n and booked[i][0] < day:
+            i += 1
+        # Citas de este día, en minutos
+        starts = []
+        while i < n and booked[i][0] == day:
+            starts.append(_minutes(booked[i][1]))
+            i += 1
+
+        slots: List[int] = []
+        if day >= today:
+            earliest = now_minutes if day == today else -1
+            j, m = 0, len(starts)
+            for block_start, block_end, step in blocks.get(day.weekday(), ()):
+                slot = block_start
+                while slot + step <= block_end:
+                    # Descartar citas que terminan antes de este hueco
+                    while j < m and starts[j] + step <= slot:
+                        j += 1
+                    if slot > earliest and not (j < m and starts[j] < slot + step):
+                        slots.append(slot)
+                    slot += step
+        days.append((day, slots))
+        day += timedelta(days=1)
+    return days
+
+
+def load_availability(
+    db: Session,
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    now: Optional[datetime] = None,
+    exclude_id: Optional[int] = None
+) -> Optional[List[Tuple[date, List[int]]]]:
+    """Huecos libres de un doctor en la ventana; None si el doctor no existe
+
+    ``exclude_id`` no cuenta esa cita como ocupada (la que se está moviendo).
+    """
+    doctor = db.execute(
+        select(Doctor).options(joinedload(Doctor.working_hours)).where(Doctor.id == doctor_id)
+    ).unique().scalar_one_or_none()
+    if doctor is None:
+        return None
+
+    query = (
+        select(Appointment.appointment_date, Appointment.appointment_time)
+        .where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.appointment_date >= date_from,
+            Appointment.appointment_date <= date_to,
+            Appointment.status != "cancelled"
+        )
+        .order_by(Appointment.appointment_date, Appointment.appointment_time)
+    )
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    booked = db.execute(query).all()
+    return free_slots(blocks_by_weekday(doctor.working_hours), booked, date_from, date_to, now)
+
+
+def slot_is_bookable(
+    db: Session,
+    doctor_id: int,
+    day: date,
+    at: time,
+    now: Optional[datetime] = None,
+    exclude_id: Optional[int] = None
+) -> Optional[bool]:
+    """¿``at`` es el inicio de un hueco libre (y futuro) del doctor ese día?
+
+    None si el doctor no existe.
+    """
+    days = load_availability(db, doctor_id, day, day, now, exclude_id)
+    if days is None:
+        return None
+    if at.second or at.microsecond:
+        return False
+    return _minutes(at) in days[0][1]
+
+
+def format_slots(days: List[Tuple[date, List[int]]]) -> List[dict]:
+    """[{"date": "2026-03-02", "slots": ["08:00", "08:30", ...]}, ...]"""
+    return [
+        {"date": day.isoformat(), "slots": [f"{slot // 60:02d}:{slot % 60:02d}" for slot in slots]}
+        for day, slots in days
+    ]
@@ -0,0 +1,165 @@
+"""
+Migraciones de esquema de appointment_db
+
+Las tablas de appointment_db las crean los scripts de database/init-scripts,
+así que los cambios posteriores (índices, columnas) se aplican aquí, en orden,
+una sola vez por base de datos: cada versión aplicada queda registrada en
+schema_migrations.
+
+- Al arrancar el servicio (lifespan de main.py) se aplican las pendientes.
+  Con varias réplicas, un pg_advisory_lock hace que solo una las ejecute y
+  las demás esperen a que termine.
+- Los índices se crean con CREATE INDEX CONCURRENTLY (en Postgres), sin
+  bloquear las escrituras en appointments mientras se construyen. Por eso
+  cada paso corre en autocommit y debe ser idempotente (IF NOT EXISTS): si
+  el proceso cae a mitad, la migración se repite entera. Un índice que quedó
+  INVALID por una construcción interrumpida se borra y se vuelve a crear.
+
+Uso independiente:
+    python migrations.py
+"""
+import logging
+import os
+import sys
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, '/app')  # Para Docker
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from hduce_shared.database import DatabaseManager
+
+from models import Appointment, DoctorWorkingHours
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "appointments"
+
+# Clave del advisory lock de migraciones de appointment_db
+MIGRATIONS_LOCK_ID = 72_001
+
+
+def _create_index(connection: Connection, index) -> None:
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        invalid = connection.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": index.name}).first()
+        if invalid:
+            logger.warning(f"⚠️ Índice {index.name} inválido (construcción interrumpida), se recrea")
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+    if postgres:
+        ddl = ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)  # también CREATE UNIQUE INDEX
+    connection.execute(text(ddl))
+
+
+def create_indexes(table, *names: str) -> Callable[[Connection], None]:
+    """Paso de migración: crea los índices ``names`` declarados en el modelo"""
+    indexes = {index.name: index for index in table.indexes}
+    missing = [name for name in names if name not in indexes]
+    if missing:
+        raise ValueError(f"Índices no declarados en {table.name}: {missing}")
+
+    def migrate(connection: Connection) -> None:
+        for name in names:
+            _create_index(connection, indexes[name])
+    return migrate
+
+
+def create_tables(*tables) -> Callable[[Connection], None]:
+    """Paso de migración: crea las tablas nuevas (con sus índices) si no existen"""
+    def migrate(connection: Connection) -> None:
+        for table in tables:
+            table.create(connection, checkfirst=True)
+    return migrate
+
+
+def check_no_double_bookings(connection: Connection) -> None:
+    """Antes del índice único: citas activas repetidas impedirían crearlo
+
+    No se resuelven solas (habría que decidir qué cita se mantiene): se
+    listan y la migración falla hasta que se corrijan.
+    """
+    duplicates = connection.execute(text(
+        "SELECT doctor_id, appointment_date, appointment_time, COUNT(*) AS n "
+        "FROM appointments WHERE status <> 'cancelled' "
+        "GROUP BY doctor_id, appointment_date, appointment_time HAVING COUNT(*) > 1 "
+        "ORDER BY appointment_date, appointment_time LIMIT 20"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"doctor {d} {day} {at} x{n}" for d, day, at, n in duplicates)
+        raise RuntimeError(
+            f"Hay citas activas duplicadas; cancele las sobrantes antes de migrar: {listed}"
+        )
+
+
+def steps(*migrations: Callable[[Connection], None]) -> Callable[[Connection], None]:
+    """Varios pasos en una misma versión"""
+    def migrate(connection: Connection) -> None:
+        for migration in migrations:
+            migration(connection)
+    return migrate
+
+
+# (versión, paso) en orden de aplicación; nunca modificar una ya publicada
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_appointment_keyset_indexes", create_indexes(
+        Appointment.__table__,
+        "ix_appointments_date_time_id",
+        "ix_appointments_patient_date_time_id",
+        "ix_appointments_doctor_date_time_id",
+        "ix_appointments_status_date_time_id",
+    )),
+    ("0002_doctor_availability", steps(
+        create_tables(DoctorWorkingHours.__table__),
+        check_no_double_bookings,
+        create_indexes(Appointment.__table__, "uq_appointments_doctor_slot"),
+    )),
+]
+
+
+def run_migrations(engine: Engine = None) -> List[str]:
+    """Aplica las migraciones pendientes; devuelve las versiones aplicadas"""
+    engine = engine or DatabaseManager.get_engine(SERVICE_NAME)
+    applied_now: List[str] = []
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        postgres = connection.dialect.name == "postgresql"
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+        try:
+            connection.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version VARCHAR(100) PRIMARY KEY, "
+                "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            applied = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+            for version, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                logger.info(f"🔄 Aplicando migración {version}...")
+                migrate(connection)
+                connection.execute(
+                    text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                    {"version": version}
+                )
+                applied_now.append(version)
+                logger.info(f"✅ Migración {version} aplicada")
+        finally:
+            if postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+
+    return applied_now
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    versions = run_migrations()
+    print(f"✅ {len(versions)} migraciones aplicadas: {versions}" if versions else "✅ Esquema al día")
@@ -11,7 +11,7 @@ from sqlalchemy.sql import func
 
 
 from hduce_shared.database import Base
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Date, Time
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Date, Time, JSON, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -39,9 +39,50 @@ class Doctor(Base):
   
     specialty = relationship("Specialty", back_populates="doctors")
     appointments = relationship("Appointment", back_populates="doctor")
+    working_hours = relationship(
+        "DoctorWorkingHours",
+        back_populates="doctor",
+        order_by="(DoctorWorkingHours.weekday, DoctorWorkingHours.start_time)",
+        cascade="all, delete-orphan"
+    )
+
+class DoctorWorkingHours(Base):
+    """Bloque de la plantilla semanal de un doctor (ver availability.py)
+
+    weekday: 0 = lunes ... 6 = domingo. El bloque se divide en huecos de
+    slot_minutes desde start_time; un doctor sin bloques usa el horario por
+    defecto (AVAILABILITY_DEFAULT_*).
+    """
+    __tablename__ = "doctor_working_hours"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+
+    doctor = relationship("Doctor", back_populates="working_hours")
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Paginación por keyset en (appointment_date, appointment_time, id):
+    # un índice por filtro con la misma cola de ordenación (ver pagination.py).
+    # En bases existentes los crea migrations.py (CONCURRENTLY, sin bloquear escrituras).
+    __table_args__ = (
+        Index("ix_appointments_date_time_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_patient_date_time_id", "patient_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_doctor_date_time_id", "doctor_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_status_date_time_id", "status", "appointment_date", "appointment_time", "id"),
+        # Una sola cita activa por doctor y hueco: la base de datos rechaza la
+        # segunda reserva concurrente (las canceladas liberan el hueco)
+        Index(
+            "uq_appointments_doctor_slot", "doctor_id", "appointment_date", "appointment_time",
+            unique=True,
+            postgresql_where=text("status <> 'cancelled'"),
+            sqlite_where=text("status <> 'cancelled'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, nullable=False)
@@ -60,4 +101,20 @@ class Appointment(Base):
     doctor = relationship("Doctor", back_populates="appointments")
 
 
+class OutboxEvent(Base):
+    """Evento pendiente de publicar (transactional outbox).
+
+    Se escribe en la misma transacción que la cita; outbox_relay.py lo
+    publica en RabbitMQ con confirms y borra la fila al confirmarse.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+
 
@@ -0,0 +1,162 @@
+"""
+Outbox relay - publica en RabbitMQ los eventos de la tabla outbox_events
+
+create_appointment escribe el evento en la misma transacción que la cita, así
+que no se pierde si el proceso muere antes de publicar. Este relay lo drena
+por lotes: bloquea las filas pendientes con SELECT ... FOR UPDATE SKIP LOCKED
+(varios workers o réplicas se reparten el trabajo sin esperar), las publica
+con publisher confirms y borra las confirmadas antes de hacer commit.
+
+Entrega at-least-once: si el relay cae tras publicar y antes del commit, el
+lote se vuelve a publicar. Con varios workers el orden entre lotes no está
+garantizado.
+
+Uso independiente:
+    python outbox_relay.py
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import wait
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, '/app')  # Para Docker
+
+from sqlalchemy import delete, select
+
+from hduce_shared.database import DatabaseManager
+from hduce_shared.rabbitmq import ConfirmingPublisher, get_confirming_publisher
+
+from models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "appointments"
+
+OUTBOX_RELAY_ENABLED = os.getenv("OUTBOX_RELAY_ENABLED", "true").lower() == "true"
+OUTBOX_RELAY_WORKERS = int(os.getenv("OUTBOX_RELAY_WORKERS", "1"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_CONFIRM_TIMEOUT = float(os.getenv("OUTBOX_CONFIRM_TIMEOUT", "10.0"))
+
+
+def ensure_outbox_table() -> None:
+    """Crea outbox_events si no existe (el resto del esquema ya existe)"""
+    OutboxEvent.__table__.create(bind=DatabaseManager.get_engine(SERVICE_NAME), checkfirst=True)
+
+
+class OutboxRelay:
+    """Drena outbox_events hacia RabbitMQ con uno o varios hilos worker"""
+
+    def __init__(
+        self,
+        publisher: Optional[ConfirmingPublisher] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        confirm_timeout: float = OUTBOX_CONFIRM_TIMEOUT
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.confirm_timeout = confirm_timeout
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def relay_batch(self) -> int:
+        """Publica un lote de eventos pendientes; devuelve cuántos se confirmaron"""
+        publisher = self.publisher or get_confirming_publisher()
+        with DatabaseManager.get_session(SERVICE_NAME) as db:
+            events = db.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not events:
+                return 0
+
+            # Un solo plazo para todo el lote (publicar + confirms): las filas
+            # siguen bloqueadas y la transacción abierta mientras se espera
+            deadline = time.monotonic() + self.confirm_timeout
+            futures = [
+                (event, publisher.publish(event.event_type, event.payload,
+                                          timeout=max(0.0, deadline - time.monotonic())))
+                for event in events
+            ]
+            done, _ = wait([future for _, future in futures], timeout=max(0.0, deadline - time.monotonic()))
+
+            confirmed_ids = []
+            for event, future in futures:
+                if future in done and future.exception() is None and future.result() is True:
+                    confirmed_ids.append(event.id)
+                else:
+                    event.attempts += 1
+                    event.last_error = "RabbitMQ did not confirm the event"
+
+            if confirmed_ids:
+                db.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.id.in_(confirmed_ids))
+                    .execution_options(synchronize_session=False)
+                )
+            failed = len(events) - len(confirmed_ids)
+            if failed:
+                logger.error(f"❌ Outbox: {failed} eventos sin confirmar, se reintentarán")
+            return len(confirmed_ids)
+
+    def wake(self) -> None:
+        """Avisa a los workers de que hay eventos nuevos (evita esperar al polling)"""
+        self._wakeup.set()
+
+    def run_forever(self) -> None:
+        """Bucle de un worker: lotes seguidos mientras haya trabajo, si no espera"""
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            try:
+                relayed = self.relay_batch()
+                if relayed:
+                    logger.info(f"✅ Outbox: {relayed} eventos publicados")
+            except Exception as e:
+                logger.error(f"❌ Error en el outbox relay: {e}")
+                relayed = 0
+            if relayed < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+
+    def start(self, workers: int = OUTBOX_RELAY_WORKERS) -> None:
+        """Arranca los workers en hilos daemon"""
+        self._stop.clear()
+        for i in range(workers):
+            thread = threading.Thread(target=self.run_forever, name=f"Outbox-Relay-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✅ Outbox relay iniciado ({workers} workers, lotes de {self.batch_size})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+
+# Instancia compartida: las rutas la despiertan tras escribir en el outbox
+outbox_relay = OutboxRelay()
+
+
+if __name__ == "__main__":
+    from hduce_shared import setup_logging
+
+    setup_logging()
+    ensure_outbox_table()
+    relay = OutboxRelay()
+    logger.info("🚀 Outbox relay independiente iniciado")
+    try:
+        relay.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        get_confirming_publisher().close()
@@ -0,0 +1,86 @@
+"""
+Paginación por keyset (cursor) de citas
+
+Orden estable (appointment_date, appointment_time, id): ``id`` desempata las
+citas a la misma hora. En vez de OFFSET, cada página pide las filas
+posteriores a la última de la anterior:
+
+    WHERE (appointment_date, appointment_time, id) > (:date, :time, :id)
+    ORDER BY appointment_date, appointment_time, id
+    LIMIT :limit + 1
+
+Con los índices compuestos de models.Appointment (uno por filtro, terminados
+en la misma clave de orden) cada página es un descenso por el índice y una
+lectura de ``limit`` entradas: la página 1000 cuesta lo mismo que la 1, y
+no hace falta contar el total. La fila extra solo indica si hay más.
+
+El cursor es opaco para el cliente (base64url de la clave de la última fila);
+un cursor que no se puede decodificar es un 400.
+"""
+import base64
+import json
+from datetime import date, time
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+from models import Appointment
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Cursor manipulado o de otra versión del API"""
+
+
+def encode_key(appointment_date: date, appointment_time: time, appointment_id: int) -> str:
+    key = [appointment_date.isoformat(), appointment_time.isoformat(), appointment_id]
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def encode_cursor(appointment: Appointment) -> str:
+    return encode_key(appointment.appointment_date, appointment.appointment_time, appointment.id)
+
+
+def decode_cursor(cursor: str) -> Tuple[date, time, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii") + b"=" * (-len(cursor) % 4))
+        appointment_date, appointment_time, appointment_id = json.loads(raw)
+        return date.fromisoformat(appointment_date), time.fromisoformat(appointment_time), int(appointment_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+
+def keyset_query(query: Union[Query, Select], cursor: Optional[str], limit: int) -> Union[Query, Select]:
+    """``query`` (Query o select()) ordenada por la clave, tras ``cursor``, con una fila de más"""
+    if cursor:
+        query = query.filter(
+            tuple_(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+            > tuple_(*decode_cursor(cursor))
+        )
+    return (
+        query.order_by(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+        .limit(limit + 1)
+    )
+
+
+def keyset_page(query: Query, cursor: Optional[str], limit: int) -> Tuple[List[Appointment], Optional[str]]:
+    """Una página de ``query`` tras ``cursor``; devuelve (citas, next_cursor)"""
+    return _page(keyset_query(query, cursor, limit).all(), limit)
+
+
+async def async_keyset_page(
+    db: AsyncSession, stmt: Select, cursor: Optional[str], limit: int
+) -> Tuple[List[Appointment], Optional[str]]:
+    """keyset_page con AsyncSession: ``stmt`` es un select(Appointment)"""
+    result = await db.execute(keyset_query(stmt, cursor, limit))
+    return _page(result.scalars().all(), limit)
+
+
+def _page(rows: List[Appointment], limit: int) -> Tuple[List[Appointment], Optional[str]]:
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
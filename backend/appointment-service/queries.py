@@ -0,0 +1,75 @@
+"""
+Consultas de citas por alcance (listado, "mis citas", agenda del doctor)
+
+Cada consulta filtra por una columna con índice compuesto que termina en la
+clave de paginación (appointment_date, appointment_time, id), así que
+Postgres la resuelve con un Index Scan en orden, sin Sort ni lectura de la
+tabla entera (ver models.Appointment y migrations.py):
+
+- mis citas        -> ix_appointments_patient_date_time_id
+- agenda de doctor -> ix_appointments_doctor_date_time_id
+- por estado       -> ix_appointments_status_date_time_id
+- sin filtro       -> ix_appointments_date_time_id
+
+tests/test_query_plans.py comprueba esos planes con estas mismas funciones.
+"""
+import os
+from datetime import date
+from typing import Optional, Union
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Query, Session
+
+from models import Appointment
+
+# Ventana máxima de la agenda de un doctor (días)
+AGENDA_MAX_DAYS = int(os.getenv("AGENDA_MAX_DAYS", "92"))
+
+
+def filter_appointments(
+    query: Union[Query, Select],
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Union[Query, Select]:
+    """Filtros de listado; cada uno tiene su índice (filtro, date, time, id).
+
+    Sirve igual para db.query(Appointment) y para select(Appointment) (AsyncSession).
+    """
+    if patient_id is not None:
+        query = query.filter(Appointment.patient_id == patient_id)
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    if status is not None:
+        query = query.filter(Appointment.status == status)
+    if date_from is not None:
+        query = query.filter(Appointment.appointment_date >= date_from)
+    if date_to is not None:
+        query = query.filter(Appointment.appointment_date <= date_to)
+    return query
+
+
+def patient_appointments(
+    db: Session,
+    patient_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None
+) -> Query:
+    """Citas de un paciente ("mis citas")"""
+    return filter_appointments(db.query(Appointment), patient_id=patient_id, status=status,
+                               date_from=date_from, date_to=date_to)
+
+
+def doctor_agenda(
+    db: Session,
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    status: Optional[str] = None
+) -> Query:
+    """Citas de un doctor entre dos fechas (incluidas)"""
+    return filter_appointments(db.query(Appointment), doctor_id=doctor_id, status=status,
+                               date_from=date_from, date_to=date_to)
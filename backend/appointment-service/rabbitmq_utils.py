@@ -14,7 +14,7 @@ sys.path.insert(0, '/app')
 sys.path.insert(0, '/app/shared-libraries')
 
 try:
-    from hduce_shared.rabbitmq import RabbitMQPublisher
+    from hduce_shared.rabbitmq import get_publisher_pool
     from hduce_shared.config import settings
     logger.info("✅ Shared libraries importadas desde /app")
 except ImportError as e:
@@ -22,7 +22,7 @@ except ImportError as e:
     
     try:
         sys.path.insert(0, '..')
-        from shared_libraries.hduce_shared.rabbitmq import RabbitMQPublisher
+        from shared_libraries.hduce_shared.rabbitmq import get_publisher_pool
         from shared_libraries.hduce_shared.config import settings
         logger.info("✅ Shared libraries importadas desde local")
     except ImportError as e2:
@@ -32,14 +32,10 @@ except ImportError as e:
 
 def publish_appointment_created(appointment_data: Dict[str, Any]) -> bool:
     """
-    Publicar evento de cita creada usando RabbitMQPublisher de shared libraries
+    Publicar evento de cita creada usando el pool de publishers de shared libraries
     """
     try:
-       
-        publisher = RabbitMQPublisher()
-        
-      
-        success = publisher.publish_appointment_created(appointment_data)
+        success = get_publisher_pool().publish_appointment_created(appointment_data)
         
         if success:
             logger.info(f"✅ Evento APPOINTMENT_CREATED publicado: Cita {appointment_data.get('appointment_id', 'N/A')}")
@@ -0,0 +1,97 @@
+"""
+Respuestas JSON pre-serializadas con ETag (listados de doctores)
+
+Los doctores y especialidades solo cambian por administración (scripts SQL),
+así que el listado se serializa una vez por clave (ruta + parámetros) y se
+guarda como bytes con su ETag (hash del cuerpo). Mientras la entrada está
+viva, una petición no toca la base de datos ni Pydantic; si el cliente manda
+If-None-Match con ese ETag, recibe un 304 sin cuerpo (comparación y métricas
+de 304 de shared_middleware.conditional).
+
+La caché está acotada (LRU) y cada entrada caduca a los
+RESPONSE_CACHE_TTL_SECONDS: un cambio en doctors tarda como mucho eso en
+verse. Como el ETag es el hash del contenido, tras caducar un cuerpo igual
+sigue dando 304.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from shared_middleware import JSON_MEDIA_TYPE, conditional_metrics, etag_matches, not_modified
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class SerializedResponseCache:
+    """Cuerpos JSON serializados + ETag por clave, con TTL y tamaño máximo (LRU)"""
+
+    def __init__(self, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # clave -> (cuerpo, etag, caduca en monotonic)
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: Hashable, body: bytes) -> Tuple[bytes, str]:
+        etag = etag_for(body)
+        with self._lock:
+            self._entries[key] = (body, etag, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def respond(self, request: Request, route: str, key: Hashable, build: Callable[[], bytes]) -> Response:
+        """Respuesta desde caché (o 304); ``build`` serializa el cuerpo si falta"""
+        entry = self.get(key)
+        body, etag = entry if entry is not None else self.put(key, build())
+        conditional = "if-none-match" in request.headers
+        matched = conditional and etag_matches(request, etag)
+        conditional_metrics.record(route, conditional, matched)
+        if matched:
+            raise not_modified(etag)
+        return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instancia compartida por los listados de doctores del proceso
+doctor_responses = SerializedResponseCache()
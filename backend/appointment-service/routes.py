@@ -2,19 +2,30 @@
 Routes for appointment service - Versión corregida con DatabaseManager correcto
 """
 import logging
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 
 from hduce_shared.database import DatabaseManager
-from hduce_shared.rabbitmq.publisher import RabbitMQPublisher
-
-
-from models import Appointment, Doctor
-from schemas import AppointmentCreate, AppointmentResponse, DoctorResponse
+from hduce_shared.rabbitmq import APPOINTMENT_CREATED
+from shared_middleware import conditional_get
+
+
+from agenda_cache import AGENDA_CACHE_ENABLED, agenda_page, invalidate_agenda
+from availability import AVAILABILITY_MAX_DAYS, format_slots, load_availability, slot_is_bookable
+from models import Appointment, Doctor, DoctorWorkingHours, OutboxEvent, Specialty
+from outbox_relay import outbox_relay
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, async_keyset_page, keyset_page
+from queries import AGENDA_MAX_DAYS, doctor_agenda, filter_appointments, patient_appointments
+from response_cache import doctor_responses
+from schemas import AppointmentCreate, AppointmentResponse, AvailabilityResponse, DoctorResponse, WorkingHoursBlock
 from auth_client import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -22,6 +33,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Listados de doctores serializados de una vez (sin un modelo Pydantic por fila)
+_doctor_list = TypeAdapter(List[DoctorResponse])
+
 
 def get_db():
     """CORRECTO: Usar DatabaseManager.get_session() como context manager"""
@@ -32,43 +46,229 @@ def get_db():
            
             raise
 
-def publish_appointment_created(appointment_data: dict):
-    """Publica evento de cita creada a RabbitMQ"""
+async def get_async_db():
+    """AsyncSession (asyncpg): las consultas no bloquean el event loop"""
+    async with DatabaseManager.get_async_session("appointments") as session:
+        yield session
+
+def _appointment_event_data(appointment_data: dict) -> dict:
+    """Payload del evento APPOINTMENT_CREATED (esquema v2: incluye doctor y paciente)"""
+    return {
+        "appointment_id": appointment_data.get("id"),
+        "patient_id": appointment_data.get("patient_id"),
+        "patient_email": appointment_data.get("patient_email", ""),
+        "doctor_id": appointment_data.get("doctor_id"),
+        "appointment_date": str(appointment_data.get("appointment_date")),
+        "appointment_time": str(appointment_data.get("appointment_time")),
+        "reason": appointment_data.get("reason", "Consulta médica"),
+        "created_at": datetime.utcnow().isoformat(),
+        "doctor_name": appointment_data.get("doctor_name"),
+        "doctor_specialty": appointment_data.get("doctor_specialty"),
+        "patient_name": appointment_data.get("patient_name")
+    }
+
+async def _doctor_details(db: AsyncSession, doctor_id) -> dict:
+    """Nombre y especialidad del doctor (una sola consulta) para enriquecer eventos"""
+    if doctor_id is None:
+        return {"doctor_name": None, "doctor_specialty": None}
+    result = await db.execute(
+        select(Doctor)
+        .options(joinedload(Doctor.specialty))
+        .where(Doctor.id == doctor_id)
+    )
+    doctor = result.scalars().first()
+    if doctor is None:
+        return {"doctor_name": None, "doctor_specialty": None}
+    return {
+        "doctor_name": doctor.name,
+        "doctor_specialty": doctor.specialty.name if doctor.specialty else None
+    }
+
+def _current_patient_id(current_user: dict) -> int:
     try:
-        publisher = RabbitMQPublisher()
-        success = publisher.publish_appointment_created({
-            "appointment_id": appointment_data.get("id"),
-            "patient_id": appointment_data.get("patient_id"),
-            "patient_email": appointment_data.get("patient_email", ""),
-            "doctor_id": appointment_data.get("doctor_id"),
-            "appointment_date": str(appointment_data.get("appointment_date")),
-            "appointment_time": str(appointment_data.get("appointment_time")),
-            "reason": appointment_data.get("reason", "Consulta médica"),
-            "created_at": datetime.utcnow().isoformat()
-        })
-        if success:
-            logger.info(f"✅ Evento publicado a RabbitMQ para cita #{appointment_data.get('id')}")
-        else:
-            logger.error(f"❌ Error al publicar evento a RabbitMQ para cita #{appointment_data.get('id')}")
-    except Exception as e:
-        logger.error(f"❌ Error en RabbitMQ publisher: {e}")
+        return int(current_user.get("user_id"))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de usuario no válido")
+
+def _is_patient(current_user: dict) -> bool:
+    """Tokens sin rol cuentan como paciente (auth_client usa "patient" por defecto)"""
+    return current_user.get("role", "patient") == "patient"
+
+def _slot_taken(appointment) -> HTTPException:
+    """409 cuando uq_appointments_doctor_slot rechaza la reserva"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Doctor {appointment.doctor_id} already has an appointment on "
+               f"{appointment.appointment_date} at {appointment.appointment_time}"
+    )
+
+def _slot_unavailable(appointment) -> HTTPException:
+    """409 cuando la hora pedida no es un hueco libre de la plantilla del doctor"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"{appointment.appointment_date} at {appointment.appointment_time} is not an available "
+               f"slot for doctor {appointment.doctor_id}"
+    )
+
+def _check_slot(db: Session, appointment, exclude_id: Optional[int] = None) -> None:
+    """404 si el doctor no existe, 409 si la hora no es un hueco libre (las canceladas no ocupan)"""
+    if appointment.status == "cancelled":
+        return
+    bookable = slot_is_bookable(
+        db, appointment.doctor_id, appointment.appointment_date, appointment.appointment_time,
+        exclude_id=exclude_id
+    )
+    if bookable is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if not bookable:
+        raise _slot_unavailable(appointment)
+
+def _is_slot_conflict(error: IntegrityError) -> bool:
+    """IntegrityError de uq_appointments_doctor_slot (no de una FK u otra restricción)"""
+    message = str(error.orig)
+    # Postgres (psycopg2/asyncpg) nombra el índice; SQLite solo lista sus columnas
+    return "uq_appointments_doctor_slot" in message or (
+        "UNIQUE constraint failed: appointments.doctor_id, appointments.appointment_date, "
+        "appointments.appointment_time" in message
+    )
+
+def _doctors_json(doctors) -> bytes:
+    return _doctor_list.dump_json(_doctor_list.validate_python(doctors, from_attributes=True))
+
+def _can_read(current_user: dict, patient_id: int) -> bool:
+    """Un paciente solo ve sus citas; el personal (doctor, admin) ve todas"""
+    return not _is_patient(current_user) or patient_id == _current_patient_id(current_user)
+
+def _appointment_version(
+    appointment_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Versión de una cita para el GET condicional (None si no existe)
+
+    Autenticación y propiedad se comprueban antes: sin ellas un 304 (o su
+    ausencia) revelaría qué ids existen. Una cita ajena es un 404, igual
+    que el endpoint.
+    """
+    row = (
+        db.query(Appointment.id, Appointment.updated_at, Appointment.patient_id)
+        .filter(Appointment.id == appointment_id)
+        .first()
+    )
+    if row is None:
+        return None
+    if not _can_read(current_user, row.patient_id):
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    return row.id, row.updated_at
+
+def _set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """next_cursor en cabeceras: el cuerpo sigue siendo la lista de citas"""
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
 
 @router.get("/appointments/", response_model=List[AppointmentResponse])
 async def get_appointments(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all appointments - GET /api/appointments/"""
+    """Get appointments ordered by date, time and id - GET /api/appointments/
+
+    Keyset pagination: pass the X-Next-Cursor header of a page as ``cursor``
+    to get the next one (no header = last page). Patients only see their own
+    appointments.
+    """
+    if _is_patient(current_user):
+        own_id = _current_patient_id(current_user)
+        if patient_id is not None and patient_id != own_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Patients can only list their own appointments")
+        patient_id = own_id
+
     try:
-        appointments = db.query(Appointment).offset(skip).limit(limit).all()
+        stmt = filter_appointments(select(Appointment), patient_id, doctor_id, status_filter, date_from, date_to)
+        appointments, next_cursor = await async_keyset_page(db, stmt, cursor, limit)
+        _set_next_cursor(request, response, next_cursor)
         return appointments
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error al obtener citas: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting appointments: {str(e)}")
 
-@router.get("/appointments/{appointment_id}", response_model=AppointmentResponse)
+@router.get("/appointments/me", response_model=List[AppointmentResponse])
+async def get_my_appointments(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Appointments of the current user - GET /api/appointments/me"""
+    patient_id = _current_patient_id(current_user)
+    try:
+        query = patient_appointments(db, patient_id, date_from, date_to, status_filter)
+        appointments, next_cursor = keyset_page(query, cursor, limit)
+        _set_next_cursor(request, response, next_cursor)
+        return appointments
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al obtener citas del paciente {patient_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting appointments: {str(e)}")
+
+@router.get("/doctors/{doctor_id}/agenda", response_model=List[AppointmentResponse])
+async def get_doctor_agenda(
+    doctor_id: int,
+    request: Request,
+    response: Response,
+    date_from: date,
+    date_to: date,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Appointments of a doctor between two dates (inclusive) - GET /api/doctors/{id}/agenda"""
+    if _is_patient(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Doctor agendas are restricted to staff")
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if (date_to - date_from).days >= AGENDA_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {AGENDA_MAX_DAYS} days")
+
+    try:
+        if AGENDA_CACHE_ENABLED:
+            appointments, next_cursor = agenda_page(db, doctor_id, date_from, date_to, status_filter, cursor, limit)
+        else:
+            query = doctor_agenda(db, doctor_id, date_from, date_to, status_filter)
+            appointments, next_cursor = keyset_page(query, cursor, limit)
+        _set_next_cursor(request, response, next_cursor)
+        return appointments
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al obtener la agenda del doctor {doctor_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting doctor agenda: {str(e)}")
+
+@router.get(
+    "/appointments/{appointment_id}",
+    response_model=AppointmentResponse,
+    dependencies=[Depends(conditional_get("appointment", _appointment_version))]
+)
 async def get_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
@@ -77,7 +277,7 @@ async def get_appointment(
     """Get specific appointment by ID - GET /api/appointments/{id}"""
     try:
         appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-        if not appointment:
+        if not appointment or not _can_read(current_user, appointment.patient_id):
             raise HTTPException(status_code=404, detail="Appointment not found")
         return appointment
     except HTTPException:
@@ -89,8 +289,7 @@ async def get_appointment(
 @router.post("/appointments/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_appointment(
     appointment: AppointmentCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new appointment - POST /api/appointments/"""
@@ -114,7 +313,9 @@ async def create_appointment(
                 detail="ID de usuario no válido"
             )
 
-       
+        # Solo inicios de hueco libres: el índice único cubre el resto
+        await db.run_sync(lambda session: _check_slot(session, appointment))
+
         appointment_dict = appointment.dict()
 
         
@@ -125,10 +326,7 @@ async def create_appointment(
       
         db_appointment = Appointment(**appointment_dict)
         db.add(db_appointment)
-        db.commit()
-        db.refresh(db_appointment)
-
-        logger.info(f"✅ Cita creada: ID={db_appointment.id}, Paciente={db_appointment.patient_id}")
+        await db.flush()  # Asigna el id para el evento
 
        
         rabbitmq_data = {
@@ -138,18 +336,37 @@ async def create_appointment(
             "doctor_id": db_appointment.doctor_id,
             "appointment_date": str(db_appointment.appointment_date),
             "appointment_time": str(db_appointment.appointment_time),
-            "reason": db_appointment.reason
+            "reason": db_appointment.reason,
+            "patient_name": db_appointment.patient_name,
+            **(await _doctor_details(db, db_appointment.doctor_id))
         }
 
-       
-        background_tasks.add_task(publish_appointment_created, rabbitmq_data)
+        # Outbox: el evento se guarda en la misma transacción que la cita y
+        # outbox_relay lo publica en RabbitMQ (con confirms) tras el commit
+        db.add(OutboxEvent(
+            event_type=APPOINTMENT_CREATED,
+            payload=_appointment_event_data(rabbitmq_data)
+        ))
+        await db.commit()
+        await db.refresh(db_appointment)
+        outbox_relay.wake()
+        invalidate_agenda((db_appointment.doctor_id, db_appointment.appointment_date))
+
+        logger.info(f"✅ Cita creada: ID={db_appointment.id}, Paciente={db_appointment.patient_id}")
 
         return db_appointment
 
     except HTTPException:
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_slot_conflict(e):
+            raise
+        # Otra reserva activa del mismo doctor, día y hora (también si fue simultánea)
+        logger.warning(f"⚠️ Hueco ocupado: doctor {appointment.doctor_id}, {appointment.appointment_date} {appointment.appointment_time}")
+        raise _slot_taken(appointment)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Error al crear cita: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating appointment: {str(e)}")
 
@@ -166,35 +383,153 @@ async def update_appointment(
         if not db_appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
 
+        previous_slot = (db_appointment.doctor_id, db_appointment.appointment_date)
+        moved = (
+            (appointment_update.doctor_id, appointment_update.appointment_date, appointment_update.appointment_time)
+            != (db_appointment.doctor_id, db_appointment.appointment_date, db_appointment.appointment_time)
+        )
+        reactivated = db_appointment.status == "cancelled" and appointment_update.status != "cancelled"
+        if moved or reactivated:
+            _check_slot(db, appointment_update, exclude_id=appointment_id)
+
         for key, value in appointment_update.dict().items():
             setattr(db_appointment, key, value)
 
         db.commit()
         db.refresh(db_appointment)
+        invalidate_agenda(previous_slot, (db_appointment.doctor_id, db_appointment.appointment_date))
         return db_appointment
     except HTTPException:
         raise
+    except IntegrityError as e:
+        db.rollback()
+        if not _is_slot_conflict(e):
+            raise
+        raise _slot_taken(appointment_update)
     except Exception as e:
         db.rollback()
         logger.error(f"Error al actualizar cita {appointment_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Error updating appointment: {str(e)}")
 
-@router.delete("/appointments/{appointment_id}")
+@router.get("/doctors/{doctor_id}/availability", response_model=AvailabilityResponse)
+async def get_doctor_availability(
+    doctor_id: int,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    db: Session = Depends(get_db)
+):
+    """Free slots of a doctor between two dates (inclusive) - GET /api/doctors/{id}/availability"""
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {AVAILABILITY_MAX_DAYS} days")
+
+    try:
+        days = load_availability(db, doctor_id, date_from, date_to)
+    except Exception as e:
+        logger.error(f"Error al calcular la disponibilidad del doctor {doctor_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting availability: {str(e)}")
+    if days is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return {"doctor_id": doctor_id, "date_from": date_from, "date_to": date_to, "days": format_slots(days)}
+
+@router.get("/doctors/{doctor_id}/working-hours", response_model=List[WorkingHoursBlock])
+async def get_working_hours(doctor_id: int, db: Session = Depends(get_db)):
+    """Weekly working-hour template of a doctor (empty = default hours)"""
+    doctor = db.query(Doctor).options(joinedload(Doctor.working_hours)).filter(Doctor.id == doctor_id).first()
+    if doctor is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return doctor.working_hours
+
+@router.put("/doctors/{doctor_id}/working-hours", response_model=List[WorkingHoursBlock])
+async def set_working_hours(
+    doctor_id: int,
+    blocks: List[WorkingHoursBlock],
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Replace the weekly working-hour template of a doctor (staff only)"""
+    if _is_patient(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Working hours are managed by staff")
+
+    ordered = sorted(blocks, key=lambda block: (block.weekday, block.start_time))
+    for previous, block in zip(ordered, ordered[1:]):
+        if block.weekday == previous.weekday and block.start_time < previous.end_time:
+            raise HTTPException(status_code=400, detail=f"Overlapping working hours on weekday {block.weekday}")
+
+    doctor = db.query(Doctor).options(joinedload(Doctor.working_hours)).filter(Doctor.id == doctor_id).first()
+    if doctor is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    try:
+        doctor.working_hours = [DoctorWorkingHours(**block.dict()) for block in ordered]
+        db.commit()
+        db.refresh(doctor)
+        return doctor.working_hours
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al guardar el horario del doctor {doctor_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error saving working hours: {str(e)}")
 
 @router.get('/doctors/', response_model=List[DoctorResponse])
 async def get_doctors(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    """Get all doctors - GET /api/doctors/"""
+    """Get all doctors - GET /api/doctors/ (one query: specialty joined, cached with ETag)"""
+    def build() -> bytes:
+        doctors = (
+            db.query(Doctor)
+            .options(joinedload(Doctor.specialty))
+            .order_by(Doctor.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return _doctors_json(doctors)
+
     try:
-        doctors = db.query(Doctor).offset(skip).limit(limit).all()
-        return doctors
+        return doctor_responses.respond(request, "doctors", ("doctors", skip, limit), build)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f'Error al obtener doctores: {e}')
         raise HTTPException(status_code=500, detail=f'Error getting doctors: {str(e)}')
 
+@router.get('/specialties/{specialty_id}/doctors', response_model=List[DoctorResponse])
+async def get_specialty_doctors(
+    specialty_id: int,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Doctors of a specialty - GET /api/specialties/{id}/doctors (two queries, cached with ETag)"""
+    def build() -> bytes:
+        specialty = db.get(Specialty, specialty_id)
+        if specialty is None:
+            raise HTTPException(status_code=404, detail="Specialty not found")
+        # doctor.specialty se resuelve desde el identity map (ya cargada): sin SELECT por doctor
+        doctors = (
+            db.query(Doctor)
+            .filter(Doctor.specialty_id == specialty_id)
+            .order_by(Doctor.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return _doctors_json(doctors)
+
+    try:
+        return doctor_responses.respond(request, "specialty_doctors", ("specialty_doctors", specialty_id, skip, limit), build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f'Error al obtener doctores de la especialidad {specialty_id}: {e}')
+        raise HTTPException(status_code=500, detail=f'Error getting doctors: {str(e)}')
+
+@router.delete("/appointments/{appointment_id}")
 async def delete_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
@@ -206,8 +541,10 @@ async def delete_appointment(
         if not db_appointment:
             raise HTTPException(status_code=404, detail="Appointment not found")
 
+        slot = (db_appointment.doctor_id, db_appointment.appointment_date)
         db.delete(db_appointment)
         db.commit()
+        invalidate_agenda(slot)
         return {"message": "Appointment deleted successfully"}
     except HTTPException:
         raise
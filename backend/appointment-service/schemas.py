@@ -1,5 +1,5 @@
 ﻿from typing import List, Optional
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime, date, time
 
 
@@ -40,6 +40,32 @@ class DoctorResponse(DoctorBase):
     class Config:
         from_attributes = True
 
+class WorkingHoursBlock(BaseModel):
+    """Bloque de horario semanal (0 = lunes ... 6 = domingo)"""
+    weekday: int = Field(..., ge=0, le=6)
+    start_time: time
+    end_time: time
+    slot_minutes: int = Field(30, ge=5, le=240)
+
+    @validator('end_time')
+    def end_after_start(cls, v, values):
+        if 'start_time' in values and v <= values['start_time']:
+            raise ValueError('end_time must be after start_time')
+        return v
+
+    class Config:
+        from_attributes = True
+
+class AvailabilityDay(BaseModel):
+    date: date
+    slots: List[str]
+
+class AvailabilityResponse(BaseModel):
+    doctor_id: int
+    date_from: date
+    date_to: date
+    days: List[AvailabilityDay]
+
 class AppointmentBase(BaseModel):
     doctor_id: int
     appointment_date: date
@@ -1,12 +1,12 @@
 ﻿"""RabbitMQ service for appointment notifications"""
 from typing import Dict, Any
-from hduce_shared.rabbitmq import RabbitMQPublisher, RabbitMQConfig
+from hduce_shared.rabbitmq import get_publisher_pool
 
 class AppointmentNotificationService:
     """Service to publish appointment events to RabbitMQ"""
     
     def __init__(self):
-        self.publisher = RabbitMQPublisher()
+        self.publisher = get_publisher_pool()
     
     def publish_appointment_created(self, appointment_data: Dict[str, Any]) -> bool:
         """Publish appointment created event"""
@@ -0,0 +1,61 @@
+"""
+Shared setup for the appointment-service tests
+
+Puts the service and shared-libraries on sys.path, loads
+backend/shared-middleware as ``shared_middleware`` (the containers mount it
+as /app/shared_middleware), and provides factories for an in-memory SQLite
+engine and a TestClient over routes.router bound to it.
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "..", "..", "shared-libraries"))
+
+# En los contenedores backend/shared-middleware se monta como /app/shared_middleware
+MIDDLEWARE_DIR = os.path.join(SERVICE_DIR, "..", "shared-middleware")
+if "shared_middleware" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "shared_middleware", os.path.join(MIDDLEWARE_DIR, "__init__.py"), submodule_search_locations=[MIDDLEWARE_DIR]
+    )
+    sys.modules["shared_middleware"] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules["shared_middleware"])
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture(scope="session")
+def sqlite_engine():
+    """Factory: in-memory SQLite engine (one connection shared by all threads) with ``tables`` created"""
+    def create(*tables):
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        for table in tables:
+            table.create(engine)
+        return engine
+    return create
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """Factory: TestClient for routes.router under /api, get_db bound to ``engine``"""
+    import routes
+
+    def create(engine, overrides=None):
+        def get_db():
+            with Session(engine) as db:
+                yield db
+
+        app = FastAPI()
+        app.include_router(routes.router, prefix="/api")
+        app.dependency_overrides[routes.get_db] = get_db
+        app.dependency_overrides.update(overrides or {})
+        return TestClient(app)
+    return create
@@ -0,0 +1,130 @@
+"""
+Doctor agenda cache (agenda_cache.py)
+
+A load that overlaps an invalidation must not be stored, the LRU must stay
+within its day and byte bounds and drop expired days, and agenda_page must
+return the same pages and cursors as keyset_page over doctor_agenda.
+
+Usage (from backend/appointment-service/):
+    python -m pytest tests/test_agenda_cache.py -q
+"""
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import agenda_cache
+from agenda_cache import AgendaCache, agenda_page
+from models import Appointment, Doctor, Specialty
+from pagination import keyset_page
+from queries import doctor_agenda
+
+FROM, TO = date(2026, 3, 2), date(2026, 3, 15)
+
+
+@pytest.fixture(scope="module")
+def engine(sqlite_engine):
+    engine = sqlite_engine(Specialty.__table__, Doctor.__table__, Appointment.__table__)
+    with Session(engine) as db:
+        db.add_all(Doctor(id=doctor_id, name=f"Doctor {doctor_id}") for doctor_id in (1, 2))
+        # Días con varias citas, días vacíos y estados mezclados
+        db.add_all(
+            Appointment(
+                patient_id=i, patient_email="p@test", patient_name="P", doctor_id=1 + i % 2,
+                appointment_date=FROM + timedelta(days=(i * 3) % 14), appointment_time=time(8 + i % 9, 15 * (i % 4)),
+                status=("scheduled", "completed", "cancelled")[i % 3]
+            )
+            for i in range(60)
+        )
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(agenda_cache, "time", clock)
+    return clock
+
+
+def test_load_overlapping_an_invalidation_is_discarded(engine, db):
+    cache = AgendaCache(load_days=3)
+
+    def invalidate_during_load(conn, cursor, statement, parameters, context, executemany):
+        cache.invalidate(1, [FROM])
+
+    event.listen(engine, "after_cursor_execute", invalidate_during_load, once=True)
+    served = dict(cache.days(db, 1, FROM, FROM + timedelta(days=2)))
+
+    # La consulta se sirve, pero no se guarda: pudo leer la agenda anterior al commit
+    assert FROM in served
+    assert len(cache) == 0
+    assert cache.stats()["discarded_loads"] == 1
+
+    list(cache.days(db, 1, FROM, FROM + timedelta(days=2)))
+    assert len(cache) == 3
+
+
+def test_lru_bounds_days_and_bytes(db):
+    cache = AgendaCache(max_days=4, load_days=2)
+    list(cache.days(db, 1, FROM, TO))
+    assert len(cache) == 4
+    assert cache.stats()["evictions"] == 10
+    # Quedan los días cargados más recientemente
+    assert cache.get(1, FROM) is None
+    last_two = len(cache.get(1, TO - timedelta(days=1))) + len(cache.get(1, TO))
+
+    # Con límite de bytes justo para los dos últimos días, solo quedan esos
+    cache = AgendaCache(max_bytes=last_two, load_days=2)
+    list(cache.days(db, 1, FROM, TO))
+    assert cache.stats()["bytes"] == last_two
+    assert len(cache) == 2
+
+
+def test_expired_days_are_reloaded(db, clock):
+    cache = AgendaCache(ttl_seconds=60, load_days=1)
+    list(cache.days(db, 1, FROM, FROM))
+    assert cache.get(1, FROM) is not None
+
+    clock.now += 59
+    assert cache.get(1, FROM) is not None
+    clock.now += 1
+    assert cache.get(1, FROM) is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def _pages(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch(cursor, limit)
+        pages.append(([row["id"] if isinstance(row, dict) else row.id for row in rows], cursor))
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("status", [None, "scheduled"])
+@pytest.mark.parametrize("limit", [1, 3, 7])
+def test_agenda_page_matches_keyset_page(db, monkeypatch, status, limit):
+    monkeypatch.setattr(agenda_cache, "agenda_cache", AgendaCache(load_days=3))
+
+    cached = _pages(lambda cursor, limit: agenda_page(db, 1, FROM, TO, status, cursor, limit), limit)
+    keyset = _pages(lambda cursor, limit: keyset_page(doctor_agenda(db, 1, FROM, TO, status), cursor, limit), limit)
+
+    assert cached == keyset
+    assert sum(len(ids) for ids, _ in cached) == doctor_agenda(db, 1, FROM, TO, status).count()
@@ -0,0 +1,97 @@
+"""
+Bookings must start on a free slot of the doctor's working-hour grid
+
+uq_appointments_doctor_slot only compares exact start times, so 08:00 and
+08:10 would both fit in the same 30-minute slot. Creating or moving an
+appointment therefore only accepts a free slot start (availability.
+slot_is_bookable), and only IntegrityErrors from that index are reported as
+"slot taken".
+
+Usage (from backend/appointment-service/):
+    python -m pytest tests/test_booking_slots.py -q
+"""
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import routes
+from auth_client import get_current_user
+from availability import slot_is_bookable
+from models import Appointment, Doctor, DoctorWorkingHours, Specialty
+
+MONDAY = date(2030, 3, 4)
+NOW = datetime(2030, 3, 1, 12, 0)
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    engine = sqlite_engine(Specialty.__table__, Doctor.__table__, DoctorWorkingHours.__table__, Appointment.__table__)
+    with Session(engine) as db:
+        db.add(Specialty(id=1, name="General"))
+        db.add(Doctor(id=1, name="Doctor 1", specialty_id=1, working_hours=[
+            DoctorWorkingHours(weekday=0, start_time=time(8), end_time=time(12), slot_minutes=30)
+        ]))
+        db.add_all([
+            Appointment(id=1, patient_id=7, patient_email="p@hduce.com", patient_name="P", doctor_id=1,
+                        appointment_date=MONDAY, appointment_time=time(8, 0), status="scheduled"),
+            Appointment(id=2, patient_id=7, patient_email="p@hduce.com", patient_name="P", doctor_id=1,
+                        appointment_date=MONDAY, appointment_time=time(9, 0), status="scheduled"),
+        ])
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def client(engine, api_client):
+    return api_client(engine, {get_current_user: lambda: {"user_id": "1", "role": "admin"}})
+
+
+@pytest.mark.parametrize("at, expected", [
+    (time(8, 0), False),    # ocupado
+    (time(8, 10), False),   # dentro del hueco de las 08:00
+    (time(8, 30), True),
+    (time(8, 30, 15), False),
+    (time(12, 0), False),   # fuera de la plantilla
+])
+def test_slot_is_bookable(engine, at, expected):
+    with Session(engine) as db:
+        assert slot_is_bookable(db, 1, MONDAY, at, now=NOW) is expected
+
+
+def test_own_slot_is_free_when_excluded(engine):
+    with Session(engine) as db:
+        assert slot_is_bookable(db, 1, MONDAY, time(8, 0), now=NOW, exclude_id=1) is True
+        assert slot_is_bookable(db, 99, MONDAY, time(8, 0), now=NOW) is None
+
+
+def _update(client, appointment_id, at, **changes):
+    body = {"doctor_id": 1, "appointment_date": MONDAY.isoformat(), "appointment_time": at, "status": "scheduled"}
+    return client.put(f"/api/appointments/{appointment_id}", json={**body, **changes})
+
+
+def test_move_inside_a_taken_slot_is_409(client):
+    response = _update(client, 2, "08:10:00")
+    assert response.status_code == 409
+    assert "not an available slot" in response.json()["detail"]
+
+
+def test_move_to_a_free_slot_and_edit_in_place(client):
+    assert _update(client, 2, "10:30:00").status_code == 200
+    assert _update(client, 2, "10:30:00", reason="control").status_code == 200
+
+
+def test_unknown_doctor_is_404(client):
+    assert _update(client, 2, "10:30:00", doctor_id=99).status_code == 404
+
+
+@pytest.mark.parametrize("message, is_slot", [
+    ('duplicate key value violates unique constraint "uq_appointments_doctor_slot"', True),
+    ("UNIQUE constraint failed: appointments.doctor_id, appointments.appointment_date, "
+     "appointments.appointment_time", True),
+    ('insert or update on table "appointments" violates foreign key constraint "appointments_doctor_id_fkey"', False),
+    ("NOT NULL constraint failed: appointments.patient_email", False),
+])
+def test_only_the_slot_index_maps_to_409(message, is_slot):
+    assert routes._is_slot_conflict(IntegrityError("INSERT ...", {}, Exception(message))) is is_slot
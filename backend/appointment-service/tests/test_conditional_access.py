@@ -0,0 +1,75 @@
+"""
+Conditional GET of an appointment must not bypass authentication
+
+The ETag/304 dependency on GET /api/appointments/{id} runs before the
+endpoint, so it has to authenticate and check ownership itself: an anonymous
+or foreign If-None-Match must never get a 304 (which would confirm that the
+id exists), and "*" is not honored.
+
+Usage (from backend/appointment-service/):
+    python -m pytest tests/test_conditional_access.py -q
+"""
+from datetime import date, time
+
+import pytest
+from sqlalchemy.orm import Session
+
+from auth_client import jwt_manager
+from models import Appointment, Doctor, Specialty
+
+OWNER_ID = 7
+
+
+def token(user_id, role="patient"):
+    return {"Authorization": f"Bearer {jwt_manager.create_access_token({'sub': f'user{user_id}', 'user_id': user_id, 'role': role})}"}
+
+
+@pytest.fixture(scope="module")
+def client(sqlite_engine, api_client):
+    engine = sqlite_engine(Specialty.__table__, Doctor.__table__, Appointment.__table__)
+    with Session(engine) as db:
+        db.add(Specialty(id=1, name="General"))
+        db.add(Doctor(id=1, name="Doctor 1", specialty_id=1))
+        db.add(Appointment(
+            id=1, patient_id=OWNER_ID, patient_email="p@hduce.com", patient_name="P", doctor_id=1,
+            appointment_date=date(2026, 3, 2), appointment_time=time(9, 0), status="scheduled"
+        ))
+        db.commit()
+    return api_client(engine)
+
+
+@pytest.fixture(scope="module")
+def etag(client):
+    response = client.get("/api/appointments/1", headers=token(OWNER_ID))
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+
+@pytest.mark.parametrize("appointment_id", [1, 999])
+@pytest.mark.parametrize("if_none_match", ["*", 'W/"anything"'])
+def test_anonymous_conditional_get_is_401(client, appointment_id, if_none_match):
+    response = client.get(f"/api/appointments/{appointment_id}", headers={"If-None-Match": if_none_match})
+    assert response.status_code == 401
+    assert "etag" not in response.headers
+
+
+def test_anonymous_with_current_etag_is_401(client, etag):
+    response = client.get("/api/appointments/1", headers={"If-None-Match": etag})
+    assert response.status_code == 401
+    assert "etag" not in response.headers
+
+
+def test_other_patient_gets_404_not_304(client, etag):
+    response = client.get("/api/appointments/1", headers={**token(OWNER_ID + 1), "If-None-Match": etag})
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+
+def test_owner_and_staff_get_304(client, etag):
+    assert client.get("/api/appointments/1", headers={**token(OWNER_ID), "If-None-Match": etag}).status_code == 304
+    assert client.get("/api/appointments/1", headers={**token(1, "doctor"), "If-None-Match": etag}).status_code == 304
+
+
+def test_wildcard_is_not_honored(client):
+    response = client.get("/api/appointments/1", headers={**token(OWNER_ID), "If-None-Match": "*"})
+    assert response.status_code == 200
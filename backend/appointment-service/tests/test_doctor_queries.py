@@ -0,0 +1,95 @@
+"""
+SQL statement counts for the doctor listings (no N+1)
+
+GET /api/doctors/ and GET /api/specialties/{id}/doctors nest each doctor's
+specialty. With lazy loading that is one extra SELECT per doctor; these tests
+count the statements each request sends to the database, so the count must
+stay fixed whatever the page size. Cached responses (response_cache.py) must
+not touch the database at all, and a matching If-None-Match gets a 304.
+
+Usage (from backend/appointment-service/):
+    python -m pytest tests/test_doctor_queries.py -q
+"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Doctor, Specialty
+from response_cache import doctor_responses
+from shared_middleware import conditional_metrics
+
+
+@pytest.fixture(scope="module")
+def engine(sqlite_engine):
+    engine = sqlite_engine(Specialty.__table__, Doctor.__table__)
+    with Session(engine) as db:
+        db.add_all(Specialty(id=specialty_id, name=f"Specialty {specialty_id}") for specialty_id in range(1, 6))
+        db.add_all(
+            Doctor(id=doctor_id, name=f"Doctor {doctor_id}", specialty_id=1 + doctor_id % 5)
+            for doctor_id in range(1, 41)
+        )
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def client(engine, api_client):
+    doctor_responses.invalidate()
+    return api_client(engine)
+
+
+@pytest.mark.parametrize("limit", [5, 40])
+def test_doctor_list_is_one_query(client, statements, limit):
+    response = client.get("/api/doctors/", params={"limit": limit})
+    assert response.status_code == 200
+    doctors = response.json()
+    assert len(doctors) == limit
+    assert all(doctor["specialty"]["id"] == doctor["specialty_id"] for doctor in doctors)
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.parametrize("limit", [2, 8])
+def test_specialty_doctors_is_two_queries(client, statements, limit):
+    response = client.get("/api/specialties/3/doctors", params={"limit": limit})
+    assert response.status_code == 200
+    doctors = response.json()
+    assert len(doctors) == limit
+    assert all(doctor["specialty"]["name"] == "Specialty 3" for doctor in doctors)
+    assert len(statements) == 2, statements
+
+
+def test_unknown_specialty_is_404(client):
+    assert client.get("/api/specialties/99/doctors").status_code == 404
+
+
+def test_cached_listing_skips_the_database(client, statements):
+    first = client.get("/api/doctors/")
+    second = client.get("/api/doctors/")
+    assert len(statements) == 1, statements
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["content-type"] == "application/json; charset=utf-8"
+
+
+def test_matching_etag_is_304(client, statements):
+    etag = client.get("/api/doctors/").headers["etag"]
+    response = client.get("/api/doctors/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert len(statements) == 1, statements
+
+    assert client.get("/api/doctors/", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert conditional_metrics.stats()["doctors"]["not_modified"] >= 1
@@ -0,0 +1,170 @@
+"""
+Query-plan regression tests for the appointment queries (queries.py)
+
+The scoped queries ("my appointments", doctor agenda, listing filters) must be
+answered from their composite index, in index order: no sequential scan and
+no sort step. The schema is built the way production gets it: the table as
+the init scripts create it (primary key only), then migrations.py.
+
+Runs on an in-memory SQLite database. Set APPOINTMENT_TEST_DATABASE_URL to a
+Postgres URL to check the real planner as well (tables go in a throwaway
+schema; sequential scans are disabled so that the tiny test table does not
+make a seq scan cheaper, and a missing index still shows up as Seq Scan).
+
+Usage (from backend/appointment-service/):
+    python -m pytest tests/test_query_plans.py -q
+"""
+import json
+import os
+import uuid
+from datetime import date, time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from migrations import run_migrations
+from models import Appointment, Doctor, Specialty
+from pagination import encode_cursor, keyset_query
+from queries import doctor_agenda, filter_appointments, patient_appointments
+
+POSTGRES_URL = os.getenv("APPOINTMENT_TEST_DATABASE_URL")
+
+FROM, TO = date(2026, 3, 1), date(2026, 3, 31)
+
+
+def _create_schema(engine) -> None:
+    """Tables as the init scripts leave them, then the migrations"""
+    for table in (Specialty.__table__, Doctor.__table__, Appointment.__table__):
+        table.create(engine)
+    with engine.begin() as connection:
+        for index in Appointment.__table__.indexes:
+            if index.name.endswith("_date_time_id"):
+                connection.execute(text(f"DROP INDEX {index.name}"))
+    run_migrations(engine)
+
+    # Distribución parecida a producción: muchos pacientes y doctores, pocos estados;
+    # sin dos citas activas del mismo doctor a la misma hora (uq_appointments_doctor_slot)
+    with Session(engine) as db:
+        db.add_all(Doctor(id=doctor_id, name=f"Doctor {doctor_id}") for doctor_id in range(1, 41))
+        db.add_all(
+            Appointment(
+                patient_id=i % 500, patient_email="p@test", patient_name="P", doctor_id=1 + i % 40,
+                appointment_date=date(2026, 1 + i % 6, 1 + i % 28), appointment_time=time(8 + i % 10, 30 * (i % 2) + 5 * (i // 840)),
+                status=("scheduled", "completed", "cancelled")[i % 3]
+            )
+            for i in range(4000)
+        )
+        db.commit()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def _sqlite_engine(sqlite_engine):
+    engine = sqlite_engine()
+    _create_schema(engine)
+    return engine, lambda: None
+
+
+def _postgres_engine():
+    schema = f"plan_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    _create_schema(engine)
+
+    def drop():
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+    return engine, drop
+
+
+ENGINES = ["sqlite"] + (["postgresql"] if POSTGRES_URL else [])
+
+
+@pytest.fixture(scope="module", params=ENGINES)
+def engine(request, sqlite_engine):
+    engine, drop = _sqlite_engine(sqlite_engine) if request.param == "sqlite" else _postgres_engine()
+    yield engine
+    drop()
+
+
+def explain(engine, query) -> dict:
+    """Indexes used, and whether the plan scans the whole table or sorts"""
+    statement = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+            plan = plan if isinstance(plan, list) else json.loads(plan)
+            nodes, pending = [], [plan[0]["Plan"]]
+            while pending:
+                node = pending.pop()
+                nodes.append(node)
+                pending.extend(node.get("Plans", []))
+            return {
+                "indexes": {node["Index Name"] for node in nodes if "Index Name" in node},
+                "full_scan": any(node["Node Type"] == "Seq Scan" for node in nodes),
+                "sort": any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes),
+            }
+
+        details = [row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+        return {
+            "indexes": {word for detail in details for word in detail.split() if word.startswith("ix_")},
+            "full_scan": any(detail.startswith("SCAN appointments") and "INDEX" not in detail for detail in details),
+            "sort": any("TEMP B-TREE" in detail for detail in details),
+        }
+
+
+def assert_index_scan(engine, query, index_name):
+    plan = explain(engine, query)
+    assert index_name in plan["indexes"], plan
+    assert not plan["full_scan"], plan
+    assert not plan["sort"], plan
+
+
+def test_migrations_create_keyset_indexes(engine):
+    with engine.connect() as connection:
+        applied = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+    assert "0001_appointment_keyset_indexes" in applied
+    assert run_migrations(engine) == []
+
+
+def test_my_appointments_uses_patient_index(engine):
+    with Session(engine) as db:
+        query = keyset_query(patient_appointments(db, 7), None, 100)
+        assert_index_scan(engine, query, "ix_appointments_patient_date_time_id")
+
+
+def test_my_appointments_date_range_uses_patient_index(engine):
+    with Session(engine) as db:
+        query = keyset_query(patient_appointments(db, 7, FROM, TO, status="scheduled"), None, 100)
+        assert_index_scan(engine, query, "ix_appointments_patient_date_time_id")
+
+
+def test_doctor_agenda_uses_doctor_index(engine):
+    with Session(engine) as db:
+        query = keyset_query(doctor_agenda(db, 1, FROM, TO), None, 100)
+        assert_index_scan(engine, query, "ix_appointments_doctor_date_time_id")
+
+
+def test_doctor_agenda_next_page_uses_doctor_index(engine):
+    with Session(engine) as db:
+        last = Appointment(id=50, appointment_date=date(2026, 3, 10), appointment_time=time(9))
+        query = keyset_query(doctor_agenda(db, 1, FROM, TO), encode_cursor(last), 100)
+        assert_index_scan(engine, query, "ix_appointments_doctor_date_time_id")
+
+
+def test_status_listing_uses_status_index(engine):
+    with Session(engine) as db:
+        query = keyset_query(filter_appointments(db.query(Appointment), status="cancelled"), None, 100)
+        assert_index_scan(engine, query, "ix_appointments_status_date_time_id")
+
+
+def test_unfiltered_listing_uses_date_index(engine):
+    with Session(engine) as db:
+        query = keyset_query(filter_appointments(db.query(Appointment), date_from=FROM), None, 100)
+        assert_index_scan(engine, query, "ix_appointments_date_time_id")
@@ -1,14 +1,20 @@
 ﻿from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import jwt
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
-import bcrypt
+import asyncio
+import uuid
 
 # Importar modelos y database
-from database import get_db
+from database import get_db, get_db_context
 from models import User
+from password_policy import password_policy
+from token_versions import REVOKED, VALID, token_versions
+from signing_keys import signing_keys
+from hduce_shared.auth import JWTManager, revocation_list
+from hduce_shared.config import settings
 
 # Configuración
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -16,30 +22,32 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 # ============================================
 # SECRET KEY UNIFICADA - USAR LA MISMA QUE USER-SERVICE
 # ============================================
-# Usar la MISMA secret key que está en shared-libraries/hduce_shared/config/settings.py
-SECRET_KEY = "your-super-secret-jwt-key-change-this-in-production"
+# La MISMA secret key que shared-libraries/hduce_shared/config/settings.py.
+# Solo firma con JWT_SIGNING_ALGORITHM=HS256; con RS256/EdDSA (por defecto)
+# firma signing_keys.py y el secreto solo verifica tokens HS256 anteriores
+# mientras JWT_ACCEPT_HS256 siga activo.
+SECRET_KEY = settings.jwt.jwt_secret_key
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 15
 
 print(f"[AUTH] Usando secret key unificada: {SECRET_KEY[:10]}...")
 
-# Función para verificar contraseña - BCRYPT DIRECTO
+# Verificación local: clave pública por kid (RS256/EdDSA) o secreto (HS256)
+token_verifier = JWTManager(
+    secret_key=SECRET_KEY if settings.jwt.accept_hs256 else None,
+    algorithm=ALGORITHM,
+    jwks=signing_keys
+)
+
+# Función para verificar contraseña (algoritmo según el prefijo del hash)
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verificar contraseña usando bcrypt directamente"""
-    try:
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
-            hashed_password.encode('utf-8')
-        )
-    except Exception as e:
-        print(f"Error en verify_password: {e}")
-        return False
+    """Verificar contraseña con la política de password_policy.py"""
+    return password_policy.verify(plain_password, hashed_password)
 
 # Función para hashear contraseña
 def get_password_hash(password: str) -> str:
-    """Hashear contraseña usando bcrypt"""
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    """Hashear contraseña con el algoritmo y coste calibrados"""
+    return password_policy.hash(password)
 
 # Función para autenticar usuario
 def authenticate_user(db: Session, email: str, password: str):
@@ -58,19 +66,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    if signing_keys.enabled:
+        return signing_keys.sign(to_encode)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Access token de un usuario (login y /refresh)
+def create_user_access_token(user: User) -> str:
+    """Access token con los claims que usa /verify sin base de datos (ver token_versions.py)"""
+    return create_access_token(
+        data={
+            "sub": user.email,
+            "email": user.email,
+            "username": user.username or user.email.split("@")[0],
+            "user_id": str(user.id),
+            "role": user.role,
+            "active": user.is_active,
+            "ver": user.token_version or 1
+        }
+    )
+
 # Función para verificar token
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    return token_verifier.decode_token(token)
 
 # Función para obtener usuario actual
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -81,7 +102,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     
     payload = verify_token(token)
-    if payload is None:
+    if payload is None or revocation_list.is_revoked(payload.get("jti")):
         raise credentials_exception
     
     email: str = payload.get("sub")
@@ -91,6 +112,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
+
+    # Tokens con versión: rechazar los revocados (usuario desactivado o versión nueva)
+    if "ver" in payload and (not user.is_active or int(payload["ver"]) != (user.token_version or 1)):
+        raise credentials_exception
     
     return user
 
@@ -99,3 +124,59 @@ def get_current_user_from_token(token: str = Depends(oauth2_scheme), db: Session
     """Alias para get_current_user (compatibilidad)"""
     return get_current_user(token, db)
 
+# ============================================
+# VERIFICACIÓN SIN BASE DE DATOS (/verify)
+# ============================================
+def _claims_from_db(payload: dict) -> Optional[dict]:
+    """Estado actual del usuario en auth_db (tokens sin versión o con versión desconocida)"""
+    with get_db_context() as db:
+        if payload.get("user_id") is not None:
+            user = db.get(User, int(payload["user_id"]))
+        else:
+            user = db.query(User).filter(User.email == payload.get("sub")).first()
+        if user is None:
+            return None
+
+        version = user.token_version or 1
+        token_versions.update(user.id, version, bool(user.is_active))
+        if not user.is_active or ("ver" in payload and int(payload["ver"]) != version):
+            return None
+        return {
+            **payload,
+            "sub": user.email,
+            "user_id": str(user.id),
+            "username": user.username,
+            "role": user.role,
+            "active": user.is_active,
+            "ver": version
+        }
+
+async def get_verified_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """Claims de un token válido y no revocado
+
+    Camino rápido: firma + conjunto de versiones en memoria, sin Postgres.
+    Solo consulta auth_db con tokens antiguos (sin ``ver``) o cuando la
+    versión del token es más nueva que la conocida por este proceso.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = verify_token(token)
+    if payload is None or payload.get("sub") is None or revocation_list.is_revoked(payload.get("jti")):
+        raise credentials_exception
+
+    if "ver" in payload and payload.get("user_id") is not None:
+        state = token_versions.check(payload)
+        if state == VALID:
+            return payload
+        if state == REVOKED:
+            raise credentials_exception
+
+    claims = await asyncio.to_thread(_claims_from_db, payload)
+    if claims is None:
+        raise credentials_exception
+    return claims
+
@@ -0,0 +1,100 @@
+"""
+Benchmark: login storm with bcrypt on the event loop vs in the hashing pool.
+
+Fires --logins concurrent password verifications (the bcrypt part of
+/auth/login) while a probe coroutine decodes a JWT every 10ms, standing in
+for /auth/verify and /auth/me on the same worker. Prints p50/p99 login
+latency, p50/p99 probe latency and how many logins got a fast 429.
+
+    inline:   verify_password() called directly in the coroutine (old login)
+    pool:     await password_pool.verify() (bounded pool, 429 when saturated)
+    no-limit: same pool with a queue as long as the storm (no 429s)
+
+Usage (from backend/auth-service/, inside the service image):
+    python benchmarks/bench_login_pool.py --logins 200 --workers 4 --max-queue 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_utils import create_access_token, verify_password, verify_token
+from password_pool import LatencyRecorder, PasswordPool, PoolSaturatedError
+
+PASSWORD = "paciente123"
+
+
+async def probe(stop, latencies):
+    token = create_access_token({"sub": "paciente@hduce.com"})
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        verify_token(token)
+        # Lo que pasa de los 10ms del sleep es tiempo bloqueado por otros
+        latencies.record(max(0.0, time.perf_counter() - start - 0.01))
+
+
+async def run(label, login, logins):
+    login_latencies = LatencyRecorder(window=logins)
+    probe_latencies = LatencyRecorder()
+    rejected = 0
+
+    async def one_login():
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            assert await login()
+        except PoolSaturatedError:
+            rejected += 1
+            return
+        login_latencies.record(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(stop, probe_latencies))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+
+    logins_stats = login_latencies.stats()
+    probe_stats = probe_latencies.stats()
+    print(
+        f"{label:<8} {elapsed:>6.2f}s  login p50 {logins_stats['p50_ms']:>7.1f}ms p99 {logins_stats['p99_ms']:>7.1f}ms"
+        f"  | verify p50 {probe_stats['p50_ms']:>6.1f}ms p99 {probe_stats['p99_ms']:>7.1f}ms"
+        f"  | 429s {rejected}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--kind", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+
+    async def inline_login():
+        return verify_password(PASSWORD, hashed)
+
+    await run("inline", inline_login, args.logins)
+
+    pool = PasswordPool(kind=args.kind, workers=args.workers, max_queue=args.max_queue)
+    unbounded = PasswordPool(kind=args.kind, workers=args.workers, max_queue=args.logins)
+    await run("pool", lambda: pool.verify(PASSWORD, hashed), args.logins)
+    await run("no-limit", lambda: unbounded.verify(PASSWORD, hashed), args.logins)
+    pool.shutdown()
+    unbounded.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
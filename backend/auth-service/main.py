@@ -1,5 +1,6 @@
 ﻿import sys
 import os
+import asyncio
 
 # Configurar path para imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -7,18 +8,13 @@ sys.path.insert(0, current_dir)
 sys.path.insert(0, '/app')  # Para shared-libraries
 
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-import json
-from fastapi.responses import JSONResponse
-import json
-from fastapi.responses import JSONResponse
-import json
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 # IMPORTAR DE SHARED-LIBRARIES (MANTENER)
 from hduce_shared.auth import JWTManager
 from hduce_shared.config import settings
+from shared_middleware import FastJSONResponse, install_middleware
 
 # Importar rutas locales
 from routes import router
@@ -34,7 +30,8 @@ app = FastAPI(
 
     title="HDUCE Auth Service",
     description="Authentication service with real JWT and PostgreSQL",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS
@@ -45,6 +42,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_middleware(app)
 
 # Incluir rutas
 app.include_router(router, prefix="/auth")
@@ -55,10 +53,47 @@ async def startup_event():
     try:
         from database import create_auth_tables
         create_auth_tables()
+        from token_versions import ensure_token_version_column
+        ensure_token_version_column()
         logger.info("✅ Database tables created")
     except Exception as e:
         logger.error(f"❌ Database error: {e}")
 
+    # Claves de firma RS256/EdDSA: carga y recarga periódica (rotación sin reinicio)
+    from signing_keys import signing_keys
+    if signing_keys.enabled:
+        await asyncio.to_thread(signing_keys.start)
+
+    # Conjunto de versiones de token para /verify sin base de datos
+    from token_versions import token_versions
+    await asyncio.to_thread(token_versions.start)
+
+    # Lista de revocación: precarga desde auth_db + eventos TOKEN_REVOKED
+    from hduce_shared.auth import JWT_REVOCATION_SYNC_ENABLED
+    from revocations import revocation_sync
+    if JWT_REVOCATION_SYNC_ENABLED:
+        await asyncio.to_thread(revocation_sync.preload)
+        revocation_sync.start()
+
+    # Calibrar el coste de hashing en la CPU de este host (sin bloquear el loop)
+    from password_policy import PASSWORD_HASH_CALIBRATE, password_policy
+    if PASSWORD_HASH_CALIBRATE:
+        await asyncio.to_thread(password_policy.calibrate)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cerrar el pool de contraseñas y la recarga de versiones de token"""
+    from password_pool import password_pool
+    password_pool.shutdown()
+    from token_versions import token_versions
+    token_versions.stop()
+    from revocations import revocation_sync
+    revocation_sync.stop()
+    from signing_keys import signing_keys
+    signing_keys.stop()
+    from hduce_shared.rabbitmq import close_publisher_pool
+    close_publisher_pool()
+
 @app.get("/")
 async def root():
     return {
@@ -68,6 +103,12 @@ async def root():
         "using_shared_libraries": True
     }
 
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """Misma JWKS que /auth/.well-known/jwks.json, en la ruta estándar"""
+    from signing_keys import signing_keys
+    return FastJSONResponse(signing_keys.jwks(), headers={"Cache-Control": "public, max-age=300"})
+
 @app.get("/health")
 async def health():
     return {"status": "healthy", "service": "auth"}
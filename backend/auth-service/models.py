@@ -26,6 +26,8 @@ class User(Base):
     role = Column(String, default="patient", nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Se incrementa al cambiar rol/estado o cerrar todas las sesiones: invalida los tokens emitidos
+    token_version = Column(Integer, default=1, nullable=False, server_default="1")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -44,3 +46,29 @@ class User(Base):
             "is_superuser": self.is_superuser,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
+
+
+class RevokedToken(Base):
+    """Tokens revocados antes de su exp (precarga de la lista de revocación al arrancar)"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RefreshToken(Base):
+    """Refresh tokens rotativos: se guarda solo el HMAC del token, nunca el token"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, index=True, nullable=False)
+    # Todas las rotaciones de un mismo login comparten familia (detección de reutilización)
+    family_id = Column(String(32), index=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    session_expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
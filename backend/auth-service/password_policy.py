@@ -0,0 +1,303 @@
+"""
+Política de contraseñas de auth-service
+
+Un único sitio decide cómo se hashean y verifican las contraseñas:
+
+- Algoritmo configurable (PASSWORD_HASH_ALGORITHM): bcrypt (por defecto),
+  scrypt (hashlib, memory-hard, sin dependencias) o argon2id (argon2-cffi,
+  opcional). La verificación elige el algoritmo por el prefijo del hash
+  guardado (``$2b$``, ``$scrypt$``, ``$argon2id$``), así que conviven hashes
+  de varios algoritmos durante una migración.
+- Factor de trabajo calibrado al arrancar: se mide el algoritmo en la CPU del
+  host y se elige el coste más cercano a PASSWORD_HASH_TARGET_MS por hash
+  (acotado por un mínimo de seguridad). Con PASSWORD_HASH_CALIBRATE=false se
+  usa el coste configurado tal cual.
+- Rehash perezoso: tras un login correcto, ``needs_rehash`` indica si el hash
+  guardado usa otro algoritmo o un coste distinto del objetivo y la ruta lo
+  reemplaza con la contraseña en claro que acaba de verificar. Un hash más
+  fuerte que el objetivo solo se rebaja si lo supera en más de
+  PASSWORD_REHASH_TOLERANCE, para que pods calibrados con un punto de
+  diferencia no se pisen en cada login (convergen al mayor).
+
+Reemplaza al script migrate_passwords.py: ``python password_policy.py migrate``
+hashea con la política actual las contraseñas guardadas en claro.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import bcrypt
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    HAS_ARGON2 = True
+except ImportError:
+    HAS_ARGON2 = False
+    PasswordHasher = None
+    InvalidHashError = VerificationError = None
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_ALGORITHM = os.getenv("PASSWORD_HASH_ALGORITHM", "bcrypt")  # bcrypt | scrypt | argon2
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+PASSWORD_HASH_CALIBRATE = os.getenv("PASSWORD_HASH_CALIBRATE", "true").lower() == "true"
+PASSWORD_REHASH_TOLERANCE = int(os.getenv("PASSWORD_REHASH_TOLERANCE", "1"))
+
+# bcrypt: coste = log2(iteraciones)
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_BCRYPT_MIN_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_MIN_ROUNDS", "10"))
+PASSWORD_BCRYPT_MAX_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_MAX_ROUNDS", "16"))
+
+# scrypt: coste = log2(N); memoria = 128 * r * N bytes (ln=15, r=8 -> 32 MiB)
+PASSWORD_SCRYPT_LN = int(os.getenv("PASSWORD_SCRYPT_LN", "15"))
+PASSWORD_SCRYPT_MIN_LN = int(os.getenv("PASSWORD_SCRYPT_MIN_LN", "14"))
+PASSWORD_SCRYPT_MAX_LN = int(os.getenv("PASSWORD_SCRYPT_MAX_LN", "20"))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+
+# argon2id: coste = time_cost (lineal), memoria fija
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+PASSWORD_ARGON2_MIN_TIME_COST = int(os.getenv("PASSWORD_ARGON2_MIN_TIME_COST", "2"))
+PASSWORD_ARGON2_MAX_TIME_COST = int(os.getenv("PASSWORD_ARGON2_MAX_TIME_COST", "20"))
+PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "1"))
+
+ALGORITHMS = ("bcrypt", "scrypt", "argon2")
+
+_SCRYPT_RE = re.compile(r"^\$scrypt\$ln=(\d+),r=(\d+),p=(\d+)\$([^$]+)\$([^$]+)$")
+_ARGON2_RE = re.compile(r"^\$argon2(id|i|d)\$v=\d+\$m=(\d+),t=(\d+),p=(\d+)\$")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def identify(hashed_password: str) -> Optional[str]:
+    """Algoritmo de un hash guardado según su prefijo (None si no se reconoce)"""
+    if hashed_password.startswith(("$2a$", "$2b$", "$2y$")):
+        return "bcrypt"
+    if hashed_password.startswith("$scrypt$"):
+        return "scrypt"
+    if hashed_password.startswith("$argon2"):
+        return "argon2"
+    return None
+
+
+class PasswordPolicy:
+    """Hash, verificación y rehash de contraseñas según la política configurada
+
+    No guarda estado no serializable: el pool de procesos de password_pool
+    recibe una copia con el coste ya calibrado.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = PASSWORD_HASH_ALGORITHM,
+        target_ms: float = PASSWORD_HASH_TARGET_MS,
+        rehash_tolerance: int = PASSWORD_REHASH_TOLERANCE
+    ):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown password hash algorithm '{algorithm}' (use one of {ALGORITHMS})")
+        if algorithm == "argon2" and not HAS_ARGON2:
+            raise ValueError("PASSWORD_HASH_ALGORITHM=argon2 requires argon2-cffi")
+        self.algorithm = algorithm
+        self.target_ms = target_ms
+        self.rehash_tolerance = rehash_tolerance
+        self.bcrypt_rounds = PASSWORD_BCRYPT_ROUNDS
+        self.scrypt_ln = PASSWORD_SCRYPT_LN
+        self.argon2_time_cost = PASSWORD_ARGON2_TIME_COST
+        self.calibrated = False
+        self.measured_ms: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Calibración
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _measure(fn: Callable[[], Any], repeat: int = 3) -> float:
+        """Mejor tiempo de ``repeat`` ejecuciones, en segundos"""
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def calibrate(self) -> Dict[str, Any]:
+        """Elige el coste cuyo tiempo por hash en este host se acerca más al objetivo
+
+        Se mide un coste bajo y se extrapola: bcrypt y scrypt duplican el
+        tiempo por cada punto de coste, argon2 crece linealmente con time_cost.
+        """
+        target = self.target_ms / 1000
+        if self.algorithm == "bcrypt":
+            base = 8
+            elapsed = self._measure(lambda: bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=base)))
+            cost = base + round(math.log2(target / elapsed))
+            self.bcrypt_rounds = max(PASSWORD_BCRYPT_MIN_ROUNDS, min(PASSWORD_BCRYPT_MAX_ROUNDS, cost))
+        elif self.algorithm == "scrypt":
+            base = 12
+            elapsed = self._measure(lambda: self._scrypt(b"calibration", b"0" * 16, base))
+            cost = base + round(math.log2(target / elapsed))
+            self.scrypt_ln = max(PASSWORD_SCRYPT_MIN_LN, min(PASSWORD_SCRYPT_MAX_LN, cost))
+        else:
+            hasher = self._argon2_hasher(time_cost=1)
+            elapsed = self._measure(lambda: hasher.hash("calibration"))
+            cost = round(target / elapsed)
+            self.argon2_time_cost = max(PASSWORD_ARGON2_MIN_TIME_COST, min(PASSWORD_ARGON2_MAX_TIME_COST, cost))
+
+        self.measured_ms = round(self._measure(lambda: self.hash("calibration"), repeat=1) * 1000, 1)
+        self.calibrated = True
+        logger.info(
+            f"✅ Política de contraseñas calibrada: {self.algorithm} coste {self.cost} "
+            f"({self.measured_ms}ms por hash, objetivo {self.target_ms}ms)"
+        )
+        return self.describe()
+
+    @property
+    def cost(self) -> int:
+        """Factor de trabajo actual del algoritmo configurado"""
+        return {"bcrypt": self.bcrypt_rounds, "scrypt": self.scrypt_ln, "argon2": self.argon2_time_cost}[self.algorithm]
+
+    # ------------------------------------------------------------------
+    # Algoritmos
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _scrypt(password: bytes, salt: bytes, ln: int, r: int = PASSWORD_SCRYPT_R, p: int = PASSWORD_SCRYPT_P) -> bytes:
+        n = 1 << ln
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * r * n + (1 << 20), dklen=32)
+
+    def _argon2_hasher(self, time_cost: Optional[int] = None) -> "PasswordHasher":
+        return PasswordHasher(
+            time_cost=time_cost or self.argon2_time_cost,
+            memory_cost=PASSWORD_ARGON2_MEMORY_KIB,
+            parallelism=PASSWORD_ARGON2_PARALLELISM
+        )
+
+    def hash(self, password: str) -> str:
+        """Hashear con el algoritmo y coste actuales"""
+        if self.algorithm == "bcrypt":
+            salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
+            return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        if self.algorithm == "scrypt":
+            salt = os.urandom(16)
+            digest = self._scrypt(password.encode('utf-8'), salt, self.scrypt_ln)
+            return (
+                f"$scrypt$ln={self.scrypt_ln},r={PASSWORD_SCRYPT_R},p={PASSWORD_SCRYPT_P}"
+                f"${_b64encode(salt)}${_b64encode(digest)}"
+            )
+        return self._argon2_hasher().hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """Verificar contra un hash de cualquier algoritmo soportado (por prefijo)"""
+        try:
+            algorithm = identify(hashed_password)
+            if algorithm == "bcrypt":
+                return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+            if algorithm == "scrypt":
+                ln, r, p, salt, digest = _SCRYPT_RE.match(hashed_password).groups()
+                candidate = self._scrypt(password.encode('utf-8'), _b64decode(salt), int(ln), int(r), int(p))
+                return hmac.compare_digest(candidate, _b64decode(digest))
+            if algorithm == "argon2":
+                if not HAS_ARGON2:
+                    logger.error("❌ Hash argon2 guardado pero argon2-cffi no está instalado")
+                    return False
+                try:
+                    return PasswordHasher().verify(hashed_password, password)
+                except (VerificationError, InvalidHashError):
+                    return False
+            logger.warning("⚠️ Hash de contraseña con formato desconocido")
+            return False
+        except Exception as e:
+            logger.error(f"❌ Error verificando contraseña: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Rehash
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _parameters(hashed_password: str) -> Optional[Tuple[str, int, tuple]]:
+        """(algoritmo, coste, parámetros fijos) de un hash guardado"""
+        algorithm = identify(hashed_password)
+        if algorithm == "bcrypt":
+            return algorithm, int(hashed_password[4:6]), ()
+        if algorithm == "scrypt":
+            match = _SCRYPT_RE.match(hashed_password)
+            if match:
+                return algorithm, int(match.group(1)), (int(match.group(2)), int(match.group(3)))
+        if algorithm == "argon2":
+            match = _ARGON2_RE.match(hashed_password)
+            if match:
+                variant, memory, time_cost, parallelism = match.groups()
+                return algorithm, int(time_cost), (variant, int(memory), int(parallelism))
+        return None
+
+    def _target_parameters(self) -> tuple:
+        if self.algorithm == "scrypt":
+            return (PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+        if self.algorithm == "argon2":
+            return ("id", PASSWORD_ARGON2_MEMORY_KIB, PASSWORD_ARGON2_PARALLELISM)
+        return ()
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True si el hash usa otro algoritmo/parámetros o un coste fuera del objetivo"""
+        parameters = self._parameters(hashed_password)
+        if parameters is None:
+            return False
+        algorithm, cost, fixed = parameters
+        if algorithm != self.algorithm or fixed != self._target_parameters():
+            return True
+        return cost < self.cost or cost > self.cost + self.rehash_tolerance
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "algorithm": self.algorithm,
+            "cost": self.cost,
+            "target_ms": self.target_ms,
+            "measured_ms": self.measured_ms,
+            "calibrated": self.calibrated,
+        }
+
+
+# Instancia compartida: calibrada en el startup de main.py
+password_policy = PasswordPolicy()
+
+
+def migrate_unhashed_passwords(db) -> int:
+    """Hashear las contraseñas guardadas en claro (formato no reconocido)"""
+    from models import User
+
+    updated = 0
+    for user in db.query(User).all():
+        if identify(user.hashed_password) is None:
+            user.hashed_password = password_policy.hash(user.hashed_password)
+            updated += 1
+            logger.info(f"✓ {user.username}: contraseña hasheada con {password_policy.algorithm}")
+    return updated
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if PASSWORD_HASH_CALIBRATE:
+        password_policy.calibrate()
+
+    if sys.argv[1:] == ["migrate"]:
+        from database import get_db_context
+
+        with get_db_context() as db:
+            migrated = migrate_unhashed_passwords(db)
+        print(f"✅ Migración completada: {migrated} contraseñas hasheadas")
+    else:
+        print(password_policy.describe())
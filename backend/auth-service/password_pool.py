@@ -0,0 +1,134 @@
+"""
+Pool acotado para el hashing de contraseñas (verificación y hash)
+
+Un hash al coste calibrado por password_policy tarda ~PASSWORD_HASH_TARGET_MS;
+ejecutado dentro de un endpoint async bloquea el event loop y con él /verify
+y /me. Aquí se ejecuta en un pool dedicado de tamaño fijo (hilos por defecto:
+bcrypt, scrypt y argon2 liberan el GIL; o procesos con
+PASSWORD_POOL_KIND=process). Como mucho caben ``workers + max_queue``
+operaciones pendientes: a partir de ahí se rechaza al instante con
+PoolSaturatedError (la ruta responde 429) en vez de encolar logins que
+acabarían dando timeout.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from password_policy import password_policy
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")  # thread | process
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "32"))
+PASSWORD_POOL_RETRY_AFTER = int(os.getenv("PASSWORD_POOL_RETRY_AFTER", "1"))
+LOGIN_LATENCY_WINDOW = int(os.getenv("LOGIN_LATENCY_WINDOW", "10000"))
+
+
+class PoolSaturatedError(Exception):
+    """El pool de hashing tiene la cola llena"""
+
+
+class LatencyRecorder:
+    """Últimas N latencias (ventana deslizante) con percentiles p50/p99"""
+
+    def __init__(self, window: int = LOGIN_LATENCY_WINDOW):
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, p: float) -> float:
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "window": len(self._samples),
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "max_ms": round(max(self._samples, default=0.0) * 1000, 1),
+        }
+
+
+class PasswordPool:
+    """Ejecuta el hashing fuera del event loop con un límite de operaciones pendientes"""
+
+    def __init__(
+        self,
+        kind: str = PASSWORD_POOL_KIND,
+        workers: int = PASSWORD_POOL_WORKERS,
+        max_queue: int = PASSWORD_POOL_MAX_QUEUE
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        # Solo se toca desde el event loop: no necesita lock
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            logger.info(f"✅ Pool de contraseñas iniciado ({self.kind}, {self.workers} workers, cola {self.max_queue})")
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturatedError(f"Password pool saturated ({self._pending} pending)")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """password_policy.verify en el pool (PoolSaturatedError si está lleno)"""
+        return await self._submit(password_policy.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """password_policy.hash en el pool (PoolSaturatedError si está lleno)
+
+        Con procesos se envía una copia de la política: los workers hashean
+        con el coste calibrado en el proceso principal.
+        """
+        return await self._submit(password_policy.hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Instancias compartidas por las rutas del proceso
+password_pool = PasswordPool()
+login_latency = LatencyRecorder()
@@ -0,0 +1,137 @@
+"""
+Refresh tokens rotativos para auth-service
+
+Un access token caducado se renueva con POST /auth/refresh en lugar de
+repetir el login: una búsqueda por índice (HMAC del refresh token, con el
+usuario en la misma consulta) y una firma HMAC del nuevo JWT, sin bcrypt.
+
+- El refresh token es un valor aleatorio opaco; en auth_db solo se guarda
+  su HMAC-SHA256 con REFRESH_TOKEN_SECRET (una copia de la tabla no sirve
+  para renovar sesiones).
+- Cada uso lo rota: el token usado queda marcado y se emite otro de la
+  misma familia con caducidad deslizante (REFRESH_TOKEN_TTL_DAYS), nunca
+  más allá del límite absoluto de la sesión (REFRESH_SESSION_MAX_DAYS).
+- Reutilización: presentar un token ya usado o revocado indica que se ha
+  filtrado, y se revoca toda la familia (el atacante y el usuario legítimo
+  tendrán que volver a hacer login).
+- POST /auth/logout con el refresh token revoca su familia (esa sesión);
+  /auth/logout-all revoca todas las del usuario.
+
+REFRESH_TOKEN_SECRET es obligatorio y no se deriva de SECRET_KEY: con la
+clave de los JWT a la vista, los hashes guardados dejarían de proteger nada.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import RefreshToken, User
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_SECRET = os.getenv("REFRESH_TOKEN_SECRET")
+if not REFRESH_TOKEN_SECRET:
+    raise RuntimeError("REFRESH_TOKEN_SECRET is not set (it must be its own secret, not SECRET_KEY)")
+REFRESH_TOKEN_TTL_DAYS = float(os.getenv("REFRESH_TOKEN_TTL_DAYS", "7"))
+REFRESH_SESSION_MAX_DAYS = float(os.getenv("REFRESH_SESSION_MAX_DAYS", "30"))
+
+
+class RefreshTokenError(Exception):
+    """Refresh token inválido, caducado, revocado o reutilizado"""
+
+
+def hash_refresh_token(token: str) -> str:
+    return hmac.new(REFRESH_TOKEN_SECRET.encode("utf-8"), token.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def issue_refresh_token(
+    db: Session,
+    user_id: int,
+    family_id: Optional[str] = None,
+    session_expires_at: Optional[datetime] = None
+) -> str:
+    """Crea un refresh token (familia nueva en el login, la misma al rotar); no hace commit"""
+    now = datetime.utcnow()
+    session_expires_at = session_expires_at or now + timedelta(days=REFRESH_SESSION_MAX_DAYS)
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=min(now + timedelta(days=REFRESH_TOKEN_TTL_DAYS), session_expires_at),
+        session_expires_at=session_expires_at
+    ))
+    return token
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def revoke_refresh_token_family(db: Session, token: str, user_id: int) -> bool:
+    """Revoca la familia del refresh token si es del usuario (logout); no hace commit"""
+    family_id = db.execute(
+        select(RefreshToken.family_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.user_id == user_id)
+    ).scalar_one_or_none()
+    if family_id is None:
+        return False
+    revoke_family(db, family_id)
+    return True
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> None:
+    """Revoca todas las sesiones renovables del usuario (logout-all); no hace commit"""
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+    """Valida y rota un refresh token: devuelve el usuario y el nuevo refresh token
+
+    Hace commit (también de la revocación de la familia si detecta reutilización).
+    """
+    row = db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .with_for_update(of=RefreshToken)
+    ).first()
+    if row is None:
+        raise RefreshTokenError("Unknown refresh token")
+    refresh_token, user = row
+
+    now = datetime.utcnow()
+    if refresh_token.used_at is not None or refresh_token.revoked_at is not None:
+        revoke_family(db, refresh_token.family_id)
+        db.commit()
+        logger.warning(f"⚠️ Refresh token reutilizado (usuario {user.id}): familia {refresh_token.family_id} revocada")
+        raise RefreshTokenError("Refresh token reuse detected, session revoked")
+    if refresh_token.expires_at <= now:
+        raise RefreshTokenError("Refresh token expired")
+    if not user.is_active:
+        raise RefreshTokenError("User is inactive")
+
+    refresh_token.used_at = now
+    new_token = issue_refresh_token(
+        db,
+        user.id,
+        family_id=refresh_token.family_id,
+        session_expires_at=refresh_token.session_expires_at
+    )
+    db.commit()
+    return user, new_token
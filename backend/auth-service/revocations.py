@@ -0,0 +1,78 @@
+"""
+Revocación de tokens individuales (logout) para auth-service
+
+El jti del token se guarda en revoked_tokens (para precargar la lista al
+arrancar), se añade a la lista en memoria de hduce_shared.auth y se publica
+un evento TOKEN_REVOKED para que el resto de servicios y réplicas lo
+rechacen también antes de su exp.
+
+Las filas de tokens ya caducados se borran en la precarga de cada réplica
+(al arrancar y al reconectar), nunca desde GET /auth/revocations: esa ruta
+no requiere autenticación y debe ser de solo lectura.
+"""
+import logging
+from calendar import timegm
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from hduce_shared.auth import RevocationSync, revocation_list
+from hduce_shared.rabbitmq import get_publisher_pool
+
+from database import get_db_context
+from models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+def load_revoked_tokens() -> List[Tuple[str, Optional[float]]]:
+    """Revocaciones aún vigentes (jti, exp); solo lectura"""
+    with get_db_context() as db:
+        rows = db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > datetime.utcnow())
+        ).all()
+    return [(jti, timegm(expires_at.utctimetuple())) for jti, expires_at in rows]
+
+
+def prune_revoked_tokens() -> int:
+    """Borra de auth_db las revocaciones de tokens ya caducados; devuelve cuántas"""
+    with get_db_context() as db:
+        result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    return result.rowcount
+
+
+def preload_revoked_tokens() -> List[Tuple[str, Optional[float]]]:
+    """Precarga de esta réplica: limpia las caducadas y devuelve las vigentes"""
+    try:
+        pruned = prune_revoked_tokens()
+        if pruned:
+            logger.info(f"🔄 {pruned} revocaciones caducadas borradas de auth_db")
+    except Exception as e:
+        # La limpieza puede esperar a la próxima precarga; la carga no
+        logger.warning(f"⚠️ No se pudieron borrar las revocaciones caducadas: {e}")
+    return load_revoked_tokens()
+
+
+def revoke_token(db, payload: Dict[str, Any]) -> bool:
+    """Revoca el token de ``payload`` en auth_db, en memoria y en el resto de servicios"""
+    jti = payload.get("jti")
+    if jti is None or payload.get("exp") is None:
+        return False
+
+    db.merge(RevokedToken(
+        jti=jti,
+        user_id=int(payload["user_id"]) if payload.get("user_id") is not None else None,
+        expires_at=datetime.utcfromtimestamp(payload["exp"])
+    ))
+    db.commit()
+    revocation_list.revoke(jti, payload["exp"])
+
+    if not get_publisher_pool().publish_token_revoked(jti, payload["exp"]):
+        # Sigue revocado aquí y en auth-service al reiniciar; los demás servicios no se enteran
+        logger.error(f"❌ No se pudo publicar la revocación del token {jti}")
+    return True
+
+
+# Consumidor de TOKEN_REVOKED de esta réplica (con precarga desde auth_db)
+revocation_sync = RevocationSync(bootstrap=preload_revoked_tokens)
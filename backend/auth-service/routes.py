@@ -1,20 +1,38 @@
 ﻿# backend/auth-service/routes.py - VERSIÓN COMPLETA
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Body
 from sqlalchemy.orm import Session
 import traceback
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
 from database import get_db
 from auth_utils import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
     get_password_hash,
     verify_password,
     create_access_token,
+    create_user_access_token,
     authenticate_user,
     get_current_user_from_token,
+    get_verified_claims,
+    oauth2_scheme,
     verify_token
 )
 from models import User
+from password_pool import PASSWORD_POOL_RETRY_AFTER, PoolSaturatedError, login_latency, password_pool
+from password_policy import password_policy
+from token_versions import token_versions
+from revocations import load_revoked_tokens, revoke_token
+from signing_keys import signing_keys
+from refresh_tokens import (
+    RefreshTokenError,
+    issue_refresh_token,
+    revoke_refresh_token_family,
+    revoke_user_refresh_tokens,
+    rotate_refresh_token
+)
+from hduce_shared.auth import revocation_list
 from schemas import UserCreate, UserResponse, TokenResponse
 
 logger = logging.getLogger(__name__)
@@ -27,7 +45,16 @@ router = APIRouter()
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "auth-service"}
+    return {
+        "status": "healthy",
+        "service": "auth-service",
+        "password_pool": password_pool.stats(),
+        "password_policy": password_policy.describe(),
+        "login_latency": login_latency.stats(),
+        "token_versions": token_versions.stats(),
+        "revocation_list": revocation_list.stats(),
+        "signing_keys": signing_keys.stats()
+    }
 
 @router.get("/")
 async def root():
@@ -38,8 +65,12 @@ async def root():
         "endpoints": [
             "/health",
             "/login",
+            "/refresh",
             "/me",
             "/verify",
+            "/logout",
+            "/logout-all",
+            "/.well-known/jwks.json",
             "/auth/docs"
         ]
     }
@@ -55,17 +86,19 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """Login user and return access token - VERSIÓN CON DEBUG"""
+    start = time.perf_counter()
+    rejected = False
     try:
         logger.info(f"🔍 Intentando login para: {email}")
 
         # 1. Verificar que authenticate_user existe
         logger.info("Paso 1: Verificando authenticate_user...")
 
-        # 2. Autenticar usuario
-        logger.info(f"Paso 2: Llamando authenticate_user({email}, ***)")
-        user = authenticate_user(db, email, password)
+        # 2. Autenticar usuario (bcrypt en el pool, no en el event loop)
+        logger.info(f"Paso 2: Verificando contraseña de {email} en el pool")
+        user = db.query(User).filter(User.email == email).first()
 
-        if not user:
+        if not user or not await password_pool.verify(password, user.hashed_password):
             logger.warning(f"❌ Autenticación fallida para: {email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -75,27 +108,47 @@ async def login(
 
         logger.info(f"✅ Usuario autenticado: {user.email}, ID: {user.id}")
 
-        # 3. Crear token
+        # Rehash perezoso: otro algoritmo o coste distinto del calibrado
+        if password_policy.needs_rehash(user.hashed_password):
+            try:
+                user.hashed_password = await password_pool.hash(password)
+                db.commit()
+                logger.info(f"🔄 Hash de contraseña actualizado para: {user.email}")
+            except Exception as e:
+                # No bloquea el login: se reintenta en el siguiente
+                db.rollback()
+                logger.warning(f"⚠️ No se pudo actualizar el hash de {user.email}: {e}")
+
+        # 3. Crear tokens (el refresh token evita repetir el login al caducar el access token)
         logger.info("Paso 3: Creando token JWT...")
-        access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "email": user.email,
-                "username": user.username or user.email.split("@")[0],
-                "user_id": str(user.id)
-            }
-        )
+        access_token = create_user_access_token(user)
+        refresh_token = issue_refresh_token(db, user.id)
+        db.commit()
 
         logger.info(f"✅ Token creado (longitud: {len(access_token)})")
 
         return {
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
             "user_id": user.id,
             "email": user.email,
             "role": user.role
         }
 
+    except HTTPException:
+        raise
+
+    except PoolSaturatedError as e:
+        rejected = True
+        logger.warning(f"⚠️ Login rechazado, pool de contraseñas saturado: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts in progress, retry later",
+            headers={"Retry-After": str(PASSWORD_POOL_RETRY_AFTER)},
+        )
+
     except Exception as e:
         logger.error(f"❌ ERROR EN LOGIN DETALLADO: {e}")
         logger.error("Traceback completo:")
@@ -106,6 +159,41 @@ async def login(
             detail=f"Login failed: {str(e)}"
         )
 
+    finally:
+        # Los 429 se cuentan en el pool; no falsean los percentiles de login
+        if not rejected:
+            login_latency.record(time.perf_counter() - start)
+
+# ============================================================================
+# REFRESH (/refresh) - nuevo access token sin bcrypt
+# ============================================================================
+
+@router.post("/refresh")
+def refresh(
+    refresh_token: str = Body(..., embed=True, description="Refresh token from /login or /refresh"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    try:
+        user, new_refresh_token = rotate_refresh_token(db, refresh_token)
+    except RefreshTokenError as e:
+        logger.warning(f"❌ Refresh rechazado: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return {
+        "access_token": create_user_access_token(user),
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "user_id": user.id,
+        "email": user.email,
+        "role": user.role
+    }
+
 # ============================================================================
 # GET CURRENT USER (/me)
 # ============================================================================
@@ -141,26 +229,21 @@ async def get_current_user_info(
 
 @router.get("/verify")
 async def verify_user_token(
-    current_user: User = Depends(get_current_user_from_token)
+    claims: Dict[str, Any] = Depends(get_verified_claims)
 ) -> Dict[str, Any]:
-    """Verify if token is valid and return user info"""
+    """Verify if token is valid and return user info (from the token, no DB query)"""
     try:
-        logger.info(f"✅ Token verificado para usuario: {current_user.email}")
-        
         return {
             "valid": True,
             "user": {
-                "id": current_user.id,
-                "email": current_user.email,
-                "username": current_user.username,
-                "role": current_user.role
+                "id": int(claims["user_id"]),
+                "email": claims["sub"],
+                "username": claims.get("username"),
+                "role": claims.get("role")
             },
             "message": "Token is valid"
         }
     
-    except HTTPException as e:
-        logger.warning(f"❌ Token inválido: {e.detail}")
-        raise
     except Exception as e:
         logger.error(f"❌ Error en /verify: {e}")
         raise HTTPException(
@@ -168,6 +251,66 @@ async def verify_user_token(
             detail=f"Token verification failed: {str(e)}"
         )
 
+# ============================================================================
+# LOGOUT (/logout) - revoca este token y la sesión de su refresh token
+# ============================================================================
+
+@router.post("/logout")
+def logout(
+    token: str = Depends(oauth2_scheme),
+    refresh_token: Optional[str] = Body(None, embed=True, description="Refresh token of this session"),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Revoke the current token before its exp (every service rejects it) and its refresh-token family"""
+    payload = verify_token(token)
+    if refresh_token and revoke_refresh_token_family(db, refresh_token, current_user.id):
+        db.commit()
+        logger.info(f"🔄 Sesión renovable revocada para: {current_user.email}")
+    if not revoke_token(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token has no jti/exp and cannot be revoked individually, use /logout-all"
+        )
+    logger.info(f"🔄 Token revocado para: {current_user.email}")
+    return {"message": "Token revoked"}
+
+# ============================================================================
+# LOGOUT EN TODOS LOS DISPOSITIVOS (/logout-all)
+# ============================================================================
+
+@router.post("/logout-all")
+def logout_all(
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Revoke every token of the current user by bumping its token version"""
+    current_user.token_version = (current_user.token_version or 1) + 1
+    revoke_user_refresh_tokens(db, current_user.id)
+    db.commit()
+    token_versions.update(current_user.id, current_user.token_version, bool(current_user.is_active))
+    logger.info(f"🔄 Tokens revocados para: {current_user.email} (versión {current_user.token_version})")
+    return {"message": "All sessions revoked", "token_version": current_user.token_version}
+
+# ============================================================================
+# JWKS (/.well-known/jwks.json) - claves públicas para verificar en local
+# ============================================================================
+
+@router.get("/.well-known/jwks.json")
+async def jwks(response: Response) -> Dict[str, Any]:
+    """Public signing keys (RFC 7517); services verify tokens locally with them"""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return signing_keys.jwks()
+
+# ============================================================================
+# REVOCACIONES VIGENTES (/revocations) - precarga de la lista en otros servicios
+# ============================================================================
+
+@router.get("/revocations")
+def revocations() -> Dict[str, Any]:
+    """Revoked tokens that have not expired yet; services load them before serving"""
+    return {"revocations": [{"jti": jti, "exp": exp} for jti, exp in load_revoked_tokens()]}
+
 # ============================================================================
 # QUICK VERIFY TOKEN (sin dependencia de base de datos)
 # ============================================================================
@@ -181,8 +324,8 @@ async def verify_token_quick(
         logger.info("🔍 Verificando token (quick)...")
         
         payload = verify_token(token)
-        if not payload:
-            logger.warning("❌ Token inválido o expirado")
+        if not payload or revocation_list.is_revoked(payload.get("jti")):
+            logger.warning("❌ Token inválido, expirado o revocado")
             return {"valid": False, "message": "Invalid or expired token"}
         
         logger.info(f"✅ Token válido para: {payload.get('email')}")
@@ -0,0 +1,227 @@
+"""
+Claves de firma asimétrica (RS256 / EdDSA) para los access tokens
+
+auth-service firma con una clave privada y publica las públicas en
+/auth/.well-known/jwks.json; el resto de servicios verifica en local con
+hduce_shared.auth.JWKSKeySet, sin compartir ningún secreto.
+
+Las claves son ficheros PEM (PKCS#8, sin contraseña) en JWT_SIGNING_KEYS_DIR;
+el nombre del fichero sin extensión es el ``kid``. El directorio se relee
+cada JWT_SIGNING_KEYS_RELOAD_SECONDS, así que rotar no requiere reiniciar:
+
+1. Añadir la clave nueva (``python signing_keys.py generate``) al volumen
+   compartido por las réplicas. Se publica en la JWKS en la siguiente
+   recarga, pero aún no firma.
+2. Pasados JWT_SIGNING_KEY_ACTIVATION_SECONDS desde su creación (tiempo de
+   sobra para que todos los servicios hayan refrescado la JWKS) pasa a ser
+   la clave activa: la más reciente de las ya activables, o JWT_ACTIVE_KID
+   si se fija.
+3. Borrar la clave antigua cuando hayan caducado sus tokens
+   (ACCESS_TOKEN_EXPIRE_MINUTES después de la activación de la nueva).
+
+Sin claves en el directorio se genera una (desarrollo); si el directorio no
+es escribible queda solo en memoria y cada réplica tendría la suya.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from hduce_shared.auth import ASYMMETRIC_ALGORITHMS, build_jwks, get_backend
+
+logger = logging.getLogger(__name__)
+
+# RS256 | RS384 | RS512 | EdDSA; HS256 = firma anterior con el secreto compartido
+JWT_SIGNING_ALGORITHM = os.getenv("JWT_SIGNING_ALGORITHM", "RS256")
+JWT_SIGNING_KEYS_DIR = os.getenv("JWT_SIGNING_KEYS_DIR", "/app/keys")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID") or None
+JWT_SIGNING_KEYS_RELOAD_SECONDS = float(os.getenv("JWT_SIGNING_KEYS_RELOAD_SECONDS", "60"))
+JWT_SIGNING_KEY_ACTIVATION_SECONDS = float(os.getenv("JWT_SIGNING_KEY_ACTIVATION_SECONDS", "600"))
+RSA_KEY_SIZE = int(os.getenv("JWT_RSA_KEY_SIZE", "2048"))
+
+
+def generate_private_key(algorithm: str = JWT_SIGNING_ALGORITHM):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    return rsa.generate_private_key(public_exponent=65537, key_size=RSA_KEY_SIZE)
+
+
+def key_algorithm(private_key, preferred: str = JWT_SIGNING_ALGORITHM) -> str:
+    """Algoritmo JWT de una clave (las RSA usan el RS* configurado)"""
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "EdDSA"
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return preferred if preferred.startswith("RS") else "RS256"
+    raise ValueError(f"Unsupported signing key type: {type(private_key).__name__}")
+
+
+def write_private_key(directory: str, private_key, kid: Optional[str] = None) -> str:
+    """Guarda la clave como <kid>.pem (0600) y devuelve el kid"""
+    kid = kid or f"{time.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    path = os.path.join(directory, f"{kid}.pem")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return kid
+
+
+class SigningKeyStore:
+    """Claves privadas por kid, la clave activa y la JWKS pública"""
+
+    def __init__(
+        self,
+        directory: str = JWT_SIGNING_KEYS_DIR,
+        algorithm: str = JWT_SIGNING_ALGORITHM,
+        active_kid: Optional[str] = JWT_ACTIVE_KID,
+        reload_interval: float = JWT_SIGNING_KEYS_RELOAD_SECONDS,
+        activation_delay: float = JWT_SIGNING_KEY_ACTIVATION_SECONDS
+    ):
+        self.directory = directory
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self.reload_interval = reload_interval
+        self.activation_delay = activation_delay
+        # kid -> (alg, private_key, created_at)
+        self._keys: Dict[str, Tuple[str, Any, float]] = {}
+        self._public: Dict[str, Tuple[str, Any]] = {}
+        self._jwks: Dict[str, Any] = {"keys": []}
+        self._active: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        """False con JWT_SIGNING_ALGORITHM=HS256 (firma con el secreto compartido)"""
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def _read_directory(self) -> Dict[str, Tuple[str, Any, float]]:
+        keys: Dict[str, Tuple[str, Any, float]] = {}
+        if not os.path.isdir(self.directory):
+            return keys
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".pem"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    private_key = serialization.load_pem_private_key(f.read(), password=None)
+                keys[name[:-len(".pem")]] = (key_algorithm(private_key, self.algorithm), private_key, os.path.getmtime(path))
+            except Exception as e:
+                logger.error(f"❌ Clave de firma {path} ignorada: {e}")
+        return keys
+
+    def _select_active(self, keys: Dict[str, Tuple[str, Any, float]]) -> Optional[str]:
+        if self.active_kid:
+            if self.active_kid not in keys:
+                logger.error(f"❌ JWT_ACTIVE_KID={self.active_kid} no está en {self.directory}")
+            else:
+                return self.active_kid
+        if not keys:
+            return None
+        # La más reciente que ya lleva publicada el tiempo de activación
+        activable_before = time.time() - self.activation_delay
+        ready = [kid for kid, (_, _, created) in keys.items() if created <= activable_before]
+        if not ready:
+            # Primer arranque: solo hay claves recién creadas
+            ready = list(keys)
+        return max(ready, key=lambda kid: (keys[kid][2], kid))
+
+    def reload(self) -> None:
+        """Relee el directorio de claves (nuevas claves, retiradas y clave activa)"""
+        keys = self._read_directory()
+        if not keys and not self._keys:
+            private_key = generate_private_key(self.algorithm)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                kid = write_private_key(self.directory, private_key)
+                logger.warning(f"⚠️ Sin claves de firma: generada {kid} en {self.directory}")
+                keys = self._read_directory()
+            except OSError as e:
+                kid = f"ephemeral-{uuid.uuid4().hex[:8]}"
+                logger.warning(f"⚠️ Sin claves de firma y {self.directory} no es escribible ({e}): "
+                               f"clave {kid} solo en memoria, no válida con varias réplicas")
+                keys = {kid: (key_algorithm(private_key, self.algorithm), private_key, time.time())}
+        elif not keys:
+            # Directorio vacío o ilegible de forma transitoria: conservar las claves cargadas
+            logger.error(f"❌ No hay claves de firma en {self.directory}, se mantienen las anteriores")
+            return
+
+        active = self._select_active(keys)
+        public = {kid: (alg, private_key.public_key()) for kid, (alg, private_key, _) in keys.items()}
+        jwks = build_jwks((kid, alg, public_key) for kid, (alg, public_key) in sorted(public.items()))
+
+        if active != self._active:
+            logger.info(f"🔄 Clave de firma activa: {active} ({keys[active][0]})")
+        # Swap atómico de cada estructura
+        self._keys, self._public, self._jwks, self._active = keys, public, jwks, active
+        self.reloads += 1
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        """JWT firmado con la clave activa (cabecera con su kid)"""
+        if self._active is None:
+            self.reload()
+        kid = self._active
+        algorithm, private_key, _ = self._keys[kid]
+        return get_backend(None, algorithm).encode(claims, private_key, algorithm, headers={"kid": kid})
+
+    def get_key(self, kid: Optional[str]) -> Optional[Tuple[str, Any]]:
+        """(alg, public_key) de un kid: mismo contrato que JWKSKeySet para JWTManager"""
+        return self._public.get(kid) if kid is not None else None
+
+    def jwks(self) -> Dict[str, Any]:
+        return self._jwks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"❌ Error recargando las claves de firma: {e}")
+
+    def start(self) -> threading.Thread:
+        self._stop.clear()
+        self.reload()
+        self._thread = threading.Thread(target=self._run, name="JWT-Signing-Keys", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "algorithm": self.algorithm,
+            "active_kid": self._active,
+            "kids": sorted(self._keys),
+            "reloads": self.reloads,
+        }
+
+
+# Instancia compartida por auth_utils y las rutas
+signing_keys = SigningKeyStore()
+
+
+if __name__ == "__main__":
+    # python signing_keys.py generate [EdDSA|RS256] -> nueva clave en JWT_SIGNING_KEYS_DIR
+    if len(sys.argv) >= 2 and sys.argv[1] == "generate":
+        algorithm = sys.argv[2] if len(sys.argv) > 2 else JWT_SIGNING_ALGORITHM
+        os.makedirs(JWT_SIGNING_KEYS_DIR, exist_ok=True)
+        kid = write_private_key(JWT_SIGNING_KEYS_DIR, generate_private_key(algorithm))
+        print(f"✅ Clave {kid} ({algorithm}) creada en {JWT_SIGNING_KEYS_DIR}")
+    else:
+        print("Uso: python signing_keys.py generate [RS256|EdDSA]")
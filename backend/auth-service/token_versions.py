@@ -0,0 +1,142 @@
+"""
+Versiones de token por usuario para el /verify sin base de datos
+
+El login firma en el token ``role``, ``active`` y ``ver`` (users.token_version).
+Cambiar el rol, desactivar al usuario o "cerrar sesión en todos los
+dispositivos" incrementa token_version, lo que invalida todos sus tokens.
+
+/verify responde con los claims del token y este conjunto en memoria, que
+solo contiene a los usuarios con versión > 1 o desactivados (el resto está
+en versión 1 y activo, el valor por defecto). Se recarga con una consulta
+cada TOKEN_VERSIONS_REFRESH_SECONDS en un hilo y se actualiza al momento con
+los cambios hechos por este proceso. Resultado de ``check``:
+
+- VALID:   ver del token == versión conocida y usuario activo
+- REVOKED: ver del token < versión conocida, o usuario desactivado
+- STALE:   ver del token > versión conocida (cambio hecho en otra réplica
+           después de la última recarga): la ruta consulta la base de datos
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from hduce_shared.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "auth"
+
+TOKEN_VERSIONS_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSIONS_REFRESH_SECONDS", "30"))
+
+VALID = "valid"
+REVOKED = "revoked"
+STALE = "stale"
+
+
+def ensure_token_version_column() -> None:
+    """Añade users.token_version a bases creadas antes de la columna"""
+    with DatabaseManager.get_session(SERVICE_NAME) as db:
+        db.execute(text(
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 1"
+        ))
+
+
+class TokenVersionSet:
+    """user_id -> (token_version, is_active) de los usuarios fuera del valor por defecto"""
+
+    def __init__(self, refresh_seconds: float = TOKEN_VERSIONS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._entries: Dict[int, Tuple[int, bool]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.loaded_at = 0.0
+        self.valid = 0
+        self.revoked = 0
+        self.stale = 0
+
+    # ------------------------------------------------------------------
+    # Carga desde auth_db
+    # ------------------------------------------------------------------
+    def refresh(self) -> int:
+        """Recarga el conjunto con una sola consulta; devuelve cuántos usuarios contiene"""
+        with DatabaseManager.get_session(SERVICE_NAME) as db:
+            rows = db.execute(text(
+                "SELECT id, token_version, is_active FROM users "
+                "WHERE token_version > 1 OR is_active = false"
+            )).fetchall()
+        entries = {row[0]: (row[1], bool(row[2])) for row in rows}
+        with self._lock:
+            self._entries = entries
+            self.loaded_at = time.time()
+        return len(entries)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Error recargando versiones de token: {e}")
+
+    def start(self) -> None:
+        """Carga inicial y recarga periódica en un hilo daemon"""
+        try:
+            count = self.refresh()
+            logger.info(f"✅ Versiones de token cargadas ({count} usuarios fuera de la versión 1)")
+        except Exception as e:
+            logger.error(f"❌ No se pudieron cargar las versiones de token: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Token-Versions", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Consultas y cambios
+    # ------------------------------------------------------------------
+    def check(self, claims: Dict[str, Any]) -> str:
+        """VALID, REVOKED o STALE para los claims de un token ya verificado"""
+        user_id = int(claims["user_id"])
+        token_version = int(claims["ver"])
+        with self._lock:
+            version, active = self._entries.get(user_id, (1, True))
+            if token_version > version:
+                self.stale += 1
+                return STALE
+            if token_version < version or not active or claims.get("active") is False:
+                self.revoked += 1
+                return REVOKED
+            self.valid += 1
+            return VALID
+
+    def update(self, user_id: int, version: int, active: bool) -> None:
+        """Registra el estado actual de un usuario (tras consultarlo o modificarlo)"""
+        with self._lock:
+            if version > 1 or not active:
+                self._entries[user_id] = (version, active)
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checks = self.valid + self.revoked + self.stale
+            return {
+                "size": len(self._entries),
+                "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+                "valid": self.valid,
+                "revoked": self.revoked,
+                "stale": self.stale,
+                "db_fallback_ratio": round(self.stale / checks, 4) if checks else 0.0,
+            }
+
+
+# Instancia compartida por las rutas del proceso
+token_versions = TokenVersionSet()
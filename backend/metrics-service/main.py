@@ -6,6 +6,8 @@ import uvicorn
 from contextlib import asynccontextmanager
 from fastapi.responses import Response
 
+from shared_middleware import FastJSONResponse, install_middleware, route_path
+
 # Crear un registro de métricas personalizado para evitar duplicados
 metrics_registry = CollectorRegistry()
 
@@ -65,53 +67,29 @@ app = FastAPI(
     title="HDuce Metrics Service",
     description="Metrics collection and monitoring service",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-@app.middleware("http")
-async def metrics_middleware(request, call_next):
-    """Middleware para recolectar métricas."""
-    method = request.method
-    endpoint = request.url.path
-    
-    # Incrementar métrica de requests en progreso
-    http_requests_in_progress.labels(method=method, endpoint=endpoint).inc()
-    
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        duration = time.time() - start_time
-        
-        # Registrar métricas
-        http_requests_total.labels(
-            method=method, 
-            endpoint=endpoint, 
-            status=response.status_code
-        ).inc()
-        
-        http_request_duration_seconds.labels(
-            method=method, 
-            endpoint=endpoint
-        ).observe(duration)
-        
-        return response
-    except Exception as e:
-        duration = time.time() - start_time
-        http_requests_total.labels(
-            method=method, 
-            endpoint=endpoint, 
-            status=500
-        ).inc()
-        
-        http_request_duration_seconds.labels(
-            method=method, 
-            endpoint=endpoint
-        ).observe(duration)
-        
-        raise e
-    finally:
-        # Decrementar métrica de requests en progreso
-        http_requests_in_progress.labels(method=method, endpoint=endpoint).dec()
+class PrometheusObserver:
+    """Observador de TimingMiddleware: métricas HTTP en metrics_registry.
+
+    En curso se etiqueta con el path (la ruta aún no se conoce al empezar);
+    totales y duración con la plantilla de la ruta, para no crear una serie
+    por cada id.
+    """
+
+    def started(self, scope):
+        http_requests_in_progress.labels(method=scope["method"], endpoint=scope["path"]).inc()
+
+    def finished(self, scope, status, duration):
+        method = scope["method"]
+        endpoint = route_path(scope)
+        http_requests_total.labels(method=method, endpoint=endpoint, status=status).inc()
+        http_request_duration_seconds.labels(method=method, endpoint=endpoint).observe(duration)
+        http_requests_in_progress.labels(method=method, endpoint=scope["path"]).dec()
+
+install_middleware(app, observer=PrometheusObserver())
 
 @app.get("/health")
 async def health_check():
@@ -8,6 +8,8 @@ import json
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from shared_middleware import FastJSONResponse, install_middleware
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -147,7 +149,8 @@ app = FastAPI(
     title="HDuce MQTT Service",
     description="MQTT messaging service for HDuce",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -158,6 +161,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_middleware(app)
 
 @app.get("/health")
 async def health_check():
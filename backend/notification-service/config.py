@@ -27,6 +27,17 @@ RABBITMQ_PORT: int = int(os.getenv("RABBITMQ_PORT", "5672"))
 RABBITMQ_USER: str = os.getenv("RABBITMQ_USER", "guest")
 RABBITMQ_PASSWORD: str = os.getenv("RABBITMQ_PASSWORD", "guest")
 
+# Mensajes procesados en paralelo por el consumer (asyncio o pool de hilos)
+CONSUMER_CONCURRENCY: int = int(os.getenv("NOTIFICATION_CONSUMER_CONCURRENCY", "10"))
+
+# Inserción por lotes: hasta N mensajes o T ms por INSERT/commit (1 = mensaje a mensaje)
+CONSUMER_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+CONSUMER_BATCH_TIMEOUT_MS: int = int(os.getenv("NOTIFICATION_BATCH_TIMEOUT_MS", "200"))
+
+# Caché del directorio de doctores (nombres leídos de appointment_db)
+DOCTOR_CACHE_TTL_SECONDS: float = float(os.getenv("DOCTOR_CACHE_TTL_SECONDS", "3600"))
+DOCTOR_CACHE_MAX_SIZE: int = int(os.getenv("DOCTOR_CACHE_MAX_SIZE", "5000"))
+
 
 
 
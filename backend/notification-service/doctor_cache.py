@@ -0,0 +1,184 @@
+"""
+Caché en proceso del directorio de doctores (appointment_db)
+
+Los doctores casi nunca cambian: los nombres se guardan con TTL y tamaño
+máximo (LRU), se precargan al arrancar con una sola consulta y se invalidan
+con el evento DOCTOR_CHANGED. Si appointment_db falla, se siguen usando las
+entradas caducadas en lugar de bloquear el consumer.
+
+Cada réplica tiene su propio directorio, así que DOCTOR_CHANGED no puede ir
+por la cola compartida appointment_notifications (solo una réplica lo
+recibiría): DoctorDirectorySync lo consume de una cola exclusiva y
+auto-delete por réplica (doctor_routing_key).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from hduce_shared.database import DatabaseManager
+
+from config import DOCTOR_CACHE_MAX_SIZE, DOCTOR_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class DoctorDirectory:
+    """Nombres de doctores por id con TTL, límite de tamaño y contadores hit/miss"""
+
+    def __init__(self, ttl_seconds: float = DOCTOR_CACHE_TTL_SECONDS, max_size: int = DOCTOR_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    # ------------------------------------------------------------------
+    # Consultas a appointment_db
+    # ------------------------------------------------------------------
+    def _query(self, doctor_ids: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        engine = DatabaseManager.get_engine("appointments")
+        with engine.connect() as conn:
+            if doctor_ids is None:
+                rows = conn.execute(
+                    text("SELECT id, name FROM doctors ORDER BY id LIMIT :limit"),
+                    {"limit": self.max_size}
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    text("SELECT id, name FROM doctors WHERE id IN :doctor_ids")
+                    .bindparams(bindparam("doctor_ids", expanding=True)),
+                    {"doctor_ids": list(doctor_ids)}
+                ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def warm(self) -> int:
+        """Precarga el directorio con una sola consulta; devuelve cuántos doctores cargó"""
+        try:
+            names = self._query()
+        except Exception as e:
+            logger.error(f"❌ No se pudo precargar el directorio de doctores: {e}")
+            return 0
+        self._store(names)
+        logger.info(f"✅ Directorio de doctores precargado ({len(names)} doctores)")
+        return len(names)
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+    def get_name(self, doctor_id: int) -> str:
+        return self.get_names([doctor_id])[doctor_id]
+
+    def get_names(self, doctor_ids: Iterable[int]) -> Dict[int, str]:
+        """Nombres para varios doctores; los que faltan se cargan con un solo SELECT"""
+        now = time.monotonic()
+        names: Dict[int, str] = {}
+        stale: Dict[int, str] = {}
+        missing = []
+        with self._lock:
+            for doctor_id in set(doctor_ids):
+                entry = self._entries.get(doctor_id)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(doctor_id)
+                    names[doctor_id] = entry[0]
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        stale[doctor_id] = entry[0]
+                    missing.append(doctor_id)
+                    self.misses += 1
+
+        if missing:
+            try:
+                loaded = self._query(missing)
+                self._store(loaded)
+            except Exception as e:
+                # appointment_db lento o caído: mejor un nombre caducado que ninguno
+                logger.error(f"❌ Error al obtener doctores {missing}: {e}")
+                loaded = stale
+                with self._lock:
+                    self.stale_hits += len(stale)
+            for doctor_id in missing:
+                names[doctor_id] = loaded.get(doctor_id, f"Doctor {doctor_id}")
+        return names
+
+    # ------------------------------------------------------------------
+    # Escrituras
+    # ------------------------------------------------------------------
+    def _store(self, names: Dict[int, str]) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for doctor_id, name in names.items():
+                self._entries[doctor_id] = (name, expires_at)
+                self._entries.move_to_end(doctor_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doctor_id: Optional[int] = None) -> None:
+        """Olvida un doctor (o todo el directorio si doctor_id es None)"""
+        with self._lock:
+            if doctor_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(doctor_id, None)
+        logger.info(f"🔄 Directorio de doctores invalidado ({doctor_id if doctor_id is not None else 'todos'})")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instancia compartida por el consumer y las rutas del proceso
+doctor_directory = DoctorDirectory()
+
+
+class DoctorDirectorySync:
+    """Consume DOCTOR_CHANGED en una cola propia de la réplica (hilo de fondo)"""
+
+    def __init__(self, directory: Optional[DoctorDirectory] = None, config=None, reconnect_delay: float = 5.0):
+        from hduce_shared.rabbitmq import RabbitMQConfig, ReplicaSubscriber
+
+        self.directory = directory if directory is not None else doctor_directory
+        self.config = config or RabbitMQConfig.from_env()
+        self.received = 0
+        # Lo cacheado antes de conectar pudo perder invalidaciones
+        self.subscriber = ReplicaSubscriber(
+            self.config.doctor_routing_key,
+            self.handle,
+            on_connect=self.directory.invalidate,
+            config=self.config,
+            name="Doctor-Directory-Sync",
+            reconnect_delay=reconnect_delay
+        )
+
+    def handle(self, message: Dict[str, Any]) -> None:
+        """Aplica un DOCTOR_CHANGED: olvida el doctor (o todo si no trae doctor_id)"""
+        from hduce_shared.rabbitmq import DOCTOR_CHANGED, DoctorChangedData
+
+        if message.get("event_type") != DOCTOR_CHANGED:
+            return
+        self.directory.invalidate(DoctorChangedData.from_message(message).doctor_id)
+        self.received += 1
+
+    def start(self) -> threading.Thread:
+        return self.subscriber.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.subscriber.stop(timeout)
+
+
+doctor_sync = DoctorDirectorySync()
@@ -8,18 +8,26 @@ sys.path.insert(0, '/app')
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError, InterfaceError, OperationalError
 
 # Import desde shared-libraries - CORREGIDO
-from hduce_shared.database import DatabaseManager
-from hduce_shared.rabbitmq.consumer import RabbitMQConsumer
+from hduce_shared.rabbitmq.consumer import BatchFailure, PoisonMessage, RabbitMQConsumer
 from hduce_shared.rabbitmq.config import RabbitMQConfig
+from hduce_shared.rabbitmq.events import (
+    APPOINTMENT_CREATED,
+    DOCTOR_CHANGED,
+    AppointmentCreatedData,
+    DoctorChangedData
+)
 from hduce_shared import get_settings
 
 # Import local desde database.py (SESSIONLOCAL YA CONFIGURADO)
+from config import CONSUMER_BATCH_SIZE, CONSUMER_BATCH_TIMEOUT_MS, CONSUMER_CONCURRENCY
 from database import SessionLocal
+from doctor_cache import doctor_directory
 from models import Notification
 
 # Configurar logging
@@ -35,94 +43,179 @@ class NotificationConsumer:
         self.rabbitmq_config = RabbitMQConfig()
         # NO crear sesión aquí - se creará en cada mensaje
         self.db_session = None  # Se creará dinámicamente
+        # Nombres de doctores en caché (compartida por el proceso)
+        self.doctors = doctor_directory
 
     def get_doctor_name(self, doctor_id: int) -> str:
-        """Obtiene el nombre del doctor desde appointment_db"""
-        try:
-            logger.info(f"🔍 Buscando doctor_id: {doctor_id}")
-
-            # Obtener engine para appointments database
-            engine = DatabaseManager.get_engine("appointments")
-
-            if engine is None:
-                logger.error("❌ No se pudo obtener engine para appointments database")
-                return f"Doctor {doctor_id}"
-
-            # Consultar nombre del doctor
-            with engine.connect() as conn:
-                result = conn.execute(
-                    text("SELECT name FROM doctors WHERE id = :doctor_id"),
-                    {"doctor_id": doctor_id}
-                ).fetchone()
-
-                if result:
-                    doctor_name = result[0]
-                    logger.info(f"✅ Doctor encontrado: {doctor_name}")
-                    return doctor_name
-                else:
-                    logger.warning(f"⚠️ Doctor con ID {doctor_id} no encontrado")
-                    return f"Doctor {doctor_id}"
-
-        except Exception as e:
-            logger.error(f"❌ Error al obtener doctor: {e}")
-            return f"Doctor {doctor_id}"
+        """Obtiene el nombre del doctor (caché del directorio, appointment_db si falta)"""
+        return self.doctors.get_name(doctor_id)
+
+    def get_doctor_names(self, doctor_ids: Iterable[int]) -> Dict[int, str]:
+        """Obtiene los nombres de varios doctores (un solo SELECT para los que falten)"""
+        return self.doctors.get_names(doctor_ids)
+
+    def handle_doctor_changed(self, message: Dict[str, Any]) -> None:
+        """DOCTOR_CHANGED con la routing key antigua (cola compartida)
+
+        Los publishers actuales usan doctor_routing_key y cada réplica lo
+        recibe en su cola propia (doctor_cache.DoctorDirectorySync); esto solo
+        cubre los eventos que queden en appointment_notifications.
+        """
+        self.doctors.invalidate(DoctorChangedData.from_message(message).doctor_id)
+
+    def build_notification(self, event: AppointmentCreatedData, doctor_name: str) -> Dict[str, Any]:
+        """Valores de la notificación para un evento APPOINTMENT_CREATED"""
+        doctor = f"Dr. {doctor_name}"
+        if event.doctor_specialty:
+            doctor = f"{doctor} ({event.doctor_specialty})"
+        return {
+            "user_id": event.patient_id,
+            "user_email": event.patient_email,
+            "title": f"Cita médica programada con Dr. {doctor_name}",
+            "message": (
+                f"Tu cita con el {doctor} "
+                f"ha sido programada para el {event.appointment_date} "
+                f"a las {event.appointment_time}. "
+                f"Motivo: {event.reason or 'Consulta médica'}"
+            ),
+            "notification_type": "appointment",
+            "is_read": False,
+            "created_at": datetime.utcnow()
+        }
 
     def process_message(self, message: Dict[str, Any]) -> None:
         """Procesa mensajes de RabbitMQ"""
         try:
             logger.info(f"📨 Mensaje recibido: {message}")
 
-            # Extraer datos del mensaje
+            # Extraer datos del mensaje (esquema v1 o v2)
             event_type = message.get('event_type', '')
-            data = message.get('data', {})
 
-            if event_type.upper() == "APPOINTMENT_CREATED":
-                # OBTENER NOMBRE DEL DOCTOR
-                doctor_id = data.get('doctor_id')
-                doctor_name = self.get_doctor_name(doctor_id) if doctor_id else "Doctor"
+            if event_type.upper() == APPOINTMENT_CREATED:
+                event = AppointmentCreatedData.from_message(message)
+
+                # v2 trae el nombre del doctor; v1 obliga a buscarlo (caché)
+                if event.enriched:
+                    doctor_name = event.doctor_name
+                else:
+                    doctor_name = self.get_doctor_name(event.doctor_id) if event.doctor_id else "Doctor"
 
                 # Crear sesión de base de datos
                 db = SessionLocal()
                 try:
-                    notification = Notification(
-                        user_id=data.get('patient_id'),
-                        user_email=data.get('patient_email', ''),
-                        title=f"Cita médica programada con Dr. {doctor_name}",
-                        message=(
-                            f"Tu cita con el Dr. {doctor_name} "
-                            f"ha sido programada para el {data.get('appointment_date')} "
-                            f"a las {data.get('appointment_time')}. "
-                            f"Motivo: {data.get('reason', 'Consulta médica')}"
-                        ),
-                        notification_type="appointment",
-                        is_read=False,
-                        created_at=datetime.utcnow()
-                    )
+                    notification = Notification(**self.build_notification(event, doctor_name))
 
                     db.add(notification)
                     db.commit()
-                    logger.info(f"✅ Notificación creada para usuario {data.get('patient_id')} - Cita #{data.get('appointment_id')}")
+                    logger.info(f"✅ Notificación creada para usuario {event.patient_id} - Cita #{event.appointment_id}")
                     logger.info(f"📝 Detalles: Título='{notification.title}'")
 
                 except Exception as e:
                     db.rollback()
                     logger.error(f"❌ Error al crear notificación: {e}")
-                    logger.error(f"🔍 Datos del mensaje: {data}")
+                    logger.error(f"🔍 Datos del mensaje: {message.get('data')}")
                 finally:
                     db.close()  # Cerrar sesión siempre
+            elif event_type.upper() == DOCTOR_CHANGED:
+                self.handle_doctor_changed(message)
             else:
                 logger.warning(f"⚠️ Evento no manejado: {event_type}")
 
         except Exception as e:
             logger.error(f"❌ Error procesando mensaje: {e}")
 
+    def process_batch(self, messages: List[Dict[str, Any]]) -> None:
+        """Procesa un lote de mensajes: un INSERT múltiple y un solo commit
+
+        Un fallo no arrastra al resto del lote: los eventos inválidos se
+        marcan como PoisonMessage (dead letter sin reintentos) y, si el INSERT
+        múltiple falla, se reintenta fila a fila. Al final BatchFailure indica
+        al consumer qué mensajes reencolar (con contador de intentos) o mandar
+        a appointment_notifications.dead. Si la base de datos no responde se
+        propaga la excepción y se reintenta el lote entero.
+        """
+        failures: Dict[int, Exception] = {}
+        events: List[Tuple[int, AppointmentCreatedData]] = []
+        for index, message in enumerate(messages):
+            event_type = str(message.get('event_type') or '')
+            try:
+                if event_type.upper() == APPOINTMENT_CREATED:
+                    events.append((index, AppointmentCreatedData.from_message(message)))
+                elif event_type.upper() == DOCTOR_CHANGED:
+                    self.handle_doctor_changed(message)
+                else:
+                    logger.warning(f"⚠️ Evento no manejado: {event_type}")
+            except (ValueError, TypeError) as e:
+                # ValidationError (patient_email nulo, ids no numéricos...) no se arregla reintentando
+                logger.error(f"❌ Evento inválido descartado: {e}")
+                failures[index] = PoisonMessage(str(e))
+
+        if events:
+            failures.update(self._insert_notifications(events))
+        if failures:
+            raise BatchFailure(failures)
+
+    def _insert_notifications(self, events: List[Tuple[int, AppointmentCreatedData]]) -> Dict[int, Exception]:
+        """INSERT múltiple de las notificaciones; devuelve los fallos por índice del lote"""
+
+        # Solo los eventos v1 necesitan buscar el doctor: un SELECT para el lote
+        doctor_names = self.get_doctor_names(
+            event.doctor_id for _, event in events if not event.enriched and event.doctor_id
+        )
+        rows = [
+            (index, self.build_notification(
+                event,
+                event.doctor_name if event.enriched else doctor_names.get(event.doctor_id, "Doctor")
+            ))
+            for index, event in events
+        ]
+
+        db = SessionLocal()
+        try:
+            # executemany -> INSERT ... VALUES (...), (...) en SQLAlchemy 2.0
+            db.execute(insert(Notification), [row for _, row in rows])
+            db.commit()
+            logger.info(f"✅ {len(rows)} notificaciones creadas en un lote")
+            return {}
+        except (OperationalError, InterfaceError):
+            # Base de datos caída o conexión rota: reintentar el lote entero
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Error al crear lote de {len(rows)} notificaciones, fila a fila: {e}")
+
+            failures: Dict[int, Exception] = {}
+            for index, row in rows:
+                try:
+                    db.execute(insert(Notification), [row])
+                    db.commit()
+                except Exception as row_error:
+                    db.rollback()
+                    # Datos que la tabla rechaza: no cambiarán en el siguiente intento
+                    if isinstance(row_error, (DataError, IntegrityError)):
+                        row_error = PoisonMessage(str(row_error))
+                    failures[index] = row_error
+            logger.info(f"✅ {len(rows) - len(failures)} de {len(rows)} notificaciones creadas fila a fila")
+            return failures
+        finally:
+            db.close()
+
     def start_consuming(self) -> None:
         """Inicia el consumidor de RabbitMQ"""
         try:
-            consumer = RabbitMQConsumer()
+            # Varios mensajes en paralelo (pool de hilos), prefetch acorde
+            consumer = RabbitMQConsumer(self.rabbitmq_config, workers=CONSUMER_CONCURRENCY)
             logger.info("🎯 Iniciando consumidor de RabbitMQ...")
             logger.info(f"✅ Configuración: Exchange={self.rabbitmq_config.appointment_exchange}, Queue={self.rabbitmq_config.appointment_queue}, RoutingKey={self.rabbitmq_config.appointment_routing_key}")
-            consumer.start_consuming(callback=self.process_message)
+            if CONSUMER_BATCH_SIZE > 1:
+                consumer.start_consuming_batches(
+                    callback=self.process_batch,
+                    batch_size=CONSUMER_BATCH_SIZE,
+                    batch_timeout_ms=CONSUMER_BATCH_TIMEOUT_MS
+                )
+            else:
+                consumer.start_consuming(callback=self.process_message)
         except Exception as e:
             logger.error(f"❌ Error en el consumidor: {e}")
             raise
@@ -2,6 +2,7 @@
 Notification Service - 100% usando Shared Libraries
 SOLO UN consumer: desde independent_consumer.py
 """
+import asyncio
 import uvicorn
 import sys
 import os
@@ -13,20 +14,32 @@ from contextlib import asynccontextmanager
 # Añadir path para shared libraries
 sys.path.insert(0, '/app')
 
+from hduce_shared.rabbitmq import HAS_AIO_PIKA, AsyncRabbitMQConsumer
+
 # Importar módulos locales
-from independent_consumer import start_consumer
+from config import CONSUMER_BATCH_SIZE, CONSUMER_BATCH_TIMEOUT_MS, CONSUMER_CONCURRENCY
+from doctor_cache import doctor_directory, doctor_sync
+from independent_consumer import NotificationConsumer, start_consumer
 from routes import router as notifications_router
+from shared_middleware import FastJSONResponse, conditional_metrics, install_middleware, request_stats
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Variable para controlar el hilo del consumer
+# Variables para controlar el consumer (hilo bloqueante o tarea asyncio)
 consumer_thread = None
+consumer_task = None
+async_consumer = None
+
+def consumer_alive() -> bool:
+    if consumer_task is not None:
+        return not consumer_task.done()
+    return consumer_thread.is_alive() if consumer_thread else False
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global consumer_thread
+    global consumer_thread, consumer_task, async_consumer
 
     logger.info("🚀 Iniciando Notification Service con SHARED LIBRARIES...")
 
@@ -40,8 +53,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error creando tablas: {e}")
 
-    # Iniciar consumer en un hilo separado SOLO SI NO HAY YA UNO
-    if consumer_thread is None or not consumer_thread.is_alive():
+    # Precargar nombres de doctores con una sola consulta a appointment_db
+    await asyncio.to_thread(doctor_directory.warm)
+    # DOCTOR_CHANGED en una cola exclusiva de esta réplica (no la compartida)
+    doctor_sync.start()
+
+    # Con aio-pika el consumer corre en el event loop de uvicorn (por lotes o con
+    # varios mensajes en paralelo); si no, en un hilo separado SOLO SI NO HAY YA UNO
+    if HAS_AIO_PIKA:
+        async_consumer = AsyncRabbitMQConsumer(concurrency=CONSUMER_CONCURRENCY)
+        notification_consumer = NotificationConsumer()
+        if CONSUMER_BATCH_SIZE > 1:
+            consumer_task = async_consumer.start_in_background(
+                notification_consumer.process_batch,
+                batch_size=CONSUMER_BATCH_SIZE,
+                batch_timeout_ms=CONSUMER_BATCH_TIMEOUT_MS
+            )
+            logger.info(f"✅ Consumer asyncio iniciado (lotes de {CONSUMER_BATCH_SIZE} / {CONSUMER_BATCH_TIMEOUT_MS}ms)")
+        else:
+            consumer_task = async_consumer.start_in_background(notification_consumer.process_message)
+            logger.info(f"✅ Consumer asyncio iniciado (concurrencia={CONSUMER_CONCURRENCY})")
+    elif consumer_thread is None or not consumer_thread.is_alive():
         consumer_thread = threading.Thread(
             target=start_consumer,
             name="RabbitMQ-Consumer",
@@ -56,14 +88,20 @@ async def lifespan(app: FastAPI):
 
     # Cierre: limpiar recursos
     logger.info("👋 Cerrando Notification Service...")
+    doctor_sync.stop()
+    if consumer_task is not None:
+        consumer_task.cancel()
+        await async_consumer.close()
 
 # Crear aplicación FastAPI
 app = FastAPI(
     title="Notification Service",
     description="Servicio de notificaciones con RabbitMQ Consumer",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
+install_middleware(app)
 
 # Incluir rutas (usando el mismo patrón que appointment-service)
 # main.py prefix="/api" + routes.py prefix="/notifications" = /api/notifications/
@@ -80,7 +118,10 @@ async def health_check():
         "service": "notification",
         "shared_libraries": "yes",
         "database": "postgresql",
-        "consumer_alive": consumer_thread.is_alive() if consumer_thread else False
+        "consumer_alive": consumer_alive(),
+        "doctor_cache": doctor_directory.stats(),
+        "conditional_get": conditional_metrics.stats(),
+        "http": request_stats.stats()
     }
 
 if __name__ == "__main__":
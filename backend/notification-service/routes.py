@@ -1,6 +1,8 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
+from shared_middleware import conditional_get
 from database import get_db
 from models import Notification
 from schemas import NotificationSchema
@@ -25,8 +27,24 @@ def get_notification(notification_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Notification not found")
     return notification
 
+def user_notifications_version(user_id: int, db: Session = Depends(get_db)):
+    """Versión de las notificaciones de un usuario para el GET condicional
+
+    COUNT(*) y MAX(id) cambian al llegar o borrarse notificaciones y
+    MAX(read_at) al marcar una como leída (índice por user_id).
+    """
+    return tuple(
+        db.query(func.count(Notification.id), func.max(Notification.id), func.max(Notification.read_at))
+        .filter(Notification.user_id == user_id)
+        .one()
+    )
+
 # Ruta: será /api/notifications/user/{user_id}
-@router.get("/user/{user_id}", response_model=List[NotificationSchema])
+@router.get(
+    "/user/{user_id}",
+    response_model=List[NotificationSchema],
+    dependencies=[Depends(conditional_get("user_notifications", user_notifications_version))]
+)
 def get_user_notifications(user_id: int, db: Session = Depends(get_db)):
     """Get notifications for a specific user"""
     notifications = db.query(Notification).filter(Notification.user_id == user_id).all()
@@ -3,5 +3,45 @@ Shared Middleware para microservicios HDuce
 Contiene middleware común para todos los servicios
 """
 from .encoding_middleware import add_encoding_middleware, UTF8JSONResponse, configure_json_encoding
+from .fast_json import FastJSONResponse, JSON_BACKEND, JSON_MEDIA_TYPE
+from .conditional import (
+    CONDITIONAL_GET_ENABLED,
+    conditional_get,
+    conditional_metrics,
+    etag_matches,
+    make_etag,
+    not_modified
+)
+from .asgi import (
+    CharsetMiddleware,
+    RequestIDMiddleware,
+    RequestStats,
+    TimingMiddleware,
+    get_request_id,
+    install_middleware,
+    request_stats,
+    route_path
+)
 
-__all__ = ["add_encoding_middleware", "UTF8JSONResponse", "configure_json_encoding"]
+__all__ = [
+    "add_encoding_middleware",
+    "UTF8JSONResponse",
+    "configure_json_encoding",
+    "FastJSONResponse",
+    "JSON_BACKEND",
+    "JSON_MEDIA_TYPE",
+    "CONDITIONAL_GET_ENABLED",
+    "conditional_get",
+    "conditional_metrics",
+    "etag_matches",
+    "make_etag",
+    "not_modified",
+    "CharsetMiddleware",
+    "RequestIDMiddleware",
+    "RequestStats",
+    "TimingMiddleware",
+    "get_request_id",
+    "install_middleware",
+    "request_stats",
+    "route_path"
+]
@@ -0,0 +1,194 @@
+"""
+Middleware ASGI puro común a todos los servicios
+
+@app.middleware("http") (BaseHTTPMiddleware) envuelve cada petición en una
+tarea y un stream de memoria más, y acumula el cuerpo de las respuestas en
+streaming. Estas clases son ASGI puro: solo envuelven ``send`` para leer o
+añadir cabeceras en http.response.start, sin tareas extra y sin tocar el
+cuerpo.
+
+- RequestIDMiddleware: X-Request-ID de la petición (o uno nuevo) en la
+  respuesta, en scope["state"]["request_id"] y en get_request_id() para logs.
+- TimingMiddleware: duración y estado de cada petición hacia un observador
+  (por defecto request_stats, en memoria; metrics-service usa Prometheus) y
+  cabecera Server-Timing.
+- CharsetMiddleware: añade charset=utf-8 a respuestas JSON o de texto que no
+  lo declaran (las de FastJSONResponse ya lo traen).
+
+Todos los servicios las instalan igual:
+
+    install_middleware(app)                      # o install_middleware(app, observer=...)
+"""
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# IDs aceptados del cliente o del proxy; cualquier otro se sustituye
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """ID de la petición en curso (None fuera de una petición)"""
+    return _request_id.get()
+
+
+def route_path(scope: Dict[str, Any]) -> str:
+    """Plantilla de la ruta (/api/appointments/{appointment_id}) o, sin ruta, el path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+class RequestIDMiddleware:
+    def __init__(self, app, header: str = REQUEST_ID_HEADER):
+        self.app = app
+        self.header = header
+        self._header_key = header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == self._header_key:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (self._header_key, request_id.encode("latin-1"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [header]
+            await send(message)
+
+        token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _request_id.reset(token)
+
+
+class RequestStats:
+    """Observador por defecto: peticiones, errores 5xx y duración por ruta"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.in_progress = 0
+
+    def started(self, scope: Dict[str, Any]) -> None:
+        with self._lock:
+            self.in_progress += 1
+
+    def finished(self, scope: Dict[str, Any], status: int, duration: float) -> None:
+        key = f"{scope.get('method', '')} {route_path(scope)}"
+        with self._lock:
+            self.in_progress -= 1
+            counters = self._routes.setdefault(key, {"requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            counters["requests"] += 1
+            counters["errors"] += status >= 500
+            counters["total_seconds"] += duration
+            counters["max_seconds"] = max(counters["max_seconds"], duration)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_progress": self.in_progress,
+                "routes": {
+                    key: {
+                        "requests": counters["requests"],
+                        "errors": counters["errors"],
+                        "avg_ms": round(counters["total_seconds"] * 1000 / counters["requests"], 3),
+                        "max_ms": round(counters["max_seconds"] * 1000, 3),
+                    }
+                    for key, counters in self._routes.items()
+                },
+            }
+
+
+# Instancia compartida por las peticiones del proceso
+request_stats = RequestStats()
+
+
+class TimingMiddleware:
+    """Mide cada petición HTTP y la entrega a ``observer`` (started/finished)"""
+
+    def __init__(self, app, observer=None, server_timing: bool = True):
+        self.app = app
+        self.observer = observer if observer is not None else request_stats
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", f"app;dur={elapsed:.1f}".encode("latin-1"))
+                    ]
+            await send(message)
+
+        self.observer.started(scope)
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            self.observer.finished(scope, status, time.perf_counter() - start)
+
+
+class CharsetMiddleware:
+    """charset=utf-8 en Content-Type JSON o text/* que no declaran charset"""
+
+    def __init__(self, app, charset: str = "utf-8"):
+        self.app = app
+        self._suffix = f"; charset={charset}".encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_charset(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                for i, (key, value) in enumerate(headers):
+                    if key.lower() == b"content-type":
+                        media_type = value.lower()
+                        if b"charset" not in media_type and (
+                            media_type.startswith(b"application/json") or media_type.startswith(b"text/")
+                        ):
+                            headers[i] = (key, value + self._suffix)
+                            message["headers"] = headers
+                        break
+            await send(message)
+
+        await self.app(scope, receive, send_with_charset)
+
+
+def install_middleware(app, observer=None, request_id_header: str = REQUEST_ID_HEADER) -> None:
+    """Pila común: RequestID (exterior) -> Timing -> Charset -> app"""
+    app.add_middleware(CharsetMiddleware)
+    app.add_middleware(TimingMiddleware, observer=observer)
+    app.add_middleware(RequestIDMiddleware, header=request_id_header)
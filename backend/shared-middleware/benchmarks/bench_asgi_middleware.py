@@ -0,0 +1,116 @@
+"""
+Benchmark: peticiones/s de un endpoint trivial con y sin la pila de middleware
+
+Compara, en proceso y sobre ASGI (httpx.ASGITransport, sin red):
+- bare:          la app sin middleware
+- asgi:          install_middleware(app) (RequestID + Timing + Charset, ASGI puro)
+- http (legacy): las mismas tres funciones como @app.middleware("http"),
+                 como estaban antes en appointment-service, metrics-service
+                 y shared-middleware
+
+Usage (from backend/shared-middleware/):
+    python benchmarks/bench_asgi_middleware.py --requests 5000 --concurrency 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+
+from asgi import RequestStats, install_middleware
+from fast_json import FastJSONResponse
+
+
+def add_routes(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+def bare_app() -> FastAPI:
+    return add_routes(FastAPI(default_response_class=FastJSONResponse))
+
+
+def asgi_app() -> FastAPI:
+    app = bare_app()
+    install_middleware(app, observer=RequestStats())
+    return app
+
+
+def http_middleware_app() -> FastAPI:
+    app = bare_app()
+    stats = RequestStats()
+
+    @app.middleware("http")
+    async def add_charset(request: Request, call_next):
+        response = await call_next(request)
+        content_type = response.headers.get("content-type", "")
+        if "application/json" in content_type and "charset" not in content_type:
+            response.headers["content-type"] = "application/json; charset=utf-8"
+        return response
+
+    @app.middleware("http")
+    async def timing(request: Request, call_next):
+        stats.started(request.scope)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            stats.finished(request.scope, status, time.perf_counter() - start)
+
+    @app.middleware("http")
+    async def request_id(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request.headers.get("x-request-id") or uuid.uuid4().hex
+        return response
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # calentamiento
+            await client.get("/ping")
+
+        per_worker = requests // concurrency
+
+        async def worker():
+            for _ in range(per_worker):
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return per_worker * concurrency / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    stacks = (("bare", bare_app), ("asgi", asgi_app), ("http (legacy)", http_middleware_app))
+    results = {}
+    print(f"{'stack':<16} {'req/s':>10} {'vs bare':>8}")
+    for name, build in stacks:
+        # mejor de N rondas para reducir ruido
+        results[name] = max(asyncio.run(run(build(), args.requests, args.concurrency)) for _ in range(args.rounds))
+        print(f"{name:<16} {results[name]:>10.0f} {results[name] / results['bare']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: serialización de un endpoint de listado (100 y 1000 elementos)
+
+Compara, para una lista de citas con el mismo esquema que AppointmentResponse:
+- render:   solo el paso de bytes (json.dumps de Starlette, stdlib compacto,
+            orjson y msgspec si están instalados) sobre el contenido ya
+            pasado por jsonable_encoder
+- endpoint: la petición completa a un endpoint FastAPI con response_model
+            (validación + jsonable_encoder + render) con JSONResponse y con
+            FastJSONResponse
+
+Usage (from backend/shared-middleware/):
+    python benchmarks/bench_json_response.py --iterations 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, time as dtime
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import fast_json
+from fast_json import FastJSONResponse
+
+SIZES = (100, 1000)
+
+
+class Item(BaseModel):
+    id: int
+    patient_id: int
+    patient_email: str
+    patient_name: str
+    doctor_id: int
+    appointment_date: date
+    appointment_time: dtime
+    reason: Optional[str] = None
+    status: Optional[str] = "scheduled"
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
+def make_items(n: int) -> List[dict]:
+    return [
+        {
+            "id": i, "patient_id": 1000 + i % 500, "patient_email": f"paciente{i}@hduce.com",
+            "patient_name": f"José Núñez {i}", "doctor_id": 1 + i % 40,
+            "appointment_date": date(2026, 3, 1 + i % 28), "appointment_time": dtime(8 + i % 10, 30 * (i % 2)),
+            "reason": "Revisión médica general, control de presión", "status": "scheduled",
+            "created_at": datetime(2026, 2, 1, 9, 15, 30), "updated_at": datetime(2026, 2, 2, 10, 0, 0),
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn, iterations: int) -> float:
+    fn()  # calentamiento
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def renderers():
+    yield "starlette json", lambda content: JSONResponse(content).body
+    yield "stdlib compact", fast_json._stdlib_dumps
+    if fast_json.HAS_ORJSON:
+        yield "orjson", fast_json.orjson.dumps
+    if fast_json.HAS_MSGSPEC:
+        encoder = fast_json.msgspec.json.Encoder()
+        yield "msgspec", encoder.encode
+
+
+def build_app(items_by_size) -> TestClient:
+    app = FastAPI()
+
+    for size, items in items_by_size.items():
+        def endpoint(items=items):
+            return items
+
+        app.add_api_route(f"/default/{size}", endpoint, response_model=List[Item], response_class=JSONResponse)
+        app.add_api_route(f"/fast/{size}", endpoint, response_model=List[Item], response_class=FastJSONResponse)
+    return TestClient(app)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    items_by_size = {size: make_items(size) for size in SIZES}
+    print(f"FastJSONResponse backend: {fast_json.JSON_BACKEND}\n")
+
+    print(f"{'render':<16} {'items':>6} {'ms/response':>12} {'bytes':>9}")
+    for size in SIZES:
+        content = jsonable_encoder(items_by_size[size])
+        for name, render in renderers():
+            elapsed = timed(lambda: render(content), args.iterations)
+            print(f"{name:<16} {size:>6} {elapsed * 1000:>12.3f} {len(render(content)):>9}")
+    print()
+
+    client = build_app(items_by_size)
+    print(f"{'endpoint':<16} {'items':>6} {'ms/request':>12} {'content-type'}")
+    for size in SIZES:
+        for name in ("default", "fast"):
+            path = f"/{name}/{size}"
+            elapsed = timed(lambda: client.get(path), max(1, args.iterations // 4))
+            content_type = client.get(path).headers["content-type"]
+            print(f"{name:<16} {size:>6} {elapsed * 1000:>12.3f} {content_type}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+GET condicional (ETag / If-None-Match) para endpoints de lectura
+
+Cada ruta que lo activa declara una función de versión: una consulta barata
+que cambia siempre que cambia la respuesta, p. ej. el updated_at de una
+entidad, o (COUNT(*), MAX(id), MAX(read_at)) de una colección. El ETag sale
+de esa versión, no del cuerpo, así que cuando el cliente manda
+If-None-Match con el ETag vigente se responde 304 antes de ejecutar el
+endpoint: sin la consulta completa ni la serialización con Pydantic.
+
+Uso (opt-in por ruta):
+
+    def appointment_version(appointment_id: int, db: Session = Depends(get_db),
+                            current_user: dict = Depends(get_current_user)):
+        return db.query(Appointment.updated_at).filter(Appointment.id == appointment_id).scalar()
+
+    @router.get("/appointments/{appointment_id}",
+                dependencies=[Depends(conditional_get("appointment", appointment_version))])
+
+La función de versión es una dependencia más de FastAPI: recibe los mismos
+parámetros de ruta y comparte la sesión de base de datos con el endpoint.
+Si devuelve None (la entidad no existe) no se genera ETag y el endpoint
+responde como siempre (404).
+
+Las dependencias de ruta se ejecutan antes que las del endpoint, así que
+la función de versión de una ruta protegida debe depender ella misma de la
+autenticación y comprobar el acceso (error antes de devolver la versión):
+si no, un 304 contestaría a peticiones anónimas y revelaría qué ids existen.
+
+Las rutas que ya tienen el cuerpo serializado (p. ej. una caché de bytes)
+usan etag_matches y conditional_metrics directamente con el hash del cuerpo.
+
+conditional_metrics.stats() da, por ruta, peticiones, peticiones con
+If-None-Match y ratio de 304.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from fastapi import Depends, HTTPException, Request, Response
+
+CONDITIONAL_GET_ENABLED = os.getenv("CONDITIONAL_GET_ENABLED", "true").lower() == "true"
+
+# Los clientes siempre revalidan: 304 si no cambió, cuerpo nuevo si cambió
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(route: str, version: Any) -> str:
+    """ETag débil de una versión (equivalente semántico, no byte a byte)"""
+    digest = hashlib.blake2b(f"{route}:{version!r}".encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contiene el ETag (comparación débil, RFC 9110)
+
+    "*" no cuenta: en un GET no aporta nada a un cliente legítimo y daría
+    un 304 por cada recurso que exista.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ConditionalMetrics:
+    """Contadores por ruta: peticiones, condicionales (If-None-Match) y 304"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, conditional: bool, not_modified: bool) -> None:
+        with self._lock:
+            counters = self._routes.setdefault(route, {"requests": 0, "conditional": 0, "not_modified": 0})
+            counters["requests"] += 1
+            counters["conditional"] += conditional
+            counters["not_modified"] += not_modified
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                route: {
+                    **counters,
+                    "not_modified_ratio": round(counters["not_modified"] / counters["requests"], 4)
+                    if counters["requests"] else 0.0,
+                }
+                for route, counters in self._routes.items()
+            }
+
+
+# Instancia compartida por las rutas del proceso
+conditional_metrics = ConditionalMetrics()
+
+
+def not_modified(etag: str) -> HTTPException:
+    """304 sin cuerpo (FastAPI no añade cuerpo a un 304)"""
+    return HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def conditional_get(route: str, version: Callable[..., Any]) -> Callable[..., Any]:
+    """Dependencia de ruta: 304 si If-None-Match coincide con la versión actual
+
+    ``route`` identifica la ruta en el ETag y en las métricas; ``version`` es
+    una dependencia de FastAPI que devuelve la versión (o None).
+    """
+    async def dependency(request: Request, response: Response, current: Any = Depends(version)) -> None:
+        if not CONDITIONAL_GET_ENABLED or current is None:
+            return
+        etag = make_etag(route, current)
+        conditional = "if-none-match" in request.headers
+        matched = conditional and etag_matches(request, etag)
+        conditional_metrics.record(route, conditional, matched)
+        if matched:
+            raise not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+    return dependency
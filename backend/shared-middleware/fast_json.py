@@ -0,0 +1,66 @@
+"""
+Respuesta JSON rápida y en UTF-8 para todos los servicios
+
+FastJSONResponse serializa con orjson si está instalado, si no con msgspec,
+y si no con json de la biblioteca estándar (ensure_ascii=False, sin
+espacios). En los tres casos el cuerpo sale en UTF-8 (á, é, ñ sin escapar)
+y el Content-Type ya lleva "charset=utf-8": no hace falta reescribir la
+cabecera después en un middleware.
+
+Uso:
+    app = FastAPI(..., default_response_class=FastJSONResponse)
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    msgspec = None
+    HAS_MSGSPEC = False
+
+JSON_MEDIA_TYPE = "application/json; charset=utf-8"
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+if HAS_ORJSON:
+    JSON_BACKEND = "orjson"
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content)
+elif HAS_MSGSPEC:
+    JSON_BACKEND = "msgspec"
+    _encoder = msgspec.json.Encoder()
+
+    def dumps(content: Any) -> bytes:
+        return _encoder.encode(content)
+else:
+    JSON_BACKEND = "json"
+    dumps = _stdlib_dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse con el serializador más rápido disponible y charset=utf-8"""
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
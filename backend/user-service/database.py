@@ -5,13 +5,18 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
 
+from hduce_shared.database import HAS_ASYNC_DATABASE, async_database_url, pool_limits
+
 # Configuracin de la base de datos
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     f"postgresql://{os.getenv('POSTGRES_USER', 'postgres')}:{os.getenv('POSTGRES_PASSWORD', 'postgres')}@{os.getenv('POSTGRES_HOST', '172.31.27.77')}:{os.getenv('POSTGRES_PORT', '5432')}/{os.getenv('USER_DB', 'user_db')}"
 )
 
-engine = create_engine(DATABASE_URL)
+# Motor sncrono y asncrono se reparten DB_POOL_SIZE + DB_MAX_OVERFLOW
+POOL_SIZE, MAX_OVERFLOW = pool_limits()
+
+engine = create_engine(DATABASE_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -22,6 +27,30 @@ def get_db():
     finally:
         db.close()
 
+# Misma base de datos con driver asyncio (asyncpg): no bloquea el event loop
+if HAS_ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL), pool_pre_ping=True, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+def require_async_database():
+    """Falla al arrancar (no en cada peticion) si falta el driver asyncio de /me"""
+    if not HAS_ASYNC_DATABASE:
+        raise RuntimeError("user-service needs asyncpg and greenlet for its AsyncSession routes "
+                           "(pip install asyncpg greenlet)")
+
+async def get_async_db():
+    """Dependency for getting an AsyncSession"""
+    require_async_database()
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     """Crea todas las tablas en la base de datos"""
     # Importar aqu para evitar importacin circular
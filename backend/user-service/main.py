@@ -4,6 +4,7 @@
 User Service - Main application file
 """
 
+import asyncio
 import logging
 import sys
 import os
@@ -15,6 +16,9 @@ sys.path.insert(0, "/app")  # Para shared-libraries en Docker
 
 # IMPORTAR DE SHARED-LIBRARIES
 from hduce_shared.config import settings
+from hduce_shared.auth import JWT_REVOCATION_SYNC_ENABLED, RevocationSync, fetch_revocations
+from auth_client import jwt_manager
+from shared_middleware import FastJSONResponse, install_middleware
 
 import os
 
@@ -35,7 +39,7 @@ logger = logging.getLogger(__name__)
 # Importar rutas (DESPUES de cargar .env)
 try:
     from routes import router as user_router
-    from database import get_db, init_db, engine
+    from database import get_db, init_db, engine, async_engine, require_async_database
     logger.info("Imports de user-service cargados correctamente")
 except ImportError as e:
     logger.error(f"Error importando modulos de user-service: {e}")
@@ -45,7 +49,8 @@ except ImportError as e:
 app = FastAPI(
     title="User Service API",
     version="1.0.0",
-    description="Microservicio para gestion de usuarios"
+    description="Microservicio para gestion de usuarios",
+    default_response_class=FastJSONResponse
 )
 
 # Configurar CORS
@@ -56,6 +61,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_middleware(app)
 
 # Incluir rutas
 app.include_router(user_router, tags=["users"])
@@ -84,10 +90,15 @@ async def root():
         ]
     }
 
+# Revocaciones anteriores al arranque: GET /auth/revocations de auth-service
+revocation_sync = RevocationSync(bootstrap=fetch_revocations)
+
 # Inicializar base de datos al iniciar
 @app.on_event("startup")
 async def startup_event():
     logger.info("Iniciando User Service...")
+    # Sin asyncpg las rutas con AsyncSession fallarían en cada petición
+    require_async_database()
     
     try:
         logger.info("Inicializando base de datos...")
@@ -95,9 +106,27 @@ async def startup_event():
         logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error inicializando base de datos: {e}")
+
+    # Tokens revocados en auth-service (TOKEN_REVOKED) rechazados por auth_client;
+    # la precarga termina antes de aceptar tráfico
+    if JWT_REVOCATION_SYNC_ENABLED:
+        await asyncio.to_thread(revocation_sync.preload)
+        revocation_sync.start()
+
+    # Claves públicas de auth-service para verificar RS256/EdDSA en local
+    if jwt_manager.jwks is not None:
+        jwt_manager.jwks.start()
     
     logger.info("User Service listo y funcionando en puerto 8001")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    revocation_sync.stop()
+    if jwt_manager.jwks is not None:
+        jwt_manager.jwks.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import traceback
 
-from database import get_db
+from database import get_async_db, get_db
 from models import User
 from schemas import UserCreate, UserResponse
 from auth_client import validate_token
@@ -63,7 +65,7 @@ async def get_users(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     token_data: dict = Depends(validate_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user information from JWT token"""
     try:
@@ -76,7 +78,8 @@ async def get_current_user(
             )
 
         # Buscar usuario por email
-        user = db.query(User).filter(User.email == user_email).first()
+        result = await db.execute(select(User).where(User.email == user_email))
+        user = result.scalars().first()
         
         if not user:
             print(f"Usuario {user_email} no encontrado en user_db. Creando nuevo...")
@@ -92,11 +95,11 @@ async def get_current_user(
             
             db.add(user)
             try:
-                db.commit()
-                db.refresh(user)
+                await db.commit()
+                await db.refresh(user)
                 print(f"Usuario creado exitosamente: {user_email}")
             except Exception as commit_error:
-                db.rollback()
+                await db.rollback()
                 print(f"Error al crear usuario: {traceback.format_exc()}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -8,10 +8,14 @@ CREATE TABLE IF NOT EXISTS users (
     role VARCHAR(50) NOT NULL DEFAULT 'patient',
     is_active BOOLEAN DEFAULT true,
     is_superuser BOOLEAN DEFAULT false,
+    token_version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Bases creadas antes de token_version (invalidación de tokens en /verify)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 1;
+
 -- Insertar usuario de prueba con hash CORRECTO
 INSERT INTO users (email, username, full_name, hashed_password, role, is_active, is_superuser) 
 VALUES (
@@ -0,0 +1,75 @@
+"""
+Benchmark: JWTManager token verification, cold vs warm tokens.
+
+Cold: every verification sees a new token (cache miss, full HMAC + decode).
+Warm: the same few tokens are verified repeatedly, as with a logged-in user
+sending many requests (cache hit until the token's exp).
+Each installed JWT backend (hmac, pyjwt, jose) is measured separately.
+
+Usage (from shared-libraries/):
+    python benchmarks/bench_jwt_cache.py --verifications 20000
+    python benchmarks/bench_jwt_cache.py --backend hmac
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hduce_shared.auth.backends import available_backends
+from hduce_shared.auth.jwt_manager import JWTManager
+
+SECRET = "benchmark-secret-key"
+
+
+def make_tokens(manager, count):
+    return [
+        manager.create_access_token({
+            "sub": f"paciente{i}@hduce.com",
+            "user_id": i,
+            "username": f"paciente{i}",
+            "email": f"paciente{i}@hduce.com",
+            "role": "patient",
+        })
+        for i in range(count)
+    ]
+
+
+def run(label, verify, tokens, verifications):
+    start = time.perf_counter()
+    for i in range(verifications):
+        verify(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {verifications / elapsed:>10.0f} verifications/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verifications", type=int, default=20000)
+    parser.add_argument("--warm-tokens", type=int, default=100)
+    parser.add_argument("--backend", choices=available_backends(), help="default: every installed backend")
+    args = parser.parse_args()
+
+    cold_tokens = make_tokens(JWTManager(SECRET), args.verifications)
+    warm_tokens = cold_tokens[:args.warm_tokens]
+
+    for backend in [args.backend] if args.backend else available_backends():
+        print(f"--- backend: {backend}")
+        run("create_access_token", JWTManager(SECRET, backend=backend).create_access_token,
+            [{"sub": "paciente@hduce.com", "user_id": 1}], args.verifications)
+        for method in ("verify_token", "decode_token"):
+            uncached = JWTManager(SECRET, cache_size=0, backend=backend)
+            run(f"{method} uncached", getattr(uncached, method), warm_tokens, args.verifications)
+
+            cold = JWTManager(SECRET, backend=backend)
+            run(f"{method} cached, cold tokens", getattr(cold, method), cold_tokens, args.verifications)
+
+            warm = JWTManager(SECRET, backend=backend)
+            for token in warm_tokens:
+                warm.decode_token(token)
+            run(f"{method} cached, warm tokens", getattr(warm, method), warm_tokens, args.verifications)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: connection-per-event publishing vs the pooled publisher.
+
+Usage (from shared-libraries/):
+    python benchmarks/bench_publisher_pool.py --messages 2000 --threads 8 --rtt-ms 0.5
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_broker import FakeBroker
+from hduce_shared.rabbitmq import RabbitMQConfig, RabbitMQPublisher, RabbitMQPublisherPool
+
+EVENT = {
+    "appointment_id": 1,
+    "patient_id": 42,
+    "patient_email": "paciente@hduce.com",
+    "doctor_id": 3,
+    "appointment_date": "2026-03-06",
+    "appointment_time": "09:30:00",
+    "reason": "Consulta médica",
+}
+
+
+def run(label, publish_one, messages, threads, broker):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: publish_one(), range(messages)))
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for r in results if r)
+    print(f"{label:<28} {ok / elapsed:>10.0f} msg/s   "
+          f"({ok}/{messages} ok, {broker.connections} connections opened)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    config = RabbitMQConfig(publisher_pool_size=args.threads)
+    quiet = mock.patch("hduce_shared.rabbitmq.publisher.print", create=True)
+
+    # Before: a new publisher (connection + declarations) per event, never closed
+    broker = FakeBroker(rtt=args.rtt_ms / 1000)
+    with mock.patch("pika.BlockingConnection", broker.connection_class()), quiet:
+        run("connection per event",
+            lambda: RabbitMQPublisher(config).publish_appointment_created(EVENT),
+            args.messages, args.threads, broker)
+
+    # After: process-wide pool of persistent connections
+    broker = FakeBroker(rtt=args.rtt_ms / 1000)
+    pool = RabbitMQPublisherPool(config)
+    with mock.patch("pika.BlockingConnection", broker.connection_class()), quiet:
+        run("pooled publisher",
+            lambda: pool.publish_appointment_created(EVENT),
+            args.messages, args.threads, broker)
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
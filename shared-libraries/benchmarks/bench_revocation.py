@@ -0,0 +1,75 @@
+"""
+Benchmark: cost of the JWT revocation check with a large revocation list.
+
+Fills a RevocationList with --revoked random jtis (1M by default) and
+measures:
+
+- is_revoked() for tokens that are not revoked (bloom filter miss, the
+  common case) and for revoked ones (bloom hit + exact map)
+- JWTManager.verify_token on warm (cached) tokens with an empty list vs the
+  full list, i.e. the per-verification overhead the revocation check adds
+
+Usage (from shared-libraries/):
+    python benchmarks/bench_revocation.py --revoked 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hduce_shared.auth.jwt_manager import JWTManager
+from hduce_shared.auth.revocation import RevocationList
+
+SECRET = "benchmark-secret-key"
+
+
+def per_call(fn, items, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(items[i % len(items)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--revoked", type=int, default=1_000_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    revocations = RevocationList(capacity=args.revoked)
+    revoked = [uuid.uuid4().hex for _ in range(args.revoked)]
+    exp = time.time() + 3600
+    start = time.perf_counter()
+    revocations.revoke_many((jti, exp) for jti in revoked)
+    print(f"{'load':<34} {args.revoked} jtis in {time.perf_counter() - start:.1f}s")
+
+    valid = [uuid.uuid4().hex for _ in range(10_000)]
+    hit = per_call(revocations.is_revoked, revoked[:10_000], args.checks)
+    miss = per_call(revocations.is_revoked, valid, args.checks)
+    print(f"{'is_revoked, not revoked':<34} {miss:>8.2f} us/check")
+    print(f"{'is_revoked, revoked':<34} {hit:>8.2f} us/check")
+
+    fresh = [uuid.uuid4().hex for _ in range(100_000)]
+    bloom_hits = revocations.bloom_hits
+    false_positives = sum(revocations.is_revoked(jti) for jti in fresh)
+    print(f"{'bloom false positive rate':<34} {(revocations.bloom_hits - bloom_hits) / len(fresh):>8.4%} "
+          f"(revoked after exact check: {false_positives})")
+    print(f"{'bloom filter size':<34} {revocations.stats()['bloom_bits'] / 8 / 2**20:>8.1f} MiB")
+
+    tokens = [JWTManager(SECRET).create_access_token({"sub": f"paciente{i}@hduce.com"}) for i in range(100)]
+    results = {}
+    for label, revocation_list in (("empty list", RevocationList()), (f"{args.revoked} revoked", revocations)):
+        manager = JWTManager(SECRET, revocations=revocation_list)
+        for token in tokens:
+            manager.verify_token(token)
+        results[label] = per_call(manager.verify_token, tokens, args.checks)
+        print(f"{'verify_token warm, ' + label:<34} {results[label]:>8.2f} us/verification")
+    overhead = results[f"{args.revoked} revoked"] - results["empty list"]
+    print(f"{'revocation overhead':<34} {overhead:>8.2f} us/verification")
+
+
+if __name__ == "__main__":
+    main()
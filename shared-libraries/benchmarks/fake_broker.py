@@ -0,0 +1,76 @@
+"""
+Broker stand-in for RabbitMQ benchmarks.
+
+Mimics the parts of pika.BlockingConnection used by hduce_shared and charges a
+simulated network round trip (RTT) for every synchronous AMQP method, so the
+numbers reflect round-trip counts rather than a real broker's throughput.
+"""
+import threading
+import time
+
+
+class FakeChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+
+    def _round_trip(self):
+        time.sleep(self.broker.rtt)
+
+    def exchange_declare(self, **kwargs):
+        self._round_trip()
+
+    def queue_declare(self, **kwargs):
+        self._round_trip()
+
+    def queue_bind(self, **kwargs):
+        self._round_trip()
+
+    def basic_qos(self, **kwargs):
+        self._round_trip()
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        # basic.publish is asynchronous in AMQP: no round trip
+        with self.broker.lock:
+            self.broker.published += 1
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeBlockingConnection:
+    """Drop-in for pika.BlockingConnection bound to a FakeBroker"""
+
+    broker = None
+
+    def __init__(self, parameters=None):
+        # TCP handshake + connection.start/tune/open
+        time.sleep(self.broker.rtt * 3)
+        with self.broker.lock:
+            self.broker.connections += 1
+        self.is_open = True
+
+    @property
+    def is_closed(self):
+        return not self.is_open
+
+    def channel(self):
+        time.sleep(self.broker.rtt)
+        return FakeChannel(self.broker)
+
+    def process_data_events(self, time_limit=0):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeBroker:
+    def __init__(self, rtt: float = 0.0005):
+        self.rtt = rtt
+        self.lock = threading.Lock()
+        self.published = 0
+        self.connections = 0
+
+    def connection_class(self):
+        return type("BoundFakeBlockingConnection", (FakeBlockingConnection,), {"broker": self})
@@ -2,7 +2,31 @@
 Authentication and authorization utilities for HDUCE microservices.
 """
 
-from .jwt_manager import JWTManager, TokenValidationResponse
+from .jwt_manager import JWTManager, TokenValidationResponse, jwt_manager_from_settings
+from .backends import (
+    DEFAULT_BACKEND,
+    InvalidTokenError,
+    JWTBackend,
+    available_backends,
+    get_backend,
+    unverified_header
+)
+from .jwks import (
+    ASYMMETRIC_ALGORITHMS,
+    JWKSKeySet,
+    build_jwks,
+    jwk_to_public_key,
+    public_key_to_jwk
+)
+from .revocation import (
+    JWT_REVOCATION_SYNC_ENABLED,
+    JWT_REVOCATIONS_URL,
+    BloomFilter,
+    RevocationList,
+    RevocationSync,
+    fetch_revocations,
+    revocation_list
+)
 from .models import (
     LoginRequest,
     LoginResponse, 
@@ -13,6 +37,25 @@ from .models import (
 __all__ = [
     "JWTManager",
     "TokenValidationResponse",
+    "jwt_manager_from_settings",
+    "JWTBackend",
+    "InvalidTokenError",
+    "DEFAULT_BACKEND",
+    "available_backends",
+    "get_backend",
+    "unverified_header",
+    "ASYMMETRIC_ALGORITHMS",
+    "JWKSKeySet",
+    "build_jwks",
+    "jwk_to_public_key",
+    "public_key_to_jwk",
+    "JWT_REVOCATION_SYNC_ENABLED",
+    "JWT_REVOCATIONS_URL",
+    "BloomFilter",
+    "RevocationList",
+    "RevocationSync",
+    "fetch_revocations",
+    "revocation_list",
     "LoginRequest",
     "LoginResponse",
     "RegisterRequest", 
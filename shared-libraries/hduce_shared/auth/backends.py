@@ -0,0 +1,240 @@
+"""
+JWT backends for JWTManager
+
+Three interchangeable implementations of the same encode/decode contract:
+
+- ``hmac``:  built-in HS256/HS384/HS512 using only hmac, hashlib and base64
+- ``pyjwt``: PyJWT (optional dependency)
+- ``jose``:  python-jose (optional dependency)
+
+A backend accepts a token only if its header ``alg`` is one of the allowed
+algorithms, the signature matches, and the registered claims are valid:
+``exp`` in the past, ``nbf`` in the future, non-numeric ``exp``/``nbf``/``iat``,
+any ``aud`` (no audience is configured) and non-string ``sub``/``jti`` are
+rejected. Every failure raises ``InvalidTokenError``. The conformance suite
+in tests/test_jwt_backends.py checks all backends against the same cases.
+
+The default backend is chosen at import time: the fastest one that is
+installed and supports the algorithm (``JWT_BACKEND`` env var overrides it).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+from calendar import timegm
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    from jose import jwt as jose_jwt, JWTError as JoseError
+    HAS_JOSE = True
+except ImportError:
+    HAS_JOSE = False
+    jose_jwt = None
+    JoseError = None
+
+try:
+    import jwt as pyjwt
+    HAS_PYJWT = hasattr(pyjwt, "PyJWTError")  # not jose's or another "jwt" module
+except ImportError:
+    HAS_PYJWT = False
+    pyjwt = None
+
+
+class InvalidTokenError(Exception):
+    """Token rejected: malformed, bad signature, wrong algorithm or invalid claims"""
+
+
+class JWTBackend:
+    """Encode/decode contract shared by every backend"""
+
+    name = "base"
+    algorithms: tuple = ()
+
+    def supports(self, algorithm: str) -> bool:
+        return algorithm in self.algorithms
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(segment: str) -> bytes:
+    segment = segment.encode("ascii") if isinstance(segment, str) else segment
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def unverified_header(token: str) -> Dict[str, Any]:
+    """JOSE header of a token *without* checking the signature (alg/kid lookup only)"""
+    try:
+        header = json.loads(_b64decode(token.split(".", 1)[0]))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise InvalidTokenError(f"Malformed token header: {e}")
+    if not isinstance(header, dict):
+        raise InvalidTokenError("Malformed token header")
+    return header
+
+
+def _numeric_date(claims: Dict[str, Any], claim: str) -> Optional[int]:
+    if claim not in claims:
+        return None
+    value = claims[claim]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidTokenError(f"{claim} claim must be a number")
+    return int(value)
+
+
+def validate_claims(claims: Dict[str, Any]) -> None:
+    """Registered-claim rules shared by every backend (raises InvalidTokenError)
+
+    The libraries differ at the edges (numeric strings as dates, ``iat`` in
+    the future, ``exp`` equal to now), so every backend runs this after its
+    own decode to keep accept/reject behaviour identical.
+    """
+    now = timegm(datetime.utcnow().utctimetuple())
+
+    _numeric_date(claims, "iat")
+    nbf = _numeric_date(claims, "nbf")
+    if nbf is not None and nbf > now:
+        raise InvalidTokenError("The token is not yet valid (nbf)")
+    exp = _numeric_date(claims, "exp")
+    if exp is not None and exp <= now:
+        raise InvalidTokenError("Signature has expired")
+
+    if "aud" in claims:
+        raise InvalidTokenError("Invalid audience")
+    for claim in ("sub", "jti"):
+        if claim in claims and not isinstance(claims[claim], str):
+            raise InvalidTokenError(f"{claim} claim must be a string")
+
+
+class HMACBackend(JWTBackend):
+    """Built-in HS256/384/512 implementation (no third-party dependency)"""
+
+    name = "hmac"
+    _digests = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+    algorithms = tuple(_digests)
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        payload = dict(claims)
+        for claim in ("exp", "iat", "nbf"):
+            if isinstance(payload.get(claim), datetime):
+                payload[claim] = timegm(payload[claim].utctimetuple())
+        header = {"alg": algorithm, "typ": "JWT", **(headers or {})}
+        signing_input = (
+            _b64encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+            + "."
+            + _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        )
+        signature = hmac.new(key.encode("utf-8"), signing_input.encode("ascii"), self._digests[algorithm])
+        return signing_input + "." + _b64encode(signature.digest())
+
+    def decode(self, token: str, key: str, algorithms: List[str]) -> Dict[str, Any]:
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header_segment, payload_segment = signing_input.split(".")
+            # Segmentos no ASCII: UnicodeEncodeError (ValueError) -> token mal formado
+            signing_bytes = signing_input.encode("ascii")
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(signature)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise InvalidTokenError(f"Malformed token: {e}")
+        if not isinstance(header, dict):
+            raise InvalidTokenError("Malformed token header")
+
+        algorithm = header.get("alg")
+        if algorithm not in algorithms or algorithm not in self._digests:
+            raise InvalidTokenError("The specified alg value is not allowed")
+
+        expected = hmac.new(key.encode("utf-8"), signing_bytes, self._digests[algorithm]).digest()
+        if not hmac.compare_digest(expected, signature):
+            raise InvalidTokenError("Signature verification failed")
+
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except (ValueError, TypeError) as e:
+            raise InvalidTokenError(f"Malformed token payload: {e}")
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Malformed token payload")
+
+        validate_claims(claims)
+        return claims
+
+
+class PyJWTBackend(JWTBackend):
+    """PyJWT implementation"""
+
+    name = "pyjwt"
+    algorithms = ("HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA")
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        return pyjwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        try:
+            # iat en el futuro (relojes desfasados entre servicios) no invalida el token
+            claims = pyjwt.decode(token, key, algorithms=algorithms, options={"verify_iat": False})
+        except pyjwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+        validate_claims(claims)
+        return claims
+
+
+class JoseBackend(JWTBackend):
+    """python-jose implementation"""
+
+    name = "jose"
+    algorithms = ("HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        try:
+            claims = jose_jwt.decode(token, key, algorithms=algorithms)
+        except JoseError as e:
+            raise InvalidTokenError(str(e))
+        validate_claims(claims)
+        return claims
+
+
+# Más rápido primero (ver benchmarks/bench_jwt_cache.py --backend)
+BACKEND_PREFERENCE = ("hmac", "pyjwt", "jose")
+
+_BACKENDS: Dict[str, JWTBackend] = {"hmac": HMACBackend()}
+if HAS_PYJWT:
+    _BACKENDS["pyjwt"] = PyJWTBackend()
+if HAS_JOSE:
+    _BACKENDS["jose"] = JoseBackend()
+
+
+def available_backends() -> List[str]:
+    """Names of the installed backends, fastest first"""
+    return [name for name in BACKEND_PREFERENCE if name in _BACKENDS]
+
+
+def get_backend(backend: Union[str, JWTBackend, None] = None, algorithm: str = "HS256") -> JWTBackend:
+    """Backend by name/instance, or the fastest installed one supporting ``algorithm``"""
+    if isinstance(backend, JWTBackend):
+        return backend
+    name = backend or os.getenv("JWT_BACKEND")
+    if name:
+        if name not in _BACKENDS:
+            raise ValueError(f"JWT backend '{name}' is not available (installed: {available_backends()})")
+        if not _BACKENDS[name].supports(algorithm):
+            raise ValueError(f"JWT backend '{name}' does not support {algorithm}")
+        return _BACKENDS[name]
+    for name in available_backends():
+        if _BACKENDS[name].supports(algorithm):
+            return _BACKENDS[name]
+    raise ValueError(f"No installed JWT backend supports {algorithm}")
+
+
+DEFAULT_BACKEND = get_backend()
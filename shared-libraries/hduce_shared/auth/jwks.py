@@ -0,0 +1,198 @@
+"""
+JWKS (JSON Web Key Set) support for HDuce services
+
+auth-service signs access tokens with a private key (RS256 or EdDSA) and
+publishes the public keys at ``/auth/.well-known/jwks.json``. Services only
+need that public set to verify tokens: no shared secret, and no call to
+auth-service per request.
+
+``JWKSKeySet`` keeps the published keys in memory, indexed by ``kid``:
+
+- a background thread refetches the set every ``refresh_interval`` seconds
+  (new keys appear before auth-service starts signing with them; a retired
+  key disappears once an operator deletes it from auth-service, which is
+  manual, see auth-service/signing_keys.py);
+- a token with an unknown ``kid`` triggers an immediate refetch, at most
+  once every ``min_refetch_interval`` seconds, so a rotation is picked up
+  on the first token signed with the new key and a flood of forged kids
+  cannot turn into a flood of requests to auth-service;
+- if auth-service is unreachable the last known keys stay in use.
+
+The refetch is a blocking HTTP request: async code must not run it on the
+event loop. ``refetch_due(kid)`` tells whether ``get_key(kid)`` would fetch,
+and JWTManager.decode_token_async then verifies in a worker thread.
+
+``get_key(kid)`` returns ``(alg, public_key)``; JWTManager(jwks=...) uses it
+to verify asymmetric tokens (see jwt_manager.py).
+"""
+import json
+import logging
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .backends import _b64decode, _b64encode
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+    ed25519 = None
+    rsa = None
+
+logger = logging.getLogger(__name__)
+
+# Algoritmos de firma asimétrica que se verifican con la JWKS
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+
+def _int_to_b64(value: int) -> str:
+    return _b64encode(value.to_bytes((value.bit_length() + 7) // 8 or 1, "big"))
+
+
+def _b64_to_int(value: str) -> int:
+    return int.from_bytes(_b64decode(value), "big")
+
+
+def public_key_to_jwk(public_key, kid: str, alg: str) -> Dict[str, Any]:
+    """Public JWK (RFC 7517/8037) of an RSA or Ed25519 public key"""
+    if not HAS_CRYPTOGRAPHY:
+        raise RuntimeError("cryptography is required for JWKS support")
+    if isinstance(public_key, rsa.RSAPublicKey):
+        numbers = public_key.public_numbers()
+        return {"kty": "RSA", "kid": kid, "alg": alg, "use": "sig",
+                "n": _int_to_b64(numbers.n), "e": _int_to_b64(numbers.e)}
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        from cryptography.hazmat.primitives import serialization
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "kid": kid, "alg": alg, "use": "sig", "x": _b64encode(raw)}
+    raise ValueError(f"Unsupported key type: {type(public_key).__name__}")
+
+
+def jwk_to_public_key(jwk: Dict[str, Any]):
+    """Public key object of an RSA or Ed25519 JWK (ValueError if unsupported)"""
+    if not HAS_CRYPTOGRAPHY:
+        raise RuntimeError("cryptography is required for JWKS support")
+    kty = jwk.get("kty")
+    if kty == "RSA":
+        return rsa.RSAPublicNumbers(_b64_to_int(jwk["e"]), _b64_to_int(jwk["n"])).public_key()
+    if kty == "OKP" and jwk.get("crv") == "Ed25519":
+        return ed25519.Ed25519PublicKey.from_public_bytes(_b64decode(jwk["x"]))
+    raise ValueError(f"Unsupported JWK: kty={kty} crv={jwk.get('crv')}")
+
+
+def build_jwks(keys: Iterable[Tuple[str, str, Any]]) -> Dict[str, Any]:
+    """JWKS document from (kid, alg, public_key) tuples"""
+    return {"keys": [public_key_to_jwk(public_key, kid, alg) for kid, alg, public_key in keys]}
+
+
+class JWKSKeySet:
+    """Public signing keys of auth-service, fetched from its JWKS endpoint"""
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 300.0,
+        min_refetch_interval: float = 30.0,
+        timeout: float = 5.0
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Tuple[str, Any]] = {}
+        self._fetch_lock = threading.Lock()
+        self._last_fetch: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.unknown_kids = 0
+
+    def _download(self) -> Dict[str, Any]:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def load(self, document: Dict[str, Any]) -> int:
+        """Replace the known keys with the ones in a JWKS document"""
+        keys: Dict[str, Tuple[str, Any]] = {}
+        for jwk in document.get("keys", []):
+            kid, alg = jwk.get("kid"), jwk.get("alg")
+            if not kid or alg not in ASYMMETRIC_ALGORITHMS or jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = (alg, jwk_to_public_key(jwk))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"⚠️ JWK {kid} ignorada: {e}")
+        # Swap atómico: los lectores ven el conjunto viejo o el nuevo
+        self._keys = keys
+        return len(keys)
+
+    def fetch(self) -> bool:
+        """Download the set now; on failure the previous keys are kept"""
+        with self._fetch_lock:
+            self._last_fetch = time.monotonic()
+            self.fetches += 1
+            try:
+                count = self.load(self._download())
+            except Exception as e:
+                self.fetch_errors += 1
+                logger.error(f"❌ No se pudo descargar la JWKS de {self.url}: {e}")
+                return False
+        logger.info(f"✅ JWKS actualizada ({count} claves: {sorted(self._keys)})")
+        return True
+
+    def refetch_due(self, kid: Optional[str]) -> bool:
+        """True if ``get_key(kid)`` would download the set (unknown kid, refetch allowed)"""
+        return (
+            kid is not None
+            and kid not in self._keys
+            and (self._last_fetch is None or time.monotonic() - self._last_fetch >= self.min_refetch_interval)
+        )
+
+    def get_key(self, kid: Optional[str]) -> Optional[Tuple[str, Any]]:
+        """(alg, public_key) for ``kid``; unknown kids trigger a rate-limited refetch"""
+        if kid is None:
+            return None
+        entry = self._keys.get(kid)
+        if entry is not None:
+            return entry
+
+        self.unknown_kids += 1
+        if self._last_fetch is None or time.monotonic() - self._last_fetch >= self.min_refetch_interval:
+            # Posible rotación: auth-service ya firma con una clave nueva
+            self.fetch()
+        return self._keys.get(kid)
+
+    def kids(self):
+        return sorted(self._keys)
+
+    def _run(self) -> None:
+        if not self._keys:
+            self.fetch()
+        while not self._stop.wait(self.refresh_interval):
+            self.fetch()
+
+    def start(self) -> threading.Thread:
+        """First fetch and periodic refresh in a background thread (never blocks startup)"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="JWKS-Refresh", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "kids": self.kids(),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "unknown_kids": self.unknown_kids,
+        }
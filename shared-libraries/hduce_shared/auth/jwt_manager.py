@@ -2,11 +2,20 @@
 JWT Manager configurable para todos los servicios
 Versión instanciable - compatible con auth_utils.py
 """
-from jose import jwt, JWTError
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel
 
+from .backends import DEFAULT_BACKEND, InvalidTokenError, JWTBackend, get_backend, unverified_header
+from .jwks import ASYMMETRIC_ALGORITHMS, JWKSKeySet
+from .revocation import RevocationList, revocation_list
+
 # Definir TokenValidationResponse
 class TokenValidationResponse(BaseModel):
     """Response model for token validation"""
@@ -17,52 +26,140 @@ class TokenValidationResponse(BaseModel):
     expires_at: int
 
 class JWTManager:
-    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+    """Crea y verifica JWT.
+
+    Los claims de tokens ya verificados se guardan en un LRU acotado
+    (``cache_size`` entradas) indexado por el SHA-256 del token, hasta su
+    ``exp``: un token repetido no vuelve a pasar por HMAC + decodificación.
+    ``verify_token`` y ``decode_token`` comparten ese único camino.
+
+    La firma y verificación las hace un backend intercambiable (``hmac``,
+    ``pyjwt`` o ``jose``, ver backends.py); por defecto el más rápido instalado.
+
+    Cada token lleva un ``jti``; los revocados (ver revocation.py) se
+    rechazan aunque estén en caché, con una consulta O(1) al bloom filter.
+
+    Con ``jwks`` (un JWKSKeySet o cualquier objeto con ``get_key(kid)``) los
+    tokens RS256/EdDSA se verifican con la clave pública de su ``kid``, sin
+    secreto compartido (ver jwks.py). Mientras ``secret_key`` siga
+    configurado también se aceptan los tokens HS256 anteriores a la
+    migración; ``secret_key=None`` los rechaza. Desde código async se usa
+    ``decode_token_async``: una ``kid`` desconocida descarga la JWKS y esa
+    petición HTTP no debe bloquear el event loop.
+    """
+
+    def __init__(
+        self,
+        secret_key: Optional[str],
+        algorithm: str = "HS256",
+        cache_size: int = 1024,
+        backend: Union[str, JWTBackend, None] = None,
+        revocations: Optional[RevocationList] = None,
+        jwks: Optional[JWKSKeySet] = None
+    ):
         self.secret_key = secret_key
         self.algorithm = algorithm
+        self.backend = get_backend(backend, algorithm)
+        self.jwks = jwks
+        self._asymmetric_backends: Dict[str, JWTBackend] = {}
+        self.revocations = revocations if revocations is not None else revocation_list
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def create_access_token(self, data: Dict[str, Any], expires_minutes: int = 30) -> str:
         """Create JWT access token with expiration"""
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
         to_encode.update({"exp": expire, "type": "access"})
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        to_encode.setdefault("jti", uuid.uuid4().hex)
+        return self.backend.encode(to_encode, self.secret_key, self.algorithm)
 
-    def decode_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Decode JWT token without validation (for debugging)"""
-        try:
-            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-        except JWTError:
+    def _verified_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a valid, non-revoked token or None"""
+        claims = self._signed_claims(token)
+        if claims is not None and self.revocations.is_revoked(claims.get("jti")):
             return None
+        return claims
+
+    def _signed_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a correctly signed, unexpired token (cached until exp)"""
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._verified.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._verified.move_to_end(key)
+                    self.cache_hits += 1
+                    return entry[0]
+                del self._verified[key]
+            self.cache_misses += 1
 
-    def verify_token(self, token: str) -> TokenValidationResponse:
-        """Verify token and return standardized validation response"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            claims = self._decode(token)
+        except InvalidTokenError:
+            return None
 
-            # Extract user information from payload
-            user_id = payload.get("sub") or payload.get("user_id") or ""
-            username = payload.get("username") or payload.get("preferred_username") or ""
-            email = payload.get("email") or ""
-            expires_at = payload.get("exp") or 0
+        # Sin exp no hay cuándo invalidar la entrada: no se cachea
+        exp = claims.get("exp")
+        if self.cache_size > 0 and isinstance(exp, (int, float)):
+            with self._lock:
+                self._verified[key] = (claims, exp)
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return claims
 
-            return TokenValidationResponse(
-                user_id=str(user_id),
-                username=str(username),
-                email=str(email),
-                is_valid=True,
-                expires_at=int(expires_at)
-            )
+    def _asymmetric_backend(self, algorithm: str) -> JWTBackend:
+        backend = self._asymmetric_backends.get(algorithm)
+        if backend is None:
+            try:
+                backend = get_backend(self.backend if self.backend.supports(algorithm) else None, algorithm)
+            except ValueError as e:
+                raise InvalidTokenError(str(e))
+            self._asymmetric_backends[algorithm] = backend
+        return backend
 
-        except jwt.ExpiredSignatureError:
-            return TokenValidationResponse(
-                user_id="",
-                username="",
-                email="",
-                is_valid=False,
-                expires_at=0
-            )
-        except JWTError:
+    def _decode(self, token: str) -> Dict[str, Any]:
+        """Signature + claims check: JWKS key for RS*/EdDSA tokens, secret_key for HMAC ones"""
+        if self.jwks is not None:
+            header = unverified_header(token)
+            algorithm = header.get("alg")
+            if algorithm in ASYMMETRIC_ALGORITHMS:
+                entry = self.jwks.get_key(header.get("kid"))
+                # La clave fija el algoritmo: un token no puede elegir otro para la misma kid
+                if entry is None or entry[0] != algorithm:
+                    raise InvalidTokenError("Unknown signing key")
+                return self._asymmetric_backend(algorithm).decode(token, entry[1], [algorithm])
+
+        if self.secret_key is None:
+            raise InvalidTokenError("HMAC-signed tokens are not accepted")
+        return self.backend.decode(token, self.secret_key, [self.algorithm])
+
+    def decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Decode and verify JWT token, None if invalid or expired"""
+        claims = self._verified_claims(token)
+        return dict(claims) if claims is not None else None
+
+    async def decode_token_async(self, token: str) -> Optional[Dict[str, Any]]:
+        """decode_token for async callers: a JWKS refetch (unknown kid) runs in a worker thread"""
+        refetch_due = getattr(self.jwks, "refetch_due", None)
+        if refetch_due is not None:
+            try:
+                kid = unverified_header(token).get("kid")
+            except InvalidTokenError:
+                return None
+            if refetch_due(kid):
+                return await asyncio.to_thread(self.decode_token, token)
+        return self.decode_token(token)
+
+    def verify_token(self, token: str) -> TokenValidationResponse:
+        """Verify token and return standardized validation response"""
+        payload = self._verified_claims(token)
+        if payload is None:
             return TokenValidationResponse(
                 user_id="",
                 username="",
@@ -71,14 +168,43 @@ class JWTManager:
                 expires_at=0
             )
 
+        # Extract user information from payload
+        user_id = payload.get("sub") or payload.get("user_id") or ""
+        username = payload.get("username") or payload.get("preferred_username") or ""
+        email = payload.get("email") or ""
+        expires_at = payload.get("exp") or 0
+
+        return TokenValidationResponse(
+            user_id=str(user_id),
+            username=str(username),
+            email=str(email),
+            is_valid=True,
+            expires_at=int(expires_at)
+        )
+
+    def revoke_token(self, token: str) -> Optional[str]:
+        """Revoke a token in this process' revocation list; returns its jti
+
+        Other services learn about it through a TOKEN_REVOKED event
+        (RabbitMQPublisherPool.publish_token_revoked).
+        """
+        claims = self._signed_claims(token)
+        if claims is None or claims.get("jti") is None:
+            return None
+        self.revocations.revoke(claims["jti"], claims.get("exp"))
+        return claims["jti"]
+
+    def clear_cache(self) -> None:
+        """Forget every verified token"""
+        with self._lock:
+            self._verified.clear()
+
 # Funciones estáticas (para compatibilidad con el código existente)
 def decode_token(token: str, secret_key: str) -> Optional[Dict]:
     """Static method to decode JWT token"""
     try:
-        return jwt.decode(token, secret_key, algorithms=["HS256"])
-    except jwt.ExpiredSignatureError:
-        return None
-    except JWTError:
+        return DEFAULT_BACKEND.decode(token, secret_key, ["HS256"])
+    except InvalidTokenError:
         return None
 
 def create_token(data: Dict, secret_key: str, expires_minutes: int = 30) -> str:
@@ -88,5 +214,32 @@ def create_token(data: Dict, secret_key: str, expires_minutes: int = 30) -> str:
 
     to_encode = data.copy()
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+
+    return DEFAULT_BACKEND.encode(to_encode, secret_key, "HS256")
+
+
+def jwt_manager_from_settings(jwt_settings=None, cache_size: int = 1024) -> JWTManager:
+    """JWTManager de un servicio consumidor según JWTSettings
+
+    Con ``jwks_url`` verifica los tokens asimétricos de auth-service (la
+    JWKS se refresca en segundo plano tras ``jwt_manager.jwks.start()``);
+    ``accept_hs256=False`` deja de aceptar tokens firmados con el secreto.
+    """
+    if jwt_settings is None:
+        from ..config.settings import settings
+        jwt_settings = settings.jwt
 
-    return jwt.encode(to_encode, secret_key, algorithm="HS256")
\ No newline at end of file
+    jwks = None
+    if jwt_settings.jwks_url:
+        jwks = JWKSKeySet(
+            jwt_settings.jwks_url,
+            refresh_interval=jwt_settings.jwks_refresh_seconds,
+            min_refetch_interval=jwt_settings.jwks_min_refetch_seconds
+        )
+    return JWTManager(
+        secret_key=jwt_settings.jwt_secret_key if jwt_settings.accept_hs256 else None,
+        algorithm=jwt_settings.jwt_algorithm,
+        cache_size=cache_size,
+        jwks=jwks
+    )
\ No newline at end of file
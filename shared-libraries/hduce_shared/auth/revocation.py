@@ -0,0 +1,253 @@
+"""
+JWT revocation list for HDuce services
+
+Revoked token ids (``jti``) live in a bloom filter backed by an exact
+``jti -> exp`` map. ``is_revoked`` checks the bloom filter first, so the
+common case (token not revoked) costs a cached hash and three bit tests. Only
+bloom hits are confirmed against the exact map, which rules out false
+positives. Entries are dropped once the token would have expired anyway,
+and the bloom filter is rebuilt from the remaining ones.
+
+Revocations travel between services as TOKEN_REVOKED events on the
+existing RabbitMQ exchange (``revocation_routing_key``). Every replica
+binds its own exclusive, auto-delete queue, so each one receives every
+event. ``RevocationSync`` runs that consumer in a background thread. An
+optional ``bootstrap`` callable loads the revocations made before the
+replica started: ``preload()`` runs it during startup, before the service
+accepts traffic, and the consumer runs it again after every (re)connect to
+cover the events published while it was not bound. Services other than
+auth-service bootstrap with ``fetch_revocations`` (GET /auth/revocations).
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Servicios que verifican JWT arrancan RevocationSync salvo que se desactive
+JWT_REVOCATION_SYNC_ENABLED = os.getenv("JWT_REVOCATION_SYNC_ENABLED", "true").lower() == "true"
+# Revocaciones vigentes publicadas por auth-service (precarga al arrancar)
+JWT_REVOCATIONS_URL = os.getenv("JWT_REVOCATIONS_URL", "http://auth-service:8000/auth/revocations")
+# Tiempo máximo de reintentos de la precarga antes de abortar el arranque
+JWT_REVOCATION_PRELOAD_TIMEOUT = float(os.getenv("JWT_REVOCATION_PRELOAD_TIMEOUT", "60"))
+
+
+def fetch_revocations(url: str = JWT_REVOCATIONS_URL, timeout: float = 5.0) -> List[Tuple[str, Optional[float]]]:
+    """Still-valid revocations ``(jti, exp)`` from auth-service (RevocationSync bootstrap)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        document = json.loads(response.read())
+    return [(entry["jti"], entry.get("exp")) for entry in document.get("revocations", [])]
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (k positions by double hashing)
+
+    Positions come from Python's own str hash (SipHash, salted per process):
+    the filter is never shared between processes, and the hash is cached on
+    the string, so a check is a few integer operations. Few hash functions
+    (``hashes``) plus more bits per item keep the error rate at the same level
+    with fewer bit tests per check.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001, hashes: int = 3):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.hashes = hashes
+        bits_per_item = -hashes / math.log(1 - error_rate ** (1 / hashes))
+        self.size = max(64, int(self.capacity * bits_per_item))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """Revoked jtis: bloom filter fast path + exact map with expiry"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._exact: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.bloom_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def revoke(self, jti: str, exp: Optional[float] = None) -> bool:
+        """Revoke a token id until ``exp`` (None = keep until cleared); False if already revoked"""
+        with self._lock:
+            if jti in self._exact:
+                return False
+            self._exact[jti] = exp
+            if len(self._exact) > self._bloom.capacity:
+                # Lleno: más falsos positivos; reconstruir al doble de capacidad
+                self._rebuild(self._bloom.capacity * 2)
+            else:
+                self._bloom.add(jti)
+            return True
+
+    def revoke_many(self, entries: Iterable[Tuple[str, Optional[float]]]) -> int:
+        return sum(self.revoke(jti, exp) for jti, exp in entries)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """O(1): bloom miss -> not revoked; bloom hit -> confirmed on the exact map"""
+        if jti is None or not self._exact:
+            return False
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.bloom_hits += 1
+        return jti in self._exact
+
+    def _rebuild(self, capacity: int) -> None:
+        bloom = BloomFilter(max(capacity, self.capacity), self.error_rate)
+        for jti in self._exact:
+            bloom.add(jti)
+        # Swap atómico: los lectores ven el filtro viejo o el nuevo, ambos completos
+        self._bloom = bloom
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop revocations of already-expired tokens and rebuild the bloom filter"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [jti for jti, exp in self._exact.items() if exp is not None and exp <= now]
+            if not expired:
+                return 0
+            for jti in expired:
+                del self._exact[jti]
+            self._rebuild(self._bloom.capacity)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exact.clear()
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self._exact),
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+        }
+
+
+# Lista compartida por los JWTManager del proceso
+revocation_list = RevocationList()
+
+
+class RevocationSync:
+    """Feeds a RevocationList from TOKEN_REVOKED events in a background thread"""
+
+    def __init__(
+        self,
+        revocations: Optional[RevocationList] = None,
+        config=None,
+        bootstrap: Optional[Callable[[], Iterable[Tuple[str, Optional[float]]]]] = None,
+        prune_interval: float = 60.0,
+        reconnect_delay: float = 5.0
+    ):
+        from ..rabbitmq import RabbitMQConfig, ReplicaSubscriber
+
+        self.revocations = revocations if revocations is not None else revocation_list
+        self.config = config or RabbitMQConfig.from_env()
+        self.bootstrap = bootstrap
+        self.prune_interval = prune_interval
+        self.reconnect_delay = reconnect_delay
+        self.received = 0
+        self.bootstrapped = False
+        self._loaded = False
+        self._last_bootstrap = self._last_prune = time.monotonic()
+        self.subscriber = ReplicaSubscriber(
+            self.config.revocation_routing_key,
+            self.handle,
+            on_connect=self._on_connect,
+            on_idle=self._on_idle,
+            config=self.config,
+            name="JWT-Revocation-Sync",
+            reconnect_delay=reconnect_delay
+        )
+
+    def handle(self, message: Dict[str, Any]) -> None:
+        """Apply one TOKEN_REVOKED event"""
+        from ..rabbitmq import TOKEN_REVOKED, TokenRevokedData
+
+        if message.get("event_type") != TOKEN_REVOKED:
+            return
+        data = TokenRevokedData.from_message(message)
+        self.revocations.revoke(data.jti, data.exp)
+        self.received += 1
+
+    def _load_bootstrap(self) -> bool:
+        if self.bootstrap is None:
+            return True
+        try:
+            added = self.revocations.revoke_many(self.bootstrap())
+        except Exception as e:
+            logger.error(f"❌ No se pudo precargar la lista de revocación: {e}")
+            return False
+        self.bootstrapped = True
+        logger.info(f"✅ Lista de revocación precargada ({added} tokens)")
+        return True
+
+    def preload(self, timeout: float = JWT_REVOCATION_PRELOAD_TIMEOUT) -> None:
+        """Run the bootstrap before serving, retrying for up to ``timeout`` seconds
+
+        Raises RuntimeError if it never succeeds: a replica that starts with an
+        empty list would accept every token revoked before it started.
+        """
+        deadline = time.monotonic() + timeout
+        while not self._load_bootstrap():
+            if time.monotonic() + self.reconnect_delay > deadline:
+                raise RuntimeError("JWT revocation list could not be preloaded")
+            time.sleep(self.reconnect_delay)
+
+    def _on_connect(self) -> None:
+        # Revocaciones anteriores a la conexión (la cola solo recibe las nuevas)
+        self._loaded = self._load_bootstrap()
+        self._last_bootstrap = self._last_prune = time.monotonic()
+
+    def _on_idle(self) -> None:
+        if not self._loaded and time.monotonic() - self._last_bootstrap >= self.reconnect_delay:
+            self._loaded = self._load_bootstrap()
+            self._last_bootstrap = time.monotonic()
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self.revocations.prune()
+            self._last_prune = time.monotonic()
+
+    def start(self) -> threading.Thread:
+        return self.subscriber.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.subscriber.stop(timeout)
@@ -45,6 +45,12 @@ class JWTSettings(BaseSettings):
     jwt_secret_key: str = "your-super-secret-jwt-key-change-this-in-production"
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
+    # Claves públicas de auth-service (RS256/EdDSA); vacío = solo HS256
+    jwks_url: str = "http://auth-service:8000/auth/.well-known/jwks.json"
+    jwks_refresh_seconds: float = 300.0
+    jwks_min_refetch_seconds: float = 30.0
+    # Aceptar tokens HS256 firmados con jwt_secret_key (desactivar tras migrar)
+    accept_hs256: bool = True
     
     class Config:
         extra = "ignore"
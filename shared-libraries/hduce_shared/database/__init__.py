@@ -8,6 +8,11 @@ from .postgres import (
     DatabaseManager,
     get_db_session,
     get_db_engine,
+    get_async_db_session,
+    get_async_db_engine,
+    async_database_url,
+    pool_limits,
+    HAS_ASYNC_DATABASE,
     create_all_tables,
     TimestampMixin,
     SoftDeleteMixin
@@ -87,6 +92,11 @@ __all__ = [
     "DatabaseManager",
     "get_db_session",
     "get_db_engine",
+    "get_async_db_session",
+    "get_async_db_engine",
+    "async_database_url",
+    "pool_limits",
+    "HAS_ASYNC_DATABASE",
     "create_all_tables",
     "TimestampMixin",
     "SoftDeleteMixin",
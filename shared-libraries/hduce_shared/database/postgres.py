@@ -2,11 +2,38 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Optional, Dict
-from contextlib import contextmanager
+from typing import Optional, Dict, Tuple
+from contextlib import asynccontextmanager, contextmanager
 
 from ..config.settings import settings
 
+# Driver asyncio para get_async_engine (opcional: sin él solo hay sesiones síncronas)
+ASYNC_DB_DRIVER = os.getenv("ASYNC_DB_DRIVER", "asyncpg")
+
+try:
+    import greenlet  # noqa: F401  (SQLAlchemy asyncio lo necesita)
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    __import__(ASYNC_DB_DRIVER)
+    HAS_ASYNC_DATABASE = True
+except ImportError:
+    AsyncSession = None
+    async_sessionmaker = None
+    create_async_engine = None
+    HAS_ASYNC_DATABASE = False
+
+# Conexiones por servicio y proceso (pool_size + max_overflow). Si está el
+# driver asyncio, el servicio usa el motor síncrono y el asíncrono a la vez y
+# cada uno recibe la mitad: una réplica no abre el doble de conexiones.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+
+def pool_limits() -> Tuple[int, int]:
+    """(pool_size, max_overflow) de cada motor de un servicio (ver DB_POOL_SIZE)"""
+    if HAS_ASYNC_DATABASE:
+        return max(1, DB_POOL_SIZE // 2), DB_MAX_OVERFLOW // 2
+    return DB_POOL_SIZE, DB_MAX_OVERFLOW
+
 Base = declarative_base()
 
 class DatabaseManager:
@@ -14,22 +41,22 @@ class DatabaseManager:
     
     _engines: Dict[str, any] = {}
     _sessions: Dict[str, any] = {}
+    _async_engines: Dict[str, any] = {}
+    _async_sessions: Dict[str, any] = {}
     
     @classmethod
-    def get_engine(cls, service_name: str):
-        """Get or create SQLAlchemy engine for specific service"""
-        if service_name not in cls._engines:
-            # Configuración específica por servicio
-            db_config = {
-                "auth": {
-                    "database": settings.database.auth_db,
-                    "schema": "public"
-                },
-                "users": {
-                    "database": settings.database.user_db,
-                    "schema": "public"
-                },
-                "appointments": {
+    def _database_config(cls, service_name: str) -> Dict[str, str]:
+        """Base de datos y schema de cada servicio (mismo mapa para motores sync y async)"""
+        db_config = {
+            "auth": {
+                "database": settings.database.auth_db,
+                "schema": "public"
+            },
+            "users": {
+                "database": settings.database.user_db,
+                "schema": "public"
+            },
+            "appointments": {
                 "database": settings.database.appointment_db,
                 "schema": "public"
             },
@@ -38,44 +65,77 @@ class DatabaseManager:
                 "schema": "public"
             },
             "medical": {
-                    "database": settings.database.appointment_db,
-                    "schema": "public"
-                },
-                "medical": {
-                    "database": settings.database.medical_db,
-                    "schema": "public"
-                }
+                "database": settings.database.medical_db,
+                "schema": "public"
             }
-            
-            config = db_config.get(service_name, db_config["auth"])
-            
-            connection_string = (
-                f"postgresql://{settings.database.postgres_user}:"
-                f"{settings.database.postgres_password}@"
-                f"{settings.database.postgres_host}:{settings.database.postgres_port}/"
-                f"{config['database']}"
-            )
-            
+        }
+        return db_config.get(service_name, db_config["auth"])
+    
+    @classmethod
+    def _connection_string(cls, service_name: str, driver: str = "postgresql") -> str:
+        config = cls._database_config(service_name)
+        return (
+            f"{driver}://{settings.database.postgres_user}:"
+            f"{settings.database.postgres_password}@"
+            f"{settings.database.postgres_host}:{settings.database.postgres_port}/"
+            f"{config['database']}"
+        )
+    
+    @classmethod
+    def get_engine(cls, service_name: str):
+        """Get or create SQLAlchemy engine for specific service"""
+        if service_name not in cls._engines:
+            pool_size, max_overflow = pool_limits()
             cls._engines[service_name] = create_engine(
-                connection_string,
+                cls._connection_string(service_name),
                 pool_pre_ping=True,
-                pool_size=10,
-                max_overflow=20,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
                 echo=False  # Cambiar a True para debugging
             )
             
             # Configurar schema si es diferente de public
-            if config["schema"] != "public":
+            schema = cls._database_config(service_name)["schema"]
+            if schema != "public":
                 from sqlalchemy.event import listen
-                from sqlalchemy.pool import Pool
                 
                 def set_schema(dbapi_con, connection_record):
-                    dbapi_con.cursor().execute(f"SET search_path TO {config['schema']}")
+                    dbapi_con.cursor().execute(f"SET search_path TO {schema}")
                 
                 listen(cls._engines[service_name], 'connect', set_schema)
         
         return cls._engines[service_name]
     
+    @classmethod
+    def get_async_engine(cls, service_name: str):
+        """Get or create the asyncio engine (asyncpg) for a service.
+
+        Las consultas se esperan con await en lugar de bloquear el event
+        loop, así un worker atiende varias peticiones con la BD a la vez.
+        """
+        if service_name not in cls._async_engines:
+            if not HAS_ASYNC_DATABASE:
+                raise RuntimeError(
+                    f"Async database support needs the {ASYNC_DB_DRIVER} driver and greenlet "
+                    f"(pip install {ASYNC_DB_DRIVER} greenlet)"
+                )
+            schema = cls._database_config(service_name)["schema"]
+            connect_args = {}
+            if schema != "public":
+                connect_args["server_settings"] = {"search_path": schema}
+            
+            pool_size, max_overflow = pool_limits()
+            cls._async_engines[service_name] = create_async_engine(
+                cls._connection_string(service_name, f"postgresql+{ASYNC_DB_DRIVER}"),
+                pool_pre_ping=True,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                connect_args=connect_args,
+                echo=False
+            )
+        
+        return cls._async_engines[service_name]
+    
     @classmethod
     @contextmanager
     def get_session(cls, service_name: str):
@@ -91,6 +151,34 @@ class DatabaseManager:
             raise
         finally:
             db.close()
+    
+    @classmethod
+    @asynccontextmanager
+    async def get_async_session(cls, service_name: str):
+        """AsyncSession with the same commit/rollback semantics as get_session"""
+        if service_name not in cls._async_sessions:
+            # expire_on_commit=False: tras commit los atributos siguen cargados
+            # (en asyncio no se puede recargar de forma implícita al leerlos)
+            cls._async_sessions[service_name] = async_sessionmaker(
+                cls.get_async_engine(service_name),
+                autoflush=False,
+                expire_on_commit=False
+            )
+        async with cls._async_sessions[service_name]() as db:
+            try:
+                yield db
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+    
+    @classmethod
+    async def dispose_async_engines(cls):
+        """Cerrar los pools asyncio (al apagar el servicio, en su event loop)"""
+        for engine in cls._async_engines.values():
+            await engine.dispose()
+        cls._async_engines.clear()
+        cls._async_sessions.clear()
 
 # Funciones de conveniencia
 def get_db_session(service_name: str):
@@ -101,6 +189,21 @@ def get_db_engine(service_name: str):
     """Convenience function to get database engine"""
     return DatabaseManager.get_engine(service_name)
 
+def get_async_db_session(service_name: str):
+    """Convenience function to get an async database session context manager"""
+    return DatabaseManager.get_async_session(service_name)
+
+def get_async_db_engine(service_name: str):
+    """Convenience function to get the asyncio database engine"""
+    return DatabaseManager.get_async_engine(service_name)
+
+def async_database_url(url: str, driver: str = ASYNC_DB_DRIVER) -> str:
+    """postgresql://... (o postgresql+psycopg2://...) -> postgresql+asyncpg://..."""
+    scheme, sep, rest = url.partition("://")
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+{driver}{sep}{rest}"
+    return url
+
 def create_all_tables(service_name: str):
     """Create all tables for a service"""
     engine = get_db_engine(service_name)
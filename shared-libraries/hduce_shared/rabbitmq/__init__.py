@@ -4,11 +4,76 @@ RabbitMQ module for HDuce shared library
 
 from .config import RabbitMQConfig, DEFAULT_CONFIG
 from .publisher import RabbitMQPublisher
-from .consumer import RabbitMQConsumer
+from .consumer import BatchFailure, PoisonMessage, RabbitMQConsumer
+from .subscriber import ReplicaSubscriber
+from .events import (
+    AGENDA_CHANGED,
+    APPOINTMENT_CREATED,
+    DOCTOR_CHANGED,
+    TOKEN_REVOKED,
+    AgendaChangedData,
+    AppointmentCreatedData,
+    DoctorChangedData,
+    TokenRevokedData,
+    event_version,
+    schema_version
+)
+from .pool import (
+    RabbitMQPublisherPool,
+    PublisherPoolExhausted,
+    get_publisher_pool,
+    close_publisher_pool
+)
+from .confirms import (
+    ConfirmingPublisher,
+    get_confirming_publisher,
+    close_confirming_publisher
+)
+
+# Transporte asyncio opcional (requiere aio-pika)
+try:
+    from .aio import (
+        AsyncRabbitMQPublisher,
+        AsyncRabbitMQConsumer,
+        get_async_publisher,
+        close_async_publisher
+    )
+    HAS_AIO_PIKA = True
+except ImportError:
+    HAS_AIO_PIKA = False
+    AsyncRabbitMQPublisher = None
+    AsyncRabbitMQConsumer = None
+    get_async_publisher = None
+    close_async_publisher = None
 
 __all__ = [
     "RabbitMQConfig",
     "DEFAULT_CONFIG", 
     "RabbitMQPublisher",
-    "RabbitMQConsumer"
+    "RabbitMQConsumer",
+    "BatchFailure",
+    "PoisonMessage",
+    "ReplicaSubscriber",
+    "AGENDA_CHANGED",
+    "APPOINTMENT_CREATED",
+    "DOCTOR_CHANGED",
+    "TOKEN_REVOKED",
+    "AgendaChangedData",
+    "AppointmentCreatedData",
+    "DoctorChangedData",
+    "TokenRevokedData",
+    "event_version",
+    "schema_version",
+    "RabbitMQPublisherPool",
+    "PublisherPoolExhausted",
+    "get_publisher_pool",
+    "close_publisher_pool",
+    "ConfirmingPublisher",
+    "get_confirming_publisher",
+    "close_confirming_publisher",
+    "AsyncRabbitMQPublisher",
+    "AsyncRabbitMQConsumer",
+    "get_async_publisher",
+    "close_async_publisher",
+    "HAS_AIO_PIKA"
 ]
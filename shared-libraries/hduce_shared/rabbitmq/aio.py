@@ -0,0 +1,424 @@
+"""asyncio-native RabbitMQ publisher and consumer for HDuce (requires aio-pika)"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Union
+
+import aio_pika
+
+from .config import RabbitMQConfig
+from .consumer import (
+    ATTEMPTS_HEADER,
+    LAST_ERROR_HEADER,
+    PoisonMessage,
+    batch_failures,
+    ordering_value,
+    retry_headers
+)
+from .publisher import build_event
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5
+
+MessageHandler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+BatchHandler = Callable[[List[Dict[str, Any]]], Union[None, Awaitable[None]]]
+
+
+async def _connect(config: RabbitMQConfig) -> "aio_pika.abc.AbstractRobustConnection":
+    return await aio_pika.connect_robust(
+        host=config.host,
+        port=config.port,
+        login=config.username,
+        password=config.password,
+        virtualhost=config.virtual_host,
+        heartbeat=config.heartbeat
+    )
+
+
+async def _declare_topology(channel, config: RabbitMQConfig):
+    """Declare the appointment exchange and queue (same as the blocking clients)"""
+    exchange = await channel.declare_exchange(
+        config.appointment_exchange,
+        aio_pika.ExchangeType.DIRECT,
+        durable=True
+    )
+    queue = await channel.declare_queue(config.appointment_queue, durable=True)
+    await queue.bind(exchange, routing_key=config.appointment_routing_key)
+    # Mensajes de lotes que agotaron consumer_max_attempts
+    await channel.declare_queue(config.dead_letter_queue, durable=True)
+    return exchange, queue
+
+
+class AsyncRabbitMQPublisher:
+    """RabbitMQ publisher for appointment events running on the event loop.
+
+    Uses a robust (auto-reconnecting) connection and a confirm-mode channel:
+    each publish awaits its broker confirm without blocking the loop, so
+    concurrent requests pipeline their confirms, bounded by confirm_window.
+    """
+
+    def __init__(self, config: RabbitMQConfig = None):
+        self.config = config or RabbitMQConfig.from_env()
+        self.connection = None
+        self.channel = None
+        self.exchange = None
+        self._connect_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(self.config.confirm_window)
+
+    async def connect(self) -> None:
+        """Establish connection to RabbitMQ and declare the topology once"""
+        async with self._connect_lock:
+            if self.exchange is not None and not self.connection.is_closed:
+                return
+            try:
+                self.connection = await _connect(self.config)
+                self.channel = await self.connection.channel(publisher_confirms=True)
+                self.exchange, _ = await _declare_topology(self.channel, self.config)
+                logger.info(f"✅ Async publisher connected to RabbitMQ at {self.config.host}:{self.config.port}")
+            except Exception as e:
+                self.exchange = None
+                logger.error(f"❌ Async publisher failed to connect to RabbitMQ: {e}")
+                raise
+
+    async def publish(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """Publish an event and wait for the broker confirm"""
+        try:
+            if self.exchange is None or self.connection.is_closed:
+                await self.connect()
+
+            message = aio_pika.Message(
+                body=json.dumps(build_event(event_type, data), ensure_ascii=False).encode("utf-8"),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                content_type="application/json",
+                timestamp=datetime.now()
+            )
+            async with self._in_flight:
+                await self.exchange.publish(message, routing_key=self.config.appointment_routing_key)
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to publish {event_type}: {e}")
+            return False
+
+    async def publish_appointment_created(self, appointment_data: Dict[str, Any]) -> bool:
+        """Publish appointment created event"""
+        return await self.publish("APPOINTMENT_CREATED", appointment_data)
+
+    async def close(self) -> None:
+        """Close connection"""
+        if self.connection is not None and not self.connection.is_closed:
+            await self.connection.close()
+            logger.info("✅ Async RabbitMQ publisher connection closed")
+        self.exchange = None
+
+
+class AsyncRabbitMQConsumer:
+    """RabbitMQ consumer for appointment events running on the event loop.
+
+    Up to ``concurrency`` messages are handled at once (prefetch is set to the
+    same value). Coroutine handlers run on the loop; plain functions run in
+    the default executor so blocking DB code does not stall the loop. Each
+    message is acked after its handler succeeds and requeued if it raises.
+
+    With ``ordering_key`` set, messages sharing that value run one at a time,
+    in delivery order. A message waits for its key before it takes one of the
+    ``concurrency`` slots, so a burst for one key does not starve the others.
+    A failed keyed message is retried in place while it holds its key (a
+    requeue would let the next message for that key overtake it) and is
+    dead-lettered after ``consumer_max_attempts``.
+    """
+
+    def __init__(
+        self,
+        config: RabbitMQConfig = None,
+        concurrency: Optional[int] = None,
+        ordering_key: Optional[str] = None
+    ):
+        self.config = config or RabbitMQConfig.from_env()
+        self.concurrency = max(1, concurrency or self.config.consumer_workers)
+        self.ordering_key = ordering_key or self.config.consumer_ordering_key
+        self._key_locks: Dict[Hashable, asyncio.Lock] = {}
+        self._key_refs: Dict[Hashable, int] = defaultdict(int)
+        self.connection = None
+        self.channel = None
+        self.queue = None
+        self.consuming = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def connect(self) -> None:
+        """Establish connection to RabbitMQ"""
+        try:
+            self.connection = await _connect(self.config)
+            # Confirm mode: _republish espera la confirmación antes del ack
+            self.channel = await self.connection.channel(publisher_confirms=True)
+            await self.channel.set_qos(
+                prefetch_count=max(self.concurrency, self.config.consumer_prefetch)
+            )
+            _, self.queue = await _declare_topology(self.channel, self.config)
+            logger.info(
+                f"✅ Async consumer connected to RabbitMQ at {self.config.host}:{self.config.port} "
+                f"(concurrency={self.concurrency})"
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to connect async consumer to RabbitMQ: {e}")
+            raise
+
+    async def _call(self, handler: MessageHandler, payload: Dict[str, Any]) -> None:
+        if asyncio.iscoroutinefunction(handler):
+            await handler(payload)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, handler, payload)
+
+    async def _call_in_slot(self, handler: MessageHandler, payload: Dict[str, Any]) -> None:
+        async with self._slots:
+            await self._call(handler, payload)
+
+    async def _call_keyed(self, handler: MessageHandler, payload: Dict[str, Any]) -> Optional[Exception]:
+        """Run a keyed message until it succeeds or runs out of attempts; returns the last error"""
+        attempts = max(1, self.config.consumer_max_attempts)
+        for attempt in range(1, attempts + 1):
+            try:
+                await self._call_in_slot(handler, payload)
+                return None
+            except PoisonMessage as e:
+                return e
+            except Exception as e:
+                logger.error(f"❌ Error processing message (attempt {attempt}): {e}")
+                error = e
+            if attempt < attempts:
+                # Sin slot durante la pausa: solo espera esta clave
+                await asyncio.sleep(self.config.consumer_retry_delay_ms / 1000)
+        return error
+
+    async def _handle(self, message, handler: MessageHandler) -> None:
+        try:
+            payload = json.loads(message.body.decode("utf-8"))
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Failed to decode JSON: {e}")
+            await message.reject(requeue=False)
+            return
+
+        key = ordering_value(payload, self.ordering_key)
+        if key is None:
+            try:
+                await self._call_in_slot(handler, payload)
+            except Exception as e:
+                logger.error(f"❌ Error processing message: {e}")
+                await message.nack(requeue=True)
+                return
+            await message.ack()
+            return
+
+        # Sin await hasta aquí: las tareas entran en la cola del lock en orden de entrega
+        self._key_refs[key] += 1
+        lock = self._key_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                error = await self._call_keyed(handler, payload)
+                if error is None:
+                    await message.ack()
+                    return
+                try:
+                    await self._republish(message, error, dead_letter=True)
+                except Exception as e:
+                    # Sin confirmación del broker: el original vuelve a la cola tal cual
+                    logger.error(f"❌ Failed to dead-letter a failed message: {e}")
+                    await message.nack(requeue=True)
+                    return
+                await message.ack()
+        finally:
+            self._key_refs[key] -= 1
+            if self._key_refs[key] == 0:
+                del self._key_refs[key]
+                del self._key_locks[key]
+
+    async def start_consuming(self, handler: MessageHandler) -> None:
+        """Consume messages until cancelled, handling up to `concurrency` at once"""
+        if self.connection is None or self.connection.is_closed:
+            await self.connect()
+
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.consuming = True
+        logger.info("🎯 Async consumer started. Waiting for messages...")
+        try:
+            async with self.queue.iterator() as messages:
+                # El prefetch acota las tareas; cada una toma un slot solo para el handler
+                async for message in messages:
+                    task = asyncio.create_task(self._handle(message, handler))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        finally:
+            self.consuming = False
+
+    async def _handle_batch(self, messages: List, handler: BatchHandler) -> None:
+        payloads, decoded = [], []
+        for message in messages:
+            try:
+                payloads.append(json.loads(message.body.decode("utf-8")))
+                decoded.append(message)
+            except json.JSONDecodeError as e:
+                logger.error(f"❌ Failed to decode JSON: {e}")
+                await message.reject(requeue=False)
+        if not decoded:
+            return
+
+        try:
+            await self._call(handler, payloads)
+            failures = {}
+        except Exception as e:
+            failures = batch_failures(e, len(payloads))
+            logger.error(f"❌ {len(failures)} of {len(payloads)} messages in the batch failed: {e}")
+
+        if not failures:
+            # One ack for the whole batch: covers every delivery up to the last
+            await decoded[-1].ack(multiple=True)
+            return
+        for index, message in enumerate(decoded):
+            if index in failures:
+                try:
+                    await self._republish(message, failures[index])
+                except Exception as e:
+                    # Sin confirmación del broker: el original vuelve a la cola tal cual
+                    logger.error(f"❌ Failed to republish a failed message: {e}")
+                    await message.nack(requeue=True)
+                    continue
+            await message.ack()
+
+    async def _republish(self, message, error: Exception, dead_letter: bool = False) -> None:
+        """Requeue a failed message with one more attempt counted, or dead-letter it
+
+        The channel is in confirm mode (aio-pika's default), so the publish
+        returns once the broker has the copy and the original can be acked.
+        ``dead_letter`` skips the attempt check (retries already done in place).
+        """
+        headers, dead = retry_headers(message.headers, error, self.config.consumer_max_attempts)
+        dead = dead or dead_letter
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                message.body,
+                headers=headers,
+                content_type=message.content_type,
+                timestamp=message.timestamp,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            ),
+            routing_key=self.config.dead_letter_queue if dead else self.config.appointment_queue,
+            mandatory=True
+        )
+        if dead:
+            logger.error(
+                f"☠️ Message moved to {self.config.dead_letter_queue} "
+                f"(attempt {headers[ATTEMPTS_HEADER]}): {headers[LAST_ERROR_HEADER]}"
+            )
+
+    async def start_consuming_batches(
+        self,
+        handler: BatchHandler,
+        batch_size: Optional[int] = None,
+        batch_timeout_ms: Optional[int] = None
+    ) -> None:
+        """Consume messages in micro-batches until cancelled
+
+        The handler receives up to ``batch_size`` decoded messages, or fewer
+        once the oldest has waited ``batch_timeout_ms``; the batch is then
+        acked with a single multiple=True ack. Only the failed messages (see
+        RabbitMQConsumer.start_consuming_batches and ``BatchFailure``) are
+        republished with an attempt counter or dead-lettered. Batches run one
+        at a time so that ack never covers a message outside the batch.
+        """
+        batch_size = max(1, batch_size or self.config.consumer_batch_size)
+        timeout = (batch_timeout_ms or self.config.consumer_batch_timeout_ms) / 1000
+        if self.connection is None or self.connection.is_closed:
+            await self.connect()
+        # The broker must be allowed to deliver a full batch before any ack
+        await self.channel.set_qos(prefetch_count=max(batch_size, self.config.consumer_prefetch))
+
+        loop = asyncio.get_running_loop()
+        incoming: "asyncio.Queue" = asyncio.Queue()
+        consumer_tag = await self.queue.consume(incoming.put)
+        self.consuming = True
+        logger.info(
+            f"🎯 Async consumer started (batch_size={batch_size}, "
+            f"batch_timeout={timeout * 1000:.0f}ms). Waiting for messages..."
+        )
+        try:
+            while True:
+                batch = [await incoming.get()]
+                deadline = loop.time() + timeout
+                while len(batch) < batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(incoming.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._handle_batch(batch, handler)
+        finally:
+            self.consuming = False
+            if not self.channel.is_closed:
+                await self.queue.cancel(consumer_tag)
+
+    def start_in_background(
+        self,
+        handler: Union[MessageHandler, BatchHandler],
+        batch_size: Optional[int] = None,
+        batch_timeout_ms: Optional[int] = None
+    ) -> asyncio.Task:
+        """Start consumer as a task on the running loop, restarting on failure
+
+        With ``batch_size`` set the handler receives lists of messages (see
+        ``start_consuming_batches``).
+        """
+        async def consume():
+            if batch_size is None:
+                await self.start_consuming(handler)
+            else:
+                await self.start_consuming_batches(handler, batch_size, batch_timeout_ms)
+
+        async def consumer_loop():
+            while True:
+                try:
+                    await consume()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Async consumer stopped, restarting in {RECONNECT_DELAY} seconds: {e}")
+                    await self.close()
+                    await asyncio.sleep(RECONNECT_DELAY)
+
+        task = asyncio.create_task(consumer_loop(), name="RabbitMQ-AsyncConsumer")
+        logger.info("✅ Async consumer started in background task")
+        return task
+
+    async def close(self) -> None:
+        """Wait for in-flight handlers and close connection"""
+        self.consuming = False
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.connection is not None and not self.connection.is_closed:
+            await self.connection.close()
+            logger.info("✅ Async consumer connection closed")
+        self.connection = None
+
+
+_default_publisher: Optional[AsyncRabbitMQPublisher] = None
+
+
+def get_async_publisher(config: RabbitMQConfig = None) -> AsyncRabbitMQPublisher:
+    """Return the process-wide async publisher (one per event loop/process)"""
+    global _default_publisher
+    if _default_publisher is None:
+        _default_publisher = AsyncRabbitMQPublisher(config)
+    return _default_publisher
+
+
+async def close_async_publisher() -> None:
+    """Close the process-wide async publisher"""
+    global _default_publisher
+    if _default_publisher is not None:
+        await _default_publisher.close()
+        _default_publisher = None
@@ -37,9 +37,42 @@ class RabbitMQConfig(BaseSettings):
     queue: str = Field(default="appointment_notifications", description="Default queue name")
     routing_key: str = Field(default="notification.created", description="Default routing key")
     
+    # Revocación de JWT: mismo exchange, otra routing key (una cola exclusiva por réplica)
+    revocation_routing_key: str = Field(default="auth.token_revoked", description="Routing key of TOKEN_REVOKED events")
+
+    # Invalidación de la caché de agendas entre réplicas de appointment-service
+    agenda_routing_key: str = Field(default="appointment.agenda_changed", description="Routing key of AGENDA_CHANGED events")
+
+    # Cambios de doctores: cada réplica de notification-service invalida su directorio
+    doctor_routing_key: str = Field(default="appointment.doctor_changed", description="Routing key of DOCTOR_CHANGED events")
+    
     heartbeat: int = Field(default=600, description="Heartbeat timeout in seconds")
     blocked_connection_timeout: int = Field(default=300, description="Blocked connection timeout")
 
+    # Pool de publishers (conexiones persistentes compartidas por el proceso)
+    publisher_pool_size: int = Field(default=4, description="Max pooled publisher connections per process")
+    publisher_checkout_timeout: float = Field(default=5.0, description="Seconds to wait for a free pooled publisher")
+
+    # Publisher confirms (confirmación asíncrona por ventana)
+    publisher_confirms: bool = Field(default=True, description="Publish appointment events with broker confirms")
+    confirm_window: int = Field(default=256, description="Max unconfirmed messages in flight")
+    confirm_max_retries: int = Field(default=3, description="Republish attempts for nacked messages")
+
+    # Consumer: prefetch y despacho concurrente de mensajes
+    consumer_prefetch: int = Field(default=1, description="Unacked messages the broker may deliver at once (basic.qos)")
+    consumer_workers: int = Field(default=1, description="Messages handled concurrently (1 = serial)")
+    consumer_dispatch: str = Field(default="threads", description="Worker pool when consumer_workers > 1: threads | asyncio")
+    consumer_ordering_key: Optional[str] = Field(default=None, description="Event data field processed in order, e.g. patient_id")
+
+    # Consumer por lotes: hasta N mensajes o T ms, un solo ack (multiple=True)
+    consumer_batch_size: int = Field(default=100, description="Max messages handed to a batch callback at once")
+    consumer_batch_timeout_ms: int = Field(default=200, description="Max milliseconds a partial batch waits before flushing")
+
+    # Lotes que fallan siempre: tras N intentos sus mensajes van a la cola de dead letters
+    consumer_max_attempts: int = Field(default=5, description="Failed batch deliveries before its messages are dead-lettered")
+    consumer_retry_delay_ms: int = Field(default=500, description="Pause between in-place retries of an ordered message")
+    dead_letter_queue: str = Field(default="appointment_notifications.dead", description="Queue for messages that exhausted their attempts")
+
     if PYDANTIC_V2_4:
         # For Pydantic v2.4+ with pydantic-settings
         model_config = SettingsConfigDict(
@@ -0,0 +1,368 @@
+"""Publisher confirms with windowed, asynchronous confirmation tracking"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional
+
+import pika
+from pika.adapters.select_connection import IOLoop
+
+from .config import RabbitMQConfig
+from .publisher import build_event_message
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5
+
+
+class PendingMessage:
+    """A published message waiting for the broker's ack/nack"""
+
+    __slots__ = ("event_type", "body", "properties", "future", "attempts")
+
+    def __init__(self, event_type: str, body: str, properties: pika.BasicProperties):
+        self.event_type = event_type
+        self.body = body
+        self.properties = properties
+        self.future: Future = Future()
+        self.attempts = 0
+
+
+class ConfirmTracker:
+    """Delivery-tag bookkeeping for one confirm-mode channel.
+
+    The broker numbers publishes 1, 2, 3... per channel and may ack/nack a
+    single tag or every tag up to and including it (``multiple=True``).
+    """
+
+    def __init__(self):
+        self._last_tag = 0
+        self._outstanding: "OrderedDict[int, PendingMessage]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._outstanding)
+
+    def sent(self, message: PendingMessage) -> int:
+        self._last_tag += 1
+        self._outstanding[self._last_tag] = message
+        return self._last_tag
+
+    def settle(self, delivery_tag: int, multiple: bool) -> List[PendingMessage]:
+        """Remove and return the messages covered by an ack or nack"""
+        if not multiple:
+            message = self._outstanding.pop(delivery_tag, None)
+            return [message] if message is not None else []
+
+        settled = []
+        while self._outstanding:
+            tag = next(iter(self._outstanding))
+            if tag > delivery_tag:
+                break
+            settled.append(self._outstanding.pop(tag))
+        return settled
+
+    def reset(self) -> List[PendingMessage]:
+        """Forget the channel (it closed): return unconfirmed messages in order"""
+        unconfirmed = list(self._outstanding.values())
+        self._outstanding.clear()
+        self._last_tag = 0
+        return unconfirmed
+
+
+class ConfirmingPublisher:
+    """RabbitMQ publisher with publisher confirms and a bounded in-flight window.
+
+    ``publish`` returns a Future immediately; it only blocks when ``window``
+    messages are already unconfirmed. A dedicated I/O thread runs a pika
+    SelectConnection, matches acks/nacks by delivery tag, republishes nacked
+    messages up to ``max_retries`` times and replays unconfirmed messages
+    after a reconnect. Futures resolve to True once the broker confirmed the
+    message and to False when it was finally given up.
+    """
+
+    def __init__(
+        self,
+        config: RabbitMQConfig = None,
+        window: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.config = config or RabbitMQConfig.from_env()
+        self.window = window or self.config.confirm_window
+        self.max_retries = (
+            max_retries if max_retries is not None else self.config.confirm_max_retries
+        )
+        self._slots = threading.BoundedSemaphore(self.window)
+        self._outgoing: "queue.SimpleQueue[PendingMessage]" = queue.SimpleQueue()
+        self._retry: Deque[PendingMessage] = deque()
+        self._tracker = ConfirmTracker()
+        self._start_lock = threading.Lock()
+        self._ioloop: Optional[IOLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connection = None
+        self._channel = None
+        self._ready = False
+        self._closing = False
+        self._topology_declared = False
+
+    # ------------------------------------------------------------------
+    # Public API (any thread)
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Start the I/O thread (called lazily by publish)"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ioloop = IOLoop()
+            self._thread = threading.Thread(
+                target=self._run, name="RabbitMQ-Confirms", daemon=True
+            )
+            self._thread.start()
+
+    def publish(self, event_type: str, data: Dict[str, Any], timeout: Optional[float] = None) -> Future:
+        """Queue an event for publishing; the Future resolves on confirmation"""
+        body, properties = build_event_message(event_type, data)
+        message = PendingMessage(event_type, body, properties)
+
+        if self._closing:
+            message.future.set_result(False)
+            return message.future
+
+        wait = self.config.publisher_checkout_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            logger.error(f"❌ Confirm window full ({self.window} unconfirmed), dropping {event_type}")
+            message.future.set_result(False)
+            return message.future
+
+        self.start()
+        self._outgoing.put(message)
+        self._ioloop.add_callback_threadsafe(self._drain)
+        return message.future
+
+    def publish_appointment_created(self, appointment_data: Dict[str, Any]) -> Future:
+        """Publish appointment created event"""
+        return self.publish("APPOINTMENT_CREATED", appointment_data)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every published message has been confirmed or given up"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        acquired = 0
+        try:
+            while acquired < self.window:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not self._slots.acquire(timeout=remaining):
+                    return False
+                acquired += 1
+            return True
+        finally:
+            for _ in range(acquired):
+                self._slots.release()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush outstanding confirms and close the connection"""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._closing = True
+        self._ioloop.add_callback_threadsafe(self._shutdown)
+        self._thread.join(timeout)
+
+        # Whatever is still unconfirmed at this point is lost to the caller
+        leftovers = self._tracker.reset() + list(self._retry)
+        self._retry.clear()
+        while True:
+            try:
+                leftovers.append(self._outgoing.get_nowait())
+            except queue.Empty:
+                break
+        for message in leftovers:
+            if not message.future.done():
+                message.future.set_result(False)
+        if leftovers:
+            logger.error(f"❌ {len(leftovers)} events left unconfirmed on close")
+
+    @property
+    def unconfirmed(self) -> int:
+        return len(self._tracker)
+
+    # ------------------------------------------------------------------
+    # I/O thread
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        self._connect()
+        self._ioloop.start()
+
+    def _connect(self) -> None:
+        credentials = pika.PlainCredentials(self.config.username, self.config.password)
+        parameters = pika.ConnectionParameters(
+            host=self.config.host,
+            port=self.config.port,
+            credentials=credentials,
+            virtual_host=self.config.virtual_host,
+            heartbeat=self.config.heartbeat,
+            blocked_connection_timeout=self.config.blocked_connection_timeout
+        )
+        self._connection = pika.SelectConnection(
+            parameters,
+            on_open_callback=self._on_connection_open,
+            on_open_error_callback=self._on_connection_error,
+            on_close_callback=self._on_connection_closed,
+            custom_ioloop=self._ioloop
+        )
+
+    def _schedule_reconnect(self) -> None:
+        if self._closing:
+            self._ioloop.stop()
+            return
+        self._ioloop.call_later(RECONNECT_DELAY, self._connect)
+
+    def _on_connection_open(self, connection) -> None:
+        logger.info(f"✅ Confirming publisher connected to RabbitMQ at {self.config.host}:{self.config.port}")
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error) -> None:
+        logger.error(f"❌ Confirming publisher failed to connect, retrying in {RECONNECT_DELAY}s: {error}")
+        self._schedule_reconnect()
+
+    def _on_connection_closed(self, connection, reason) -> None:
+        self._channel = None
+        self._ready = False
+        if self._closing:
+            self._ioloop.stop()
+            return
+        logger.warning(f"⚠️ Confirming publisher connection closed, reconnecting: {reason}")
+        self._requeue_unconfirmed()
+        self._schedule_reconnect()
+
+    def _on_channel_open(self, channel) -> None:
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+        if self._topology_declared:
+            self._enable_confirms()
+            return
+
+        cfg = self.config
+        channel.exchange_declare(
+            exchange=cfg.appointment_exchange,
+            exchange_type="direct",
+            durable=True,
+            callback=lambda _frame: channel.queue_declare(
+                queue=cfg.appointment_queue,
+                durable=True,
+                callback=lambda _frame: channel.queue_bind(
+                    queue=cfg.appointment_queue,
+                    exchange=cfg.appointment_exchange,
+                    routing_key=cfg.appointment_routing_key,
+                    callback=lambda _frame: self._enable_confirms()
+                )
+            )
+        )
+
+    def _on_channel_closed(self, channel, reason) -> None:
+        self._channel = None
+        self._ready = False
+        if self._closing:
+            return
+        logger.warning(f"⚠️ Confirming publisher channel closed: {reason}")
+        self._requeue_unconfirmed()
+        if self._connection is not None and self._connection.is_open:
+            self._connection.channel(on_open_callback=self._on_channel_open)
+
+    def _enable_confirms(self) -> None:
+        self._topology_declared = True
+        self._requeue_unconfirmed()
+        self._channel.confirm_delivery(ack_nack_callback=self._on_confirm)
+        self._ready = True
+        self._drain()
+
+    def _requeue_unconfirmed(self) -> None:
+        # Unconfirmed messages on a dead channel may or may not have been
+        # stored: republish them (at-least-once delivery)
+        for message in reversed(self._tracker.reset()):
+            self._retry.appendleft(message)
+
+    def _drain(self) -> None:
+        if not self._ready:
+            return
+        try:
+            while self._retry:
+                self._send(self._retry.popleft())
+            while True:
+                try:
+                    message = self._outgoing.get_nowait()
+                except queue.Empty:
+                    break
+                self._send(message)
+        except Exception as e:
+            # The channel close callback requeues everything tracked so far
+            logger.error(f"❌ Publish failed on confirm channel: {e}")
+
+    def _send(self, message: PendingMessage) -> None:
+        message.attempts += 1
+        self._tracker.sent(message)
+        self._channel.basic_publish(
+            exchange=self.config.appointment_exchange,
+            routing_key=self.config.appointment_routing_key,
+            body=message.body,
+            properties=message.properties
+        )
+
+    def _on_confirm(self, method_frame) -> None:
+        method = method_frame.method
+        settled = self._tracker.settle(method.delivery_tag, method.multiple)
+
+        if isinstance(method, pika.spec.Basic.Ack):
+            for message in settled:
+                self._resolve(message, True)
+            return
+
+        for message in settled:
+            if message.attempts <= self.max_retries:
+                logger.warning(
+                    f"⚠️ Broker nacked {message.event_type}, republishing "
+                    f"(attempt {message.attempts + 1}/{self.max_retries + 1})"
+                )
+                self._retry.append(message)
+            else:
+                logger.error(f"❌ Broker nacked {message.event_type} {message.attempts} times, giving up")
+                self._resolve(message, False)
+        self._drain()
+
+    def _resolve(self, message: PendingMessage, confirmed: bool) -> None:
+        if not message.future.done():
+            message.future.set_result(confirmed)
+            self._slots.release()
+
+    def _shutdown(self) -> None:
+        try:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+                return
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing confirming publisher: {e}")
+        self._ioloop.stop()
+
+
+_default_publisher: Optional[ConfirmingPublisher] = None
+_default_publisher_lock = threading.Lock()
+
+
+def get_confirming_publisher(config: RabbitMQConfig = None) -> ConfirmingPublisher:
+    """Return the process-wide confirming publisher, creating it on first use"""
+    global _default_publisher
+    if _default_publisher is None:
+        with _default_publisher_lock:
+            if _default_publisher is None:
+                _default_publisher = ConfirmingPublisher(config)
+    return _default_publisher
+
+
+def close_confirming_publisher(timeout: float = 5.0) -> None:
+    """Flush and close the process-wide confirming publisher"""
+    global _default_publisher
+    with _default_publisher_lock:
+        if _default_publisher is not None:
+            _default_publisher.close(timeout)
+            _default_publisher = None
@@ -1,18 +1,182 @@
 ﻿"""RabbitMQ Consumer for HDuce"""
+import asyncio
+import functools
 import json
 import pika
 import threading
-from typing import Callable, Dict, Any
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 from .config import RabbitMQConfig
 
+# Intentos fallidos de un mensaje: la cola clásica no los cuenta (sin
+# x-delivery-count), así que se reenvía con este header incrementado
+ATTEMPTS_HEADER = "x-hduce-attempts"
+LAST_ERROR_HEADER = "x-hduce-last-error"
+
+
+class PoisonMessage(Exception):
+    """A message that can never be processed (invalid event): dead-lettered without retries"""
+
+
+class BatchFailure(Exception):
+    """Raised by a batch callback when only some messages failed
+
+    ``failures`` maps the index of each failed message in the batch to its
+    error; the other messages count as processed. Any other exception from
+    the callback fails every message of the batch.
+    """
+
+    def __init__(self, failures: Dict[int, Exception]):
+        super().__init__(f"{len(failures)} messages of the batch failed")
+        self.failures = failures
+
+
+def batch_failures(error: Exception, size: int) -> Dict[int, Exception]:
+    """Per-message errors of a batch callback that raised ``error``"""
+    if isinstance(error, BatchFailure):
+        return error.failures
+    return {index: error for index in range(size)}
+
+
+def retry_headers(headers: Optional[Dict[str, Any]], error: Exception, max_attempts: int) -> Tuple[Dict[str, Any], bool]:
+    """Headers for the next delivery of a failed message and whether to dead-letter it"""
+    headers = dict(headers or {})
+    attempts = int(headers.get(ATTEMPTS_HEADER) or 0) + 1
+    headers[ATTEMPTS_HEADER] = attempts
+    headers[LAST_ERROR_HEADER] = f"{type(error).__name__}: {error}"[:500]
+    return headers, isinstance(error, PoisonMessage) or attempts >= max_attempts
+
+
+def ordering_value(message: Dict[str, Any], ordering_key: Optional[str]) -> Optional[Hashable]:
+    """Value of the ordering field (e.g. patient_id) in an event's data"""
+    if not ordering_key:
+        return None
+    data = message.get("data") or {}
+    value = data.get(ordering_key, message.get(ordering_key))
+    return str(value) if value is not None else None
+
+
+class _ThreadDispatcher:
+    """Runs callbacks on a thread pool; same-key messages share a single-thread lane"""
+
+    def __init__(self, consumer: "RabbitMQConsumer", callback, workers: int, ordering_key: Optional[str]):
+        self.consumer = consumer
+        self.callback = callback
+        self.ordering_key = ordering_key
+        if ordering_key:
+            self.lanes = [
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"rabbitmq-lane-{i}")
+                for i in range(workers)
+            ]
+        else:
+            self.lanes = [ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rabbitmq-worker")]
+
+    def submit(self, channel, delivery_tag: int, message: Dict[str, Any]) -> None:
+        key = ordering_value(message, self.ordering_key)
+        lane = self.lanes[hash(key) % len(self.lanes)] if key is not None else self.lanes[0]
+        lane.submit(self._run, channel, delivery_tag, message)
+
+    def _run(self, channel, delivery_tag: int, message: Dict[str, Any]) -> None:
+        try:
+            self.callback(message)
+            success = True
+        except Exception as e:
+            print(f"❌ Error processing message: {e}")
+            success = False
+        self.consumer.settle_threadsafe(channel, delivery_tag, success)
+
+    def shutdown(self, wait: bool = True) -> None:
+        for lane in self.lanes:
+            lane.shutdown(wait=wait)
+
+
+class _AsyncioDispatcher:
+    """Runs callbacks on a private event loop; same-key messages are serialized"""
+
+    def __init__(self, consumer: "RabbitMQConsumer", callback, workers: int, ordering_key: Optional[str]):
+        self.consumer = consumer
+        self.callback = callback
+        self.ordering_key = ordering_key
+        self.loop = asyncio.new_event_loop()
+        self.slots = asyncio.Semaphore(workers)
+        self.key_locks: Dict[Hashable, asyncio.Lock] = {}
+        self.key_refs: Dict[Hashable, int] = defaultdict(int)
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="RabbitMQ-AsyncWorkers", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, channel, delivery_tag: int, message: Dict[str, Any]) -> None:
+        asyncio.run_coroutine_threadsafe(self._run(channel, delivery_tag, message), self.loop)
+
+    async def _call(self, message: Dict[str, Any]) -> bool:
+        try:
+            async with self.slots:
+                if asyncio.iscoroutinefunction(self.callback):
+                    await self.callback(message)
+                else:
+                    await self.loop.run_in_executor(None, self.callback, message)
+            return True
+        except Exception as e:
+            print(f"❌ Error processing message: {e}")
+            return False
+
+    async def _run(self, channel, delivery_tag: int, message: Dict[str, Any]) -> None:
+        key = ordering_value(message, self.ordering_key)
+        if key is None:
+            success = await self._call(message)
+        else:
+            # Take the key lock before a worker slot so waiting messages do not hold slots
+            self.key_refs[key] += 1
+            lock = self.key_locks.setdefault(key, asyncio.Lock())
+            try:
+                async with lock:
+                    success = await self._call(message)
+            finally:
+                self.key_refs[key] -= 1
+                if self.key_refs[key] == 0:
+                    del self.key_refs[key]
+                    del self.key_locks[key]
+        self.consumer.settle_threadsafe(channel, delivery_tag, success)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if wait:
+            self.thread.join(timeout=30)
+
+
 class RabbitMQConsumer:
-    """RabbitMQ consumer for appointment events"""
+    """RabbitMQ consumer for appointment events
+
+    With ``workers`` > 1 messages are handed to a worker pool (``dispatch`` =
+    "threads" or "asyncio") and up to ``workers`` are processed at once. Acks
+    are sent back on the connection's thread per delivery tag. When
+    ``ordering_key`` is set (e.g. "patient_id"), messages sharing that value
+    are processed one at a time in delivery order.
+    """
     
-    def __init__(self, config: RabbitMQConfig = None):
+    def __init__(
+        self,
+        config: RabbitMQConfig = None,
+        prefetch_count: Optional[int] = None,
+        workers: Optional[int] = None,
+        dispatch: Optional[str] = None,
+        ordering_key: Optional[str] = None
+    ):
         self.config = config or RabbitMQConfig.from_env()
+        self.workers = max(1, workers or self.config.consumer_workers)
+        self.dispatch = dispatch or self.config.consumer_dispatch
+        self.ordering_key = ordering_key or self.config.consumer_ordering_key
+        # A worker pool only helps if the broker delivers enough messages
+        self.prefetch_count = max(prefetch_count or self.config.consumer_prefetch, self.workers)
+        if self.dispatch not in ("threads", "asyncio"):
+            raise ValueError(f"Unknown consumer dispatch mode: {self.dispatch}")
         self.connection = None
         self.channel = None
+        self.retry_channel = None
         self.consuming = False
+        self._dispatcher = None
     
     def connect(self) -> None:
         """Establish connection to RabbitMQ"""
@@ -53,8 +217,19 @@ class RabbitMQConsumer:
                 routing_key=self.config.appointment_routing_key
             )
             
-            # Quality of Service - process one message at a time
-            self.channel.basic_qos(prefetch_count=1)
+            # Mensajes de lotes que agotaron consumer_max_attempts
+            self.channel.queue_declare(
+                queue=self.config.dead_letter_queue,
+                durable=True
+            )
+            
+            # Quality of Service - unacked messages delivered at once
+            self.channel.basic_qos(prefetch_count=self.prefetch_count)
+            
+            # Reintentos y dead letters con publisher confirms: el original
+            # solo se confirma (ack) cuando el broker ya tiene la copia
+            self.retry_channel = self.connection.channel()
+            self.retry_channel.confirm_delivery()
             
             print(f"✅ Consumer connected to RabbitMQ at {self.config.host}:{self.config.port}")
             
@@ -62,6 +237,24 @@ class RabbitMQConsumer:
             print(f"❌ Failed to connect consumer to RabbitMQ: {e}")
             raise
     
+    def settle_threadsafe(self, channel, delivery_tag: int, success: bool) -> None:
+        """Ack/nack a delivery from a worker thread (pika channels are not thread-safe)"""
+        connection = self.connection
+        if connection is None or not connection.is_open:
+            return  # Unacked deliveries are redelivered after reconnect
+        connection.add_callback_threadsafe(
+            functools.partial(self._settle, channel, delivery_tag, success)
+        )
+    
+    def _settle(self, channel, delivery_tag: int, success: bool) -> None:
+        # Delivery tags are only valid on the channel that delivered them
+        if not channel.is_open:
+            return
+        if success:
+            channel.basic_ack(delivery_tag=delivery_tag)
+        else:
+            channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+    
     def start_consuming(self, callback: Callable[[Dict[str, Any]], None]) -> None:
         """Start consuming messages with callback"""
         def on_message(ch, method, properties, body):
@@ -69,6 +262,10 @@ class RabbitMQConsumer:
                 message = json.loads(body.decode('utf-8'))
                 print(f"📥 Message received: {message.get('event_type', 'UNKNOWN')}")
                 
+                if self._dispatcher is not None:
+                    self._dispatcher.submit(ch, method.delivery_tag, message)
+                    return
+                
                 # Process message
                 callback(message)
                 
@@ -87,20 +284,154 @@ class RabbitMQConsumer:
             if not self.connection or self.connection.is_closed:
                 self.connect()
             
+            if self.workers > 1:
+                dispatcher_class = _AsyncioDispatcher if self.dispatch == "asyncio" else _ThreadDispatcher
+                self._dispatcher = dispatcher_class(self, callback, self.workers, self.ordering_key)
+            
             self.channel.basic_consume(
                 queue=self.config.appointment_queue,
                 on_message_callback=on_message
             )
             
             self.consuming = True
-            print("🎯 Consumer started. Waiting for messages...")
+            print(
+                f"🎯 Consumer started (prefetch={self.prefetch_count}, workers={self.workers}, "
+                f"dispatch={self.dispatch if self.workers > 1 else 'serial'}). Waiting for messages..."
+            )
             self.channel.start_consuming()
             
         except Exception as e:
             print(f"❌ Error in consumer: {e}")
             self.consuming = False
             raise
+        finally:
+            if self._dispatcher is not None:
+                self._dispatcher.shutdown(wait=False)
+                self._dispatcher = None
     
+    def start_consuming_batches(
+        self,
+        callback: Callable[[List[Dict[str, Any]]], None],
+        batch_size: Optional[int] = None,
+        batch_timeout_ms: Optional[int] = None
+    ) -> None:
+        """Start consuming messages in micro-batches
+
+        The callback receives up to ``batch_size`` decoded messages, or fewer
+        once the oldest has waited ``batch_timeout_ms``. After it returns the
+        whole batch is acked with a single ``basic_ack(multiple=True)``.
+        Only the messages that failed (every one if the callback raised, the
+        ones in ``BatchFailure.failures`` otherwise) go back to the queue with
+        an attempt counter (see ``_republish``); ``PoisonMessage`` errors and
+        messages past ``consumer_max_attempts`` go to ``dead_letter_queue``.
+        Batches are handled one at a time on the connection's thread, so a
+        multiple ack never covers a message outside the batch.
+        """
+        batch_size = max(1, batch_size or self.config.consumer_batch_size)
+        timeout = (batch_timeout_ms or self.config.consumer_batch_timeout_ms) / 1000
+        batch: List[Dict[str, Any]] = []
+        deliveries: List[Tuple[int, bytes, pika.BasicProperties]] = []
+        state = {"timer": None}
+
+        def flush():
+            if state["timer"] is not None:
+                self.connection.remove_timeout(state["timer"])
+                state["timer"] = None
+            if not batch:
+                return
+            messages, pending = list(batch), list(deliveries)
+            batch.clear()
+            deliveries.clear()
+            try:
+                callback(messages)
+                failures = {}
+            except Exception as e:
+                failures = batch_failures(e, len(messages))
+                print(f"❌ {len(failures)} of {len(messages)} messages in the batch failed: {e}")
+
+            if not failures:
+                self.channel.basic_ack(delivery_tag=pending[-1][0], multiple=True)
+                print(f"✅ Batch of {len(messages)} messages processed")
+                return
+            for index, (delivery_tag, body, properties) in enumerate(pending):
+                if index in failures:
+                    try:
+                        self._republish(body, properties, failures[index])
+                    except Exception as e:
+                        # Sin confirmación del broker: el original vuelve a la cola tal cual
+                        print(f"❌ Failed to republish a failed message: {e}")
+                        self.channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+                        continue
+                self.channel.basic_ack(delivery_tag=delivery_tag)
+
+        def on_timeout():
+            state["timer"] = None
+            flush()
+
+        def on_message(ch, method, properties, body):
+            try:
+                message = json.loads(body.decode('utf-8'))
+            except json.JSONDecodeError as e:
+                print(f"❌ Failed to decode JSON: {e}")
+                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+                return
+
+            batch.append(message)
+            deliveries.append((method.delivery_tag, body, properties))
+            if len(batch) >= batch_size:
+                flush()
+            elif state["timer"] is None:
+                state["timer"] = self.connection.call_later(timeout, on_timeout)
+
+        try:
+            # The broker must be allowed to deliver a full batch before any ack
+            self.prefetch_count = max(self.prefetch_count, batch_size)
+            if not self.connection or self.connection.is_closed:
+                self.connect()
+            else:
+                self.channel.basic_qos(prefetch_count=self.prefetch_count)
+
+            self.channel.basic_consume(
+                queue=self.config.appointment_queue,
+                on_message_callback=on_message
+            )
+
+            self.consuming = True
+            print(
+                f"🎯 Consumer started (batch_size={batch_size}, batch_timeout={timeout * 1000:.0f}ms, "
+                f"prefetch={self.prefetch_count}). Waiting for messages..."
+            )
+            self.channel.start_consuming()
+
+        except Exception as e:
+            print(f"❌ Error in consumer: {e}")
+            self.consuming = False
+            raise
+
+    def _republish(self, body: bytes, properties: pika.BasicProperties, error: Exception) -> None:
+        """Requeue a failed message with one more attempt counted, or dead-letter it
+
+        Publishes on the confirm channel and returns once the broker has the
+        copy (raises otherwise), so the caller can ack the original. A crash
+        in between delivers the message twice (at-least-once).
+        """
+        headers, dead = retry_headers(properties.headers, error, self.config.consumer_max_attempts)
+        self.retry_channel.basic_publish(
+            exchange="",
+            routing_key=self.config.dead_letter_queue if dead else self.config.appointment_queue,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                content_type=properties.content_type,
+                timestamp=properties.timestamp,
+                headers=headers
+            ),
+            mandatory=True
+        )
+        if dead:
+            print(f"☠️ Message moved to {self.config.dead_letter_queue} "
+                  f"(attempt {headers[ATTEMPTS_HEADER]}): {headers[LAST_ERROR_HEADER]}")
+
     def start_in_background(self, callback: Callable[[Dict[str, Any]], None]) -> threading.Thread:
         """Start consumer in background thread"""
         def consumer_loop():
@@ -0,0 +1,98 @@
+"""
+Versioned event schemas for HDuce RabbitMQ messages
+
+Every event travels in the envelope built by ``build_event``; the schema of
+``data`` is identified by ``metadata.version``. Versions are additive: v2 of
+APPOINTMENT_CREATED keeps every v1 field and adds the doctor and patient
+details the publisher already has, so consumers need no lookups in other
+services' databases. Consumers parse any version through the models below.
+"""
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+APPOINTMENT_CREATED = "APPOINTMENT_CREATED"
+DOCTOR_CHANGED = "DOCTOR_CHANGED"
+TOKEN_REVOKED = "TOKEN_REVOKED"
+AGENDA_CHANGED = "AGENDA_CHANGED"
+
+DEFAULT_SCHEMA_VERSION = "1.0"
+
+# Versión del esquema que publican hoy los servicios, por tipo de evento
+EVENT_SCHEMA_VERSIONS: Dict[str, str] = {
+    APPOINTMENT_CREATED: "2.0",
+}
+
+
+def schema_version(event_type: str) -> str:
+    """Schema version published for an event type"""
+    return EVENT_SCHEMA_VERSIONS.get(event_type, DEFAULT_SCHEMA_VERSION)
+
+
+def event_version(message: Dict[str, Any]) -> str:
+    """Schema version of a received event (messages without metadata are v1)"""
+    return (message.get("metadata") or {}).get("version", DEFAULT_SCHEMA_VERSION)
+
+
+class AppointmentCreatedData(BaseModel):
+    """``data`` of APPOINTMENT_CREATED (v1 fields + v2 enrichment)"""
+    # v1
+    appointment_id: Optional[int] = None
+    patient_id: Optional[int] = None
+    patient_email: str = ""
+    doctor_id: Optional[int] = None
+    appointment_date: Optional[str] = None
+    appointment_time: Optional[str] = None
+    reason: Optional[str] = None
+    created_at: Optional[str] = None
+
+    # v2
+    doctor_name: Optional[str] = None
+    doctor_specialty: Optional[str] = None
+    patient_name: Optional[str] = None
+
+    @property
+    def enriched(self) -> bool:
+        """True when the publisher included the doctor's name (v2)"""
+        return self.doctor_name is not None
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "AppointmentCreatedData":
+        """Parse the data of a v1 or v2 event (unknown fields are ignored)"""
+        return cls(**(message.get("data") or {}))
+
+
+class TokenRevokedData(BaseModel):
+    """``data`` of TOKEN_REVOKED (exp: when the token would expire anyway)"""
+    jti: str
+    exp: Optional[float] = None
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "TokenRevokedData":
+        return cls(**(message.get("data") or {}))
+
+
+class AgendaChangedData(BaseModel):
+    """``data`` of AGENDA_CHANGED: days of a doctor's agenda to drop from cache
+
+    ``origin`` identifies the publishing replica (it already invalidated its
+    own cache); ``invalidated_at`` is the publisher's epoch time, used to
+    measure how long other replicas kept serving the old agenda.
+    """
+    doctor_id: int
+    dates: List[str] = []
+    origin: Optional[str] = None
+    invalidated_at: Optional[float] = None
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "AgendaChangedData":
+        return cls(**(message.get("data") or {}))
+
+
+class DoctorChangedData(BaseModel):
+    """``data`` of DOCTOR_CHANGED (doctor_id None = every doctor)"""
+    doctor_id: Optional[int] = None
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "DoctorChangedData":
+        return cls(**(message.get("data") or {}))
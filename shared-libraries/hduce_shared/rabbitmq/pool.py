@@ -0,0 +1,208 @@
+"""Process-wide pool of long-lived RabbitMQ publishers for HDuce"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pika
+
+from .config import RabbitMQConfig
+from .events import AGENDA_CHANGED, APPOINTMENT_CREATED, DOCTOR_CHANGED, TOKEN_REVOKED
+from .publisher import RabbitMQPublisher
+
+logger = logging.getLogger(__name__)
+
+
+class PublisherPoolExhausted(Exception):
+    """Raised when no pooled publisher became free before the checkout timeout"""
+
+
+class RabbitMQPublisherPool:
+    """Bounded pool of persistent RabbitMQPublisher connections.
+
+    pika's BlockingConnection is not thread-safe, so every publisher (one
+    connection + one channel) is lent to a single thread at a time and
+    returned afterwards. Connections are opened lazily up to ``size``, the
+    exchange/queue topology is declared by the first connection only, and
+    broken connections are discarded and reopened on the next checkout.
+    """
+
+    def __init__(
+        self,
+        config: RabbitMQConfig = None,
+        size: Optional[int] = None,
+        checkout_timeout: Optional[float] = None
+    ):
+        self.config = config or RabbitMQConfig.from_env()
+        self.size = size or self.config.publisher_pool_size
+        self.checkout_timeout = (
+            checkout_timeout if checkout_timeout is not None
+            else self.config.publisher_checkout_timeout
+        )
+        self._idle: "queue.LifoQueue[RabbitMQPublisher]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._publishers: List[RabbitMQPublisher] = []
+        self._topology_declared = False
+        self._closed = False
+
+    def _connect(self, publisher: RabbitMQPublisher) -> None:
+        """(Re)open a publisher connection, declaring the topology only once"""
+        with self._lock:
+            declare = not self._topology_declared
+        publisher.connect(declare_topology=declare)
+        if declare:
+            with self._lock:
+                self._topology_declared = True
+
+    def _ensure_connected(self, publisher: RabbitMQPublisher) -> None:
+        if publisher.is_connected:
+            try:
+                # Service heartbeats on idle connections before reusing them
+                publisher.connection.process_data_events(time_limit=0)
+                return
+            except pika.exceptions.AMQPError as e:
+                logger.warning(f"⚠️ Pooled RabbitMQ connection lost, reconnecting: {e}")
+        self._connect(publisher)
+
+    def _discard(self, publisher: RabbitMQPublisher) -> None:
+        with self._lock:
+            if publisher in self._publishers:
+                self._publishers.remove(publisher)
+        try:
+            publisher.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[RabbitMQPublisher]:
+        """Check out a connected publisher for the duration of the block"""
+        if self._closed:
+            raise RuntimeError("Publisher pool is closed")
+
+        wait = self.checkout_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise PublisherPoolExhausted(
+                f"No RabbitMQ publisher available after {wait}s (pool size {self.size})"
+            )
+
+        publisher = None
+        try:
+            try:
+                publisher = self._idle.get_nowait()
+            except queue.Empty:
+                publisher = RabbitMQPublisher(self.config)
+                with self._lock:
+                    self._publishers.append(publisher)
+
+            self._ensure_connected(publisher)
+            yield publisher
+        except BaseException:
+            # The connection state is unknown after a failure: do not reuse it
+            if publisher is not None:
+                self._discard(publisher)
+                publisher = None
+            raise
+        finally:
+            if publisher is not None:
+                if self._closed:
+                    self._discard(publisher)
+                else:
+                    self._idle.put(publisher)
+            self._slots.release()
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        retries: int = 1,
+        routing_key: Optional[str] = None
+    ) -> bool:
+        """Publish an event through a pooled connection, reconnecting on failure"""
+        for attempt in range(retries + 1):
+            try:
+                with self.acquire() as publisher:
+                    publisher.publish_event(event_type, data, routing_key=routing_key)
+                return True
+            except PublisherPoolExhausted as e:
+                logger.error(f"❌ {e}")
+                return False
+            except (pika.exceptions.AMQPError, OSError) as e:
+                logger.warning(
+                    f"⚠️ Publish of {event_type} failed (attempt {attempt + 1}/{retries + 1}): {e}"
+                )
+            except Exception as e:
+                logger.error(f"❌ Failed to publish {event_type}: {e}")
+                return False
+        return False
+
+    def publish_appointment_created(self, appointment_data: Dict[str, Any]) -> bool:
+        """Publish appointment created event"""
+        return self.publish(APPOINTMENT_CREATED, appointment_data)
+
+    def publish_doctor_changed(self, doctor_id: Optional[int] = None) -> bool:
+        """Publish doctor changed event (every notification-service replica drops cached doctor data)"""
+        return self.publish(DOCTOR_CHANGED, {"doctor_id": doctor_id}, routing_key=self.config.doctor_routing_key)
+
+    def publish_token_revoked(self, jti: str, exp: Optional[float] = None) -> bool:
+        """Publish token revoked event (every replica adds the jti to its revocation list)"""
+        return self.publish(
+            TOKEN_REVOKED,
+            {"jti": jti, "exp": exp},
+            routing_key=self.config.revocation_routing_key
+        )
+
+    def publish_agenda_changed(
+        self,
+        doctor_id: int,
+        dates: List[str],
+        origin: Optional[str] = None,
+        invalidated_at: Optional[float] = None
+    ) -> bool:
+        """Publish agenda changed event (every appointment-service replica drops those days)"""
+        return self.publish(
+            AGENDA_CHANGED,
+            {"doctor_id": doctor_id, "dates": dates, "origin": origin, "invalidated_at": invalidated_at},
+            routing_key=self.config.agenda_routing_key
+        )
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self._closed = True
+        with self._lock:
+            publishers = list(self._publishers)
+            self._publishers.clear()
+        for publisher in publishers:
+            try:
+                publisher.close()
+            except Exception:
+                pass
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+
+_default_pool: Optional[RabbitMQPublisherPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_publisher_pool(config: RabbitMQConfig = None) -> RabbitMQPublisherPool:
+    """Return the process-wide publisher pool, creating it on first use"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = RabbitMQPublisherPool(config)
+    return _default_pool
+
+
+def close_publisher_pool() -> None:
+    """Close the process-wide publisher pool (call on service shutdown)"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.close()
+            _default_pool = None
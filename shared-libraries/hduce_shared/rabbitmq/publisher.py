@@ -1,8 +1,31 @@
 ﻿"""RabbitMQ Publisher for HDuce"""
 import json
 import pika
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 from .config import RabbitMQConfig
+from .events import schema_version
+
+def build_event(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the envelope shared by every HDuce event"""
+    return {
+        "event_type": event_type,
+        "timestamp": datetime.now().isoformat(),
+        "data": data,
+        "metadata": {
+            "service": "appointment",
+            "version": schema_version(event_type)
+        }
+    }
+
+def build_event_message(event_type: str, data: Dict[str, Any]) -> Tuple[str, pika.BasicProperties]:
+    """Build the JSON body and persistent properties of an HDuce event"""
+    message = build_event(event_type, data)
+    properties = pika.BasicProperties(
+        delivery_mode=2,  # Make message persistent
+        content_type='application/json',
+        timestamp=int(datetime.now().timestamp())
+    )
+    return json.dumps(message, ensure_ascii=False), properties
 
 class RabbitMQPublisher:
     """RabbitMQ publisher for appointment events"""
@@ -12,8 +35,12 @@ class RabbitMQPublisher:
         self.connection = None
         self.channel = None
     
-    def connect(self) -> None:
-        """Establish connection to RabbitMQ"""
+    def connect(self, declare_topology: bool = True) -> None:
+        """Establish connection to RabbitMQ
+
+        declare_topology=False skips the exchange/queue declarations, used by
+        the publisher pool once the topology has already been declared.
+        """
         try:
             credentials = pika.PlainCredentials(
                 self.config.username, 
@@ -33,25 +60,8 @@ class RabbitMQPublisher:
             
             self.channel = self.connection.channel()
             
-            # Declare exchange (durable for persistence)
-            self.channel.exchange_declare(
-                exchange=self.config.appointment_exchange,
-                exchange_type="direct",
-                durable=True
-            )
-            
-            # Declare queue (durable for persistence)
-            self.channel.queue_declare(
-                queue=self.config.appointment_queue,
-                durable=True
-            )
-            
-            # Bind queue to exchange
-            self.channel.queue_bind(
-                exchange=self.config.appointment_exchange,
-                queue=self.config.appointment_queue,
-                routing_key=self.config.appointment_routing_key
-            )
+            if declare_topology:
+                self.declare_topology()
             
             print(f"✅ Connected to RabbitMQ at {self.config.host}:{self.config.port}")
             
@@ -59,32 +69,56 @@ class RabbitMQPublisher:
             print(f"❌ Failed to connect to RabbitMQ: {e}")
             raise
     
+    def declare_topology(self) -> None:
+        """Declare the appointment exchange and queue and bind them"""
+        # Declare exchange (durable for persistence)
+        self.channel.exchange_declare(
+            exchange=self.config.appointment_exchange,
+            exchange_type="direct",
+            durable=True
+        )
+        
+        # Declare queue (durable for persistence)
+        self.channel.queue_declare(
+            queue=self.config.appointment_queue,
+            durable=True
+        )
+        
+        # Bind queue to exchange
+        self.channel.queue_bind(
+            exchange=self.config.appointment_exchange,
+            queue=self.config.appointment_queue,
+            routing_key=self.config.appointment_routing_key
+        )
+    
+    @property
+    def is_connected(self) -> bool:
+        """True when both the connection and the channel are open"""
+        return bool(
+            self.connection and self.connection.is_open
+            and self.channel and self.channel.is_open
+        )
+    
+    def publish_event(self, event_type: str, data: Dict[str, Any], routing_key: Optional[str] = None) -> None:
+        """Publish an event, raising on failure (used by the publisher pool)
+
+        routing_key defaults to the appointment routing key (notification queue).
+        """
+        if not self.is_connected:
+            self.connect()
+        
+        body, properties = build_event_message(event_type, data)
+        self.channel.basic_publish(
+            exchange=self.config.appointment_exchange,
+            routing_key=routing_key or self.config.appointment_routing_key,
+            body=body,
+            properties=properties
+        )
+    
     def publish_appointment_created(self, appointment_data: Dict[str, Any]) -> bool:
         """Publish appointment created event"""
         try:
-            if not self.connection or self.connection.is_closed:
-                self.connect()
-            
-            message = {
-                "event_type": "APPOINTMENT_CREATED",
-                "timestamp": datetime.now().isoformat(),
-                "data": appointment_data,
-                "metadata": {
-                    "service": "appointment",
-                    "version": "1.0"
-                }
-            }
-            
-            self.channel.basic_publish(
-                exchange=self.config.appointment_exchange,
-                routing_key=self.config.appointment_routing_key,
-                body=json.dumps(message, ensure_ascii=False),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Make message persistent
-                    content_type='application/json',
-                    timestamp=int(datetime.now().timestamp())
-                )
-            )
+            self.publish_event("APPOINTMENT_CREATED", appointment_data)
             
             print(f"✅ Event published: APPOINTMENT_CREATED - Appointment {appointment_data.get('id', 'N/A')}")
             return True
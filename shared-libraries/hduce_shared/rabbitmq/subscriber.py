@@ -0,0 +1,108 @@
+"""Per-replica RabbitMQ subscriber for HDuce
+
+Some events must reach every replica of a service, not just one of them:
+JWT revocations, agenda cache invalidations, doctor directory changes. Each
+``ReplicaSubscriber`` binds its own exclusive, auto-delete queue to one
+routing key of the appointment exchange and handles the events in a
+background thread, reconnecting after ``reconnect_delay`` on any failure.
+
+Events published while the queue is not bound are lost for that replica, so
+``on_connect`` runs after every (re)bind, before the first event: reload or
+drop whatever state may have missed them. ``on_idle`` runs about once per
+second for periodic work (pruning, retries).
+"""
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .config import RabbitMQConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSubscriber:
+    """Consumes one routing key on a queue of its own (every replica gets every event)"""
+
+    def __init__(
+        self,
+        routing_key: str,
+        handler: Callable[[Dict[str, Any]], None],
+        on_connect: Optional[Callable[[], None]] = None,
+        on_idle: Optional[Callable[[], None]] = None,
+        config: Optional[RabbitMQConfig] = None,
+        name: str = "Replica-Subscriber",
+        reconnect_delay: float = 5.0
+    ):
+        self.routing_key = routing_key
+        self.handler = handler
+        self.on_connect = on_connect
+        self.on_idle = on_idle
+        self.config = config or RabbitMQConfig.from_env()
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connection = None
+
+    def _consume(self) -> None:
+        import pika
+
+        credentials = pika.PlainCredentials(self.config.username, self.config.password)
+        self._connection = pika.BlockingConnection(
+            pika.ConnectionParameters(
+                host=self.config.host,
+                port=self.config.port,
+                credentials=credentials,
+                virtual_host=self.config.virtual_host,
+                heartbeat=self.config.heartbeat,
+                blocked_connection_timeout=self.config.blocked_connection_timeout
+            )
+        )
+        channel = self._connection.channel()
+        channel.exchange_declare(exchange=self.config.appointment_exchange, exchange_type="direct", durable=True)
+        # Cola propia de esta réplica: todas reciben cada evento
+        queue = channel.queue_declare(queue="", exclusive=True, auto_delete=True).method.queue
+        channel.queue_bind(exchange=self.config.appointment_exchange, queue=queue, routing_key=self.routing_key)
+        if self.on_connect is not None:
+            self.on_connect()
+        logger.info(f"✅ {self.name} conectado ({self.routing_key})")
+
+        for _, _, body in channel.consume(queue, auto_ack=True, inactivity_timeout=1.0):
+            if self._stop.is_set():
+                break
+            if body is not None:
+                try:
+                    self.handler(json.loads(body))
+                except Exception as e:
+                    logger.error(f"❌ {self.name}: evento inválido en {self.routing_key}: {e}")
+            if self.on_idle is not None:
+                self.on_idle()
+        channel.cancel()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._consume()
+            except Exception as e:
+                logger.error(f"❌ {self.name} caído, reintentando: {e}")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if self._connection is not None and self._connection.is_open:
+                    try:
+                        self._connection.close()
+                    except Exception:
+                        pass
+                self._connection = None
+
+    def start(self) -> threading.Thread:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -16,5 +16,10 @@ setup(
         "redis>=5.0.0",
         "pika>=1.3.0",
     ],
+    extras_require={
+        "aio": ["aio-pika>=9.0.0"],
+        "async-db": ["asyncpg>=0.29.0", "greenlet>=3.0.0"],
+        "pyjwt": ["PyJWT>=2.8.0"],
+    },
 )
 
@@ -0,0 +1,175 @@
+"""
+Conformance suite for the JWT backends (hduce_shared/auth/backends.py)
+
+Every installed backend must accept and reject exactly the same tokens, and
+tokens signed by one backend must verify with every other one.
+
+Usage (from shared-libraries/):
+    python -m pytest tests/test_jwt_backends.py -q
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hduce_shared.auth import JWTManager, available_backends, get_backend
+from hduce_shared.auth.backends import InvalidTokenError
+
+KEY = "conformance-secret-key-0123456789abcdef"
+OTHER_KEY = "another-secret-key-0123456789abcdef012"
+NOW = int(time.time())
+HEADER = {"alg": "HS256", "typ": "JWT"}
+DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+BACKENDS = available_backends()
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def sign(header, payload, key=KEY, payload_segment=None):
+    """Hand-built token, so the cases do not depend on any backend's encoder"""
+    header_segment = b64(json.dumps(header).encode("utf-8"))
+    if payload_segment is None:
+        payload_segment = b64(json.dumps(payload).encode("utf-8"))
+    signing_input = f"{header_segment}.{payload_segment}"
+    digest = DIGESTS.get(header.get("alg"), hashlib.sha256) if isinstance(header, dict) else hashlib.sha256
+    signature = hmac.new(key.encode("utf-8"), signing_input.encode("ascii"), digest).digest()
+    return f"{signing_input}.{b64(signature)}"
+
+
+VALID = sign(HEADER, {"sub": "paciente@hduce.com", "exp": NOW + 600})
+HEADER_SEGMENT, PAYLOAD_SEGMENT, SIGNATURE_SEGMENT = VALID.split(".")
+
+ACCEPTED = {
+    "valid": VALID,
+    "no_exp": sign(HEADER, {"sub": "paciente@hduce.com"}),
+    "exp_float": sign(HEADER, {"exp": NOW + 600.5}),
+    "nbf_past": sign(HEADER, {"nbf": NOW - 60}),
+    "iat_past": sign(HEADER, {"iat": NOW - 60}),
+    "iat_float": sign(HEADER, {"iat": NOW - 1.5}),
+    "iat_future": sign(HEADER, {"iat": NOW + 3600}),
+    "issuer": sign(HEADER, {"iss": "auth-service"}),
+    "other_typ": sign({"alg": "HS256", "typ": "XYZ"}, {"sub": "a"}),
+    "custom_claims": sign(HEADER, {"user_id": 1, "role": "doctor", "type": "access"}),
+}
+
+REJECTED = {
+    "expired": sign(HEADER, {"exp": NOW - 60}),
+    "exp_now": sign(HEADER, {"exp": NOW}),
+    "nbf_future": sign(HEADER, {"nbf": NOW + 600}),
+    "wrong_key": sign(HEADER, {"sub": "a"}, key=OTHER_KEY),
+    "tampered_payload": ".".join([
+        HEADER_SEGMENT, b64(json.dumps({"sub": "admin@hduce.com", "exp": NOW + 600}).encode()), SIGNATURE_SEGMENT
+    ]),
+    "tampered_signature": ".".join([HEADER_SEGMENT, PAYLOAD_SEGMENT, SIGNATURE_SEGMENT[:-4] + "AAAA"]),
+    "alg_none": b64(json.dumps({"alg": "none"}).encode()) + "." + PAYLOAD_SEGMENT + ".",
+    "alg_not_allowed": sign({"alg": "HS512", "typ": "JWT"}, {"sub": "a"}),
+    "exp_string": sign(HEADER, {"exp": str(NOW + 600)}),
+    "exp_bool": sign(HEADER, {"exp": True}),
+    "iat_string": sign(HEADER, {"iat": "yesterday"}),
+    "iat_numeric_string": sign(HEADER, {"iat": str(NOW)}),
+    "audience": sign(HEADER, {"aud": "hduce"}),
+    "sub_not_string": sign(HEADER, {"sub": 1}),
+    "jti_not_string": sign(HEADER, {"jti": 1}),
+    "payload_list": sign(HEADER, None, payload_segment=b64(b"[1, 2]")),
+    "payload_not_json": sign(HEADER, None, payload_segment=b64(b"not json")),
+    "header_not_json": b64(b"not json") + "." + PAYLOAD_SEGMENT + "." + SIGNATURE_SEGMENT,
+    "header_list": b64(b"[1]") + "." + PAYLOAD_SEGMENT + "." + SIGNATURE_SEGMENT,
+    "bad_signature_base64": HEADER_SEGMENT + "." + PAYLOAD_SEGMENT + ".!!!!",
+    "non_ascii_payload": HEADER_SEGMENT + ".é." + SIGNATURE_SEGMENT,
+    "non_ascii_signature": HEADER_SEGMENT + "." + PAYLOAD_SEGMENT + ".é",
+    "garbage": "not-a-token",
+    "two_segments": "a.b",
+    "four_segments": VALID + ".x",
+    "empty": "",
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("case", sorted(ACCEPTED))
+def test_accepts(backend, case):
+    claims = get_backend(backend).decode(ACCEPTED[case], KEY, ["HS256"])
+    assert isinstance(claims, dict)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("case", sorted(REJECTED))
+def test_rejects(backend, case):
+    with pytest.raises(InvalidTokenError):
+        get_backend(backend).decode(REJECTED[case], KEY, ["HS256"])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_same_claims(backend):
+    reference = get_backend(BACKENDS[0]).decode(VALID, KEY, ["HS256"])
+    assert get_backend(backend).decode(VALID, KEY, ["HS256"]) == reference
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS384", "HS512"])
+@pytest.mark.parametrize("encoder", BACKENDS)
+@pytest.mark.parametrize("decoder", BACKENDS)
+def test_cross_backend_round_trip(encoder, decoder, algorithm):
+    claims = {"sub": "doctor@hduce.com", "user_id": 7, "role": "doctor", "exp": NOW + 600}
+    token = get_backend(encoder, algorithm).encode(claims, KEY, algorithm)
+    assert get_backend(decoder, algorithm).decode(token, KEY, [algorithm]) == claims
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_jwt_manager_backend(backend):
+    manager = JWTManager(KEY, backend=backend)
+    token = manager.create_access_token({"sub": "paciente@hduce.com", "user_id": 1})
+    for other in BACKENDS:
+        result = JWTManager(KEY, backend=other, cache_size=0).verify_token(token)
+        assert result.is_valid and result.user_id == "paciente@hduce.com"
+    assert manager.decode_token(REJECTED["wrong_key"]) is None
+
+
+def test_default_backend_is_fastest_installed():
+    assert get_backend().name == BACKENDS[0] == "hmac"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("no-such-backend")
+
+
+def test_unknown_kid_refetch_runs_off_the_event_loop():
+    import asyncio
+    import threading
+
+    from hduce_shared.auth import JWKSKeySet
+
+    class RecordingKeySet(JWKSKeySet):
+        def __init__(self):
+            super().__init__("http://auth-service/jwks.json", min_refetch_interval=60)
+            self.download_threads = []
+
+        def _download(self):
+            self.download_threads.append(threading.current_thread())
+            return {"keys": []}
+
+    jwks = RecordingKeySet()
+    manager = JWTManager(KEY, jwks=jwks)
+    token = sign({"alg": "RS256", "kid": "rotated"}, {"sub": "a", "exp": NOW + 600})
+
+    async def decode():
+        return await manager.decode_token_async(token), threading.current_thread()
+
+    assert jwks.refetch_due("rotated")
+    claims, loop_thread = asyncio.run(decode())
+    assert claims is None
+    assert len(jwks.download_threads) == 1 and jwks.download_threads[0] is not loop_thread
+
+    # Dentro de min_refetch_interval no se vuelve a descargar
+    assert not jwks.refetch_due("rotated")
+    assert asyncio.run(decode())[0] is None and len(jwks.download_threads) == 1
+    assert asyncio.run(manager.decode_token_async(VALID)) is not None